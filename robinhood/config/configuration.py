@@ -1,3 +1,4 @@
+import os
 import json
 
 FILENAME='conf/json/rih_robot_motion_positions.json'
@@ -6,6 +7,7 @@ IMGS_PATH='imgs/dye_run_1/'
 LOG_PATH = "/home/panda1/RobInHoodPy/RobInHoodPy/logs"
 SETUP_PATH ="/home/panda1/RobInHoodPy/RobInHoodPy/robinhood/setup"
 DATA_PATH = "/home/panda1/RobInHoodPy/RobInHoodPy/data"
+WAYPOINTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "waypoints.json") #taught robot poses, see WaypointStore
 
 
 
@@ -40,7 +42,82 @@ FILTERING_CARTRIDGE_GRASP=0.05
 
 #TODO It is necessary to write a function to find the ports automaticallly.
 
+#Arduino stations (capper, holder, lightbox) acknowledge/done protocol.
+#Firmware supporting it replies "ACK <command>" when a command is received and "DONE <command>" when it is completed.
+#Set to False for old firmware, the drivers then wait for the fixed worst-case delays.
+ARDUINO_ACK_PROTOCOL = True
+ARDUINO_ACK_TIMEOUT = 2 # [s] time to wait for the ACK before falling back to the fixed delay
+CAPPER_DONE_TIMEOUT = 150 # [s]
+HOLDER_DONE_TIMEOUT = 15 # [s]
+LIGHTBOX_DONE_TIMEOUT = 30 # [s]
+
 PANDA_IP="172.16.0.2"
+ROBOT_STATE_RATE = 50 # [Hz] refresh rate of the robot state cache
+ROBOT_STATE_MAX_AGE = 0.1 # [s] oldest cached robot state accepted by state queries and motion preconditions
+MOTION_BLEND_RADIUS = 0.005 # [m] blend radius of the intermediate poses of blended cartesian paths (linear_path)
+MOTION_PROGRAM_OPTIMISE = True # remove no-op moves, collinear stops and redundant gripper commands of the motion programs
+MOTION_PROGRAM_TOLERANCE = 1e-5 # [m, rad] largest difference between poses considered equal or collinear by the optimiser
+GRIPPER_COMMAND_TIME = 1.0 # [s] estimated duration of a gripper command
+PANDA_JOINT_LIMITS = ([-2.8973, -1.7628, -2.8973, -3.0718, -2.8973, -0.0175, -2.8973], [2.8973, 1.7628, 2.8973, -0.0698, 2.8973, 3.7525, 2.8973]) # [rad] (q_min, q_max)
+VALIDATE_KINEMATICS = True # checks the joint limits and IK of the waypoints when RobInHood starts and the IK of every cartesian move target before the move (see KinematicsService)
+KINEMATICS_TOLERANCE = 0.001 # [m] largest distance between a cartesian waypoint and the forward kinematics of its IK solution
+KINEMATICS_ANGLE_TOLERANCE = 0.01 # [rad] largest rotation between a cartesian waypoint and the forward kinematics of its IK solution
+GUARDED_FORCE_LIMIT = 10.0 # [N] external force stopping a guarded move (see FrankxHelpers.guarded_move_x)
+GUARDED_SEAT_DISTANCE = 0.012 # [m] height above the target where a guarded descent switches from the transit to the grasp profile
+GRIPPER_WIDTH_TOLERANCE = 0.001 # [m] gripper openings within this width of the current one are skipped (see GripperState)
+PUMP_PROGRAMS = True # send the multi-step pump methods (primes, washes) as compiled command strings when the pump driver supports it
+PUMP_PROGRAM_METHODS = ["pump_prime_reagent_tubing", "pump_expel_reagent_tubing", "pump_prime_dispense_tubing", "dispense_volume", "dispense_dropwise"] # pump methods with a predicted time (RobInHood.predict_pump_operation)
+SPEED_CALIBRATION_FILE = "dispense_speeds.csv" # calibrated dispense speeds per solvent and pump, in the setup folder next to dispense.csv
+PUMP_COMMAND_MAX_LENGTH = 255 # longest command string accepted by the Cavro pumps
+PUMP_VALVE_TIME = 0.5 # [s] valve switch of the dispense pumps, used by the stroke planner time predictions
+PUMP_COMMAND_TIME = 0.3 # [s] serial round trip of a pump command and its idle poll
+# half steps per second of the Cavro predefined speed codes S0 .. S40 (XCalibur and C3000, 3000 steps syringe)
+CAVRO_SPEED_TABLE = [6000, 5600, 5000, 4400, 3800, 3200, 2600, 2200, 2000, 1800, 1600, 1400, 1200, 1000, 800, 600, 400, 200,
+                     190, 180, 170, 160, 150, 140, 130, 120, 110, 100, 90, 80, 70, 60, 50, 40, 30, 20, 18, 16, 14, 12, 10]
+TELEMETRY_RATE = 100 # [Hz] sampling rate of the robot telemetry recorder (RobInHood.start_telemetry)
+TELEMETRY_CAPACITY = 360000 # samples kept by the telemetry ring buffer, one hour at TELEMETRY_RATE
+TELEMETRY_PATH = "/home/panda1/RobInHoodPy/RobInHoodPy/telemetry.dat" # memory-mapped telemetry buffer
+#Dynamics of the robot motions per segment class, relative to the Panda limits (see MotionProfiles)
+#transit - free-space moves between stations, approach - moves next to a station, grasp - moves into and out of
+#a grasp or release pose, pour - tilting a vial over the filtration funnel. Motions without a profile use the vel of RobInHood.
+MOTION_PROFILES = {
+"transit": {"velocity": 0.2, "acceleration": 0.1, "jerk": 0.05},
+"approach": {"velocity": 0.05, "acceleration": 0.05, "jerk": 0.05},
+"grasp": {"velocity": 0.05, "acceleration": 0.05, "jerk": 0.05},
+"pour": {"velocity": 0.05, "acceleration": 0.05, "jerk": 0.05},
+}
+
+#Operator interventions (manual capping, filter cartridge replacement)
+#"cli" - requests are answered in the terminal, "file" - requests are written to OPERATOR_REQUEST_PATH and answered
+#by writing the answer (e.g. y) in request_<id>.answer
+OPERATOR_QUEUE_BACKEND = "cli"
+OPERATOR_REQUEST_PATH = "/home/panda1/RobInHoodPy/RobInHoodPy/operator_requests"
+
+#Duration models in seconds used by the simulation backend (RobInHood(sim=True))
+SIM_DURATIONS = {
+"serial_open": 2.0, # opening the port of an Arduino station
+"device_init": 5.0, # connecting/initialising a pylabware device
+"command": 0.2, # any other device command
+"joint_motion_base": 0.8, # fixed part of a joint motion
+"joint_speed": 2.0, # [rad/s] joint speed at vel = 1.0
+"linear_motion_base": 0.6, # fixed part of a cartesian motion
+"linear_speed": 1.0, # [m/s] cartesian speed at vel = 1.0
+"gripper": 1.5,
+"pump_valve": 0.5, # valve switch
+"pump_stroke": 12.0, # full syringe aspirate and dispense at the default speed
+"pump_command": 0.3, # serial round trip of a pump command and its idle poll
+"quantos_door": 3.0,
+"quantos_dosing": 60.0,
+"quantos_stable_weight": 5.0,
+"capper_spin": 60.0,
+"holder_move": 4.0,
+"lightbox_door": 10.0,
+"lightbox_command": 0.5,
+"filtration": 180.0, # filter_setup/filter_vial when no wait_time is given
+"filter_cleaning": 300.0,
+"camera": 2.0,
+"operator": 300.0, # operator response time to an intervention request
+}
 
 
 def read_json_cfg(filename):
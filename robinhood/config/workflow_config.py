@@ -2,16 +2,47 @@
 
 
 
+#Dispense pumps of the liquid dispensing station, used by the PumpRouter
+#name - pylabware device name, device - RobInHood attribute of the pump, ports - workflow ports of the pump
+#port_offset - subtracted from the workflow port to get the valve position of the pump, port_prefix - prepended to the valve position in pump commands
+#dispense, air, waste - keys of DISPENSE_HARDCODES of the dispense line, air and waste ports of the pump
+#default_speed, dropwise_speed - predefined pump speeds, primed_variable - running variable of the solvent primed in the dispense line
+#line_state_variable - running variable of the solvent fractions in the dispense line (see DispenseLineModel)
+#syringe_volume - [uL] syringe volume, full_steps - plunger steps of a full stroke, used to compile pump programs (see PumpProgramCompiler)
 PUMP_PORT_ASSIGNMENTS = {
 
 "Dispense_1":
 {"name": "Tecan", 
- "ports":[0,1,2,3,4,5,6,7,8,9,10,11,12]
+ "ports":[0,1,2,3,4,5,6,7,8,9,10,11,12],
+ "device": "pump",
+ "port_offset": 0,
+ "port_prefix": "",
+ "dispense": "Dispense",
+ "air": "Air",
+ "waste": "Waste",
+ "default_speed": 11,
+ "dropwise_speed": 14,
+ "primed_variable": "pump_1_primed_solvent",
+ "line_state_variable": "pump_1_line_state",
+ "syringe_volume": 1000,
+ "full_steps": 3000
 }
 ,
 "Dispense_2":
 {"name": "Tricont", 
- "ports":[13,14,15,16,17,18]
+ "ports":[13,14,15,16,17,18],
+ "device": "pump_2",
+ "port_offset": 12,
+ "port_prefix": "I",
+ "dispense": "Dispense_2",
+ "air": "Air_2",
+ "waste": "Waste_2",
+ "default_speed": 20,
+ "dropwise_speed": 27,
+ "primed_variable": "pump_2_primed_solvent",
+ "line_state_variable": "pump_2_line_state",
+ "syringe_volume": 12500,
+ "full_steps": 3000
 }
 }
 
@@ -51,3 +82,142 @@ FILTRATION_HARDCODES={
 }
 
 
+
+
+#Resources of RiH that can only be used by one operation at a time when running a workflow graph on the station scheduler
+STATION_RESOURCES = ["arm", "pump", "pump_2", "quantos", "capper", "ika", "holder", "lightbox", "filt_machine"]
+
+
+#Resources held by RobInHood methods when scheduled. Methods not listed hold the arm.
+#Pump methods also hold the pump the requested chemical is connected to.
+#Vial transfers also hold every station the vial is taken from, placed in or passes through (the Quantos transfers go through the holder).
+METHOD_RESOURCES = {
+"cap": ["capper"],
+"check_capping": ["capper"],
+"vial_decap": ["arm", "capper"],
+"open_lightbox": ["lightbox"],
+"close_lightbox": ["lightbox"],
+"light_on": ["lightbox"],
+"light_off": ["lightbox"],
+"save_picture_from_lightbox": ["lightbox"],
+"hold_position": ["holder"],
+"infuse_position": ["holder"],
+"pump_prime_reagent_tubing": [],
+"pump_expel_reagent_tubing": [],
+"pump_prime_dispense_tubing": [],
+"dispense_volume": [],
+"dispense_dropwise": [],
+"tare": ["quantos"],
+"zero": ["quantos"],
+"set_antistatic": ["quantos"],
+"take_weight": ["quantos"],
+"quantos_dosing": ["quantos"],
+"shut_door": ["quantos"],
+"check_quantos_door_position": ["quantos"],
+"check_quantos_cartridge": ["quantos"],
+"pick_and_place_cartridge_in_quantos": ["arm", "quantos"],
+"remove_cartridge_from_quantos": ["arm", "quantos"],
+"quantos_cartridge_handling_logic": ["arm", "quantos"],
+"vial_pump_to_quantos": ["arm", "holder", "quantos"],
+"vial_quantos_to_pump": ["arm", "holder", "quantos"],
+"vial_rack_to_quantos": ["arm", "holder", "quantos"],
+"vial_quantos_to_rack": ["arm", "holder", "quantos"],
+"vial_quantos_to_ika": ["arm", "holder", "ika", "quantos"],
+"vial_ika_to_quantos": ["arm", "holder", "ika", "quantos"],
+"vial_rack_to_pump": ["arm", "holder"],
+"vial_pump_to_rack": ["arm", "holder"],
+"vial_rack_to_ika": ["arm", "holder", "ika"],
+"vial_ika_to_rack": ["arm", "holder", "ika"],
+"vial_pump_to_ika": ["arm", "holder", "ika"],
+"vial_ika_to_pump": ["arm", "holder", "ika"],
+"vial_capper_to_ika": ["arm", "capper", "ika"],
+"vial_pump_to_capper": ["arm", "capper", "holder"],
+"vial_capper_to_pump": ["arm", "capper", "holder"],
+"vial_capper_to_rack": ["arm", "capper", "holder"],
+"vial_pump_to_lightbox": ["arm", "holder", "lightbox"],
+"vial_lightbox_to_pump": ["arm", "holder", "lightbox"],
+"filtration_prep": ["arm", "holder", "quantos", "filt_machine"],
+"just_filter_sample_collect_filtrate": ["arm", "quantos", "filt_machine"],
+"just_filter_sample_disgard_filtrate": ["arm", "filt_machine"],
+"filter_cleaning_packdown": ["quantos", "filt_machine"],
+"request_filter_replacement": ["filt_machine"],
+"filter_sample_collect_filtrate": ["arm", "holder", "quantos", "filt_machine", "capper"],
+"filter_sample_disgard_filtrate": ["arm", "holder", "quantos", "filt_machine", "capper"],
+}
+
+
+#Changeover costs in seconds used by the sample order planner
+#cartridge_load - picking and placing a cartridge when no cartridge is on the quantos
+#cartridge_swap - removing the mounted cartridge and placing a new one
+#dispense_prime - emptying the dispense line, washing cycles and priming with a new solvent
+CHANGEOVER_COSTS = {
+"cartridge_load": 120,
+"cartridge_swap": 240,
+"dispense_prime": 300,
+}
+
+#Density [g/mL] of the dispensed solvents, used by the gravimetric dispense speed calibration when the calibration table has none
+#Key - Liquid name as in dispense.csv
+SOLVENT_DENSITIES = {
+"Water(DI)": 0.997,
+"Ethanol": 0.789,
+"EtOH": 0.789
+}
+
+#Compatibility of the solvents sharing a dispense line, used to choose the wash cycles of a dispense line prime
+#Key - (solvent, solvent) as in dispense.csv, the pairs are symmetric, pairs not listed are "incompatible"
+#Value - "compatible" (same solvent, e.g. another grade) or "miscible"
+SOLVENT_COMPATIBILITY = {
+("Water(DI)", "Ethanol"): "miscible",
+("Ethanol", "EtOH"): "compatible"
+}
+
+#Largest residual fraction of a solvent tolerated in the next solvent primed in the line, per compatibility class
+COMPATIBILITY_TOLERANCES = {
+"same": 1.0,
+"compatible": 1e-2,
+"miscible": 1e-3,
+"incompatible": 1e-4
+}
+
+#Fraction of the previous content left in the dispense line by each step of a prime:
+#emptying the line (2 mL to waste), one wash cycle (1 mL solvent in, 2 mL to waste), filling the line (1 mL)
+#With these values the 2 cycle wash leaves 1e-4, 1 cycle 1e-3 and no wash cycle 1e-2
+LINE_FLUSH_RESIDUALS = {
+"empty": 0.1,
+"wash": 0.1,
+"prime": 0.1
+}
+
+
+#Device methods traced by RobInHood.enable_tracing in addition to the public RobInHood methods
+#Key - RobInHood attribute of the device
+#Value - methods of the device that are traced
+TRACED_DEVICE_METHODS = {
+"robot": ["move_robot_j", "move_robot_x", "open_gripper", "open_gripper_set_width", "close_gripper", "recover_from_errors"],
+"pump": ["dispense", "set_predefined_speed", "initialize_device"],
+"pump_2": ["dispense", "set_predefined_speed", "initialize_device"],
+"quantos": ["open_front_door", "close_front_door", "open_side_door", "close_side_door", "tare", "zero",
+            "set_target_mass", "start_dosing", "get_stable_weight", "set_antistatic_on", "set_antistatic_off"],
+"filt_machine": ["filter_setup", "filter_vial", "clean"],
+}
+
+
+#Physical state left behind by RobInHood methods, recorded in the workflow journal when the method is run as a step
+#Vial locations are recorded for every vial_<source>_to_<destination> method
+JOURNAL_STATE_CHANGES = {
+"open_lightbox": {"lightbox_door": "open"},
+"close_lightbox": {"lightbox_door": "closed"},
+"light_on": {"lightbox_light": "on"},
+"light_off": {"lightbox_light": "off"},
+"hold_position": {"holder": "holding"},
+"infuse_position": {"holder": "infusing"},
+"init_quantos": {"quantos_doors": "open"},
+"shut_door": {"quantos_doors": "closed"},
+"quantos_dosing": {"quantos_doors": "open"},
+"filtration_prep": {"quantos_doors": "closed"},
+"just_filter_sample_collect_filtrate": {"quantos_doors": "closed"},
+"filter_cleaning_packdown": {"quantos_doors": "open"},
+"filter_sample_collect_filtrate": {"quantos_doors": "open"},
+"filter_sample_disgard_filtrate": {"quantos_doors": "open"},
+}
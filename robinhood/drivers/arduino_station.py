@@ -0,0 +1,79 @@
+import time
+import logging
+from ..config.configuration import ARDUINO_ACK_PROTOCOL, ARDUINO_ACK_TIMEOUT
+
+
+class ArduinoStation():
+    """
+    Base class for the Arduino stations (capper, holder, lightbox) implementing the acknowledge/done protocol.
+
+    After a command is written the firmware replies "ACK <command>" and, once the station has finished,
+    "DONE <command>". Calls then return as soon as the station reports completion. When the ACK does not
+    arrive (old firmware) or ack_protocol is False, the fixed worst-case delay of the command is used instead.
+
+    :param serial_port: an open serial.Serial object (with a read timeout)
+    :param name: name of the station logger
+    :param ack_protocol: bool, use the acknowledge/done protocol when True
+    :param done_timeout: seconds to wait for DONE after the ACK before raising TimeoutError
+    """
+    def __init__(self, serial_port, name="Arduino_Station", ack_protocol=ARDUINO_ACK_PROTOCOL, done_timeout=30, ack_timeout=ARDUINO_ACK_TIMEOUT):
+        self._serial = serial_port
+        self._logger = logging.getLogger(name)
+        self.ack_protocol = ack_protocol
+        self.done_timeout = done_timeout
+        self.ack_timeout = ack_timeout
+        self._pending_command = None
+        self._pending_delay = 0
+        self._acknowledged = False
+
+    def send_command(self, command: bytes, fallback_delay=0, wait=True):
+        """
+        Writes a command to the station.
+        :param command: single byte command understood by the firmware
+        :param fallback_delay: worst-case duration of the command in seconds, used with old firmware
+        :param wait: when True, blocks until the command is completed
+        """
+        if self.ack_protocol:
+            self._serial.reset_input_buffer()
+        self._serial.write(command)
+        self._pending_command = command
+        self._pending_delay = fallback_delay
+        self._acknowledged = False
+        if wait:
+            self.wait_for_completion()
+
+    def _read_reply(self):
+        line = self._serial.readline().strip()
+        if not line:
+            return None, None
+        reply = line.split(b" ", 1)
+        return reply[0].upper(), reply[1] if len(reply) > 1 else self._pending_command
+
+    def wait_for_completion(self, fallback_delay=None):
+        """
+        Blocks until the last command is reported as done.
+        :param fallback_delay: overrides the fixed delay of the last command when the protocol is not available
+        """
+        if self._pending_command is None:
+            return
+        delay = self._pending_delay if fallback_delay is None else fallback_delay
+        start = time.monotonic()
+
+        if self.ack_protocol:
+            deadline = start + self.ack_timeout
+            while time.monotonic() < deadline or self._acknowledged:
+                kind, command = self._read_reply()
+                if kind == b"ACK" and command == self._pending_command:
+                    if not self._acknowledged:
+                        deadline = time.monotonic() + self.done_timeout
+                    self._acknowledged = True
+                elif kind == b"DONE" and command == self._pending_command:
+                    self._logger.debug(f"Command {command} done in {time.monotonic() - start:.1f} s")
+                    self._pending_command = None
+                    return
+                elif self._acknowledged and time.monotonic() > deadline:
+                    raise TimeoutError(f"{self._logger.name} did not complete command {self._pending_command} in {self.done_timeout} s")
+            self._logger.warning(f"No acknowledge from the firmware, waiting the fixed {delay} s delay")
+
+        time.sleep(max(0, delay - (time.monotonic() - start)))
+        self._pending_command = None
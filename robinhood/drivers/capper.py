@@ -5,22 +5,29 @@ sys.path.insert(1, os.path.dirname(os.path.abspath(__file__))+'/..')
 
 import serial
 import time
-import logging
 from config.configuration import *
 from .camera import CameraCapper
+from .arduino_station import ArduinoStation
 
-class Capper():
-    def __init__(self,port=CAPPER_PORT, camera_id=0):
-        self.capper = serial.Serial(port=port, baudrate=9600)
+class Capper(ArduinoStation):
+    def __init__(self,port=CAPPER_PORT, camera_id=0, ack_protocol=ARDUINO_ACK_PROTOCOL):
+        self.capper = serial.Serial(port=port, baudrate=9600, timeout=0.1)
         time.sleep(2)
+        super().__init__(self.capper, name="Capper", ack_protocol=ack_protocol, done_timeout=CAPPER_DONE_TIMEOUT)
         self.camera_id= camera_id
-        self._logger = logging.getLogger("Capper")
-    def right(self):
+    def right(self, wait=False):
+        """
+        Spins the capper to the right (capping). Returns straight away unless wait is True,
+        use wait_for_completion() to block until the capper is done.
+        """
         self._logger.info("Capper moving right")
-        self.capper.write(b'R')
-    def left(self):
+        self.send_command(b'R', fallback_delay=90, wait=wait)
+    def left(self, wait=False):
+        """
+        Spins the capper to the left (decapping). Returns straight away unless wait is True.
+        """
         self._logger.info("Capper moving left")
-        self.capper.write(b'L')
+        self.send_command(b'L', fallback_delay=90, wait=wait)
     def check_capping(self):
         cameracapper=CameraCapper(camera_id=self.camera_id)
         cameracapper.init_camera()
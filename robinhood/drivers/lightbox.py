@@ -12,37 +12,32 @@ import logging
 import cv2
 import threading
 import numpy as np
+from .arduino_station import ArduinoStation
 
-class LightBox():
-    def __init__(self,port=LIGHTBOX_PORT,camera_id=2):
-        self.holder = serial.Serial(port=port, baudrate=9600)
+class LightBox(ArduinoStation):
+    def __init__(self,port=LIGHTBOX_PORT,camera_id=2, ack_protocol=ARDUINO_ACK_PROTOCOL):
+        self.holder = serial.Serial(port=port, baudrate=9600, timeout=0.1)
         self.camera_id=camera_id
         time.sleep(2)
-        self._logger = logging.getLogger("Lightbox.")
-    def opening_lightbox(self):
+        super().__init__(self.holder, name="Lightbox.", ack_protocol=ack_protocol, done_timeout=LIGHTBOX_DONE_TIMEOUT)
+    def opening_lightbox(self, wait=True):
         self._logger.info("Opening the lightbox.")
-        self.holder.write(b'1')
-        time.sleep(15)
-    def closing_lightbox(self):
+        self.send_command(b'1', fallback_delay=15, wait=wait)
+    def closing_lightbox(self, wait=True):
         self._logger.info("Closing the lightbox.")
-        self.holder.write(b'0')
-        time.sleep(15)
+        self.send_command(b'0', fallback_delay=15, wait=wait)
     def light_on(self):
         self._logger.info("Switching light on.")
-        self.holder.write(b'3')
-        time.sleep(1)
+        self.send_command(b'3', fallback_delay=1)
     def light_off(self):
         self._logger.info("Switching light off.")
-        self.holder.write(b'4')
-        time.sleep(1)
+        self.send_command(b'4', fallback_delay=1)
     def stirr_on(self):
         self._logger.info("Stirring on.")
-        self.holder.write(b'6')
-        time.sleep(1)
+        self.send_command(b'6', fallback_delay=1)
     def stirr_off(self):
         self._logger.info("Stirring off.")
-        self.holder.write(b'5')
-        time.sleep(1)
+        self.send_command(b'5', fallback_delay=1)
     def take_picture(self,dye_name="",solid_name="",path=main_path+"/data/imgs/experiment1/"):
         lightbox_camera=LightboxCamera(camera_id=self.camera_id)
         lightbox_camera.init_camera()
@@ -7,18 +7,18 @@ file_path = sys.path.insert(1, os.path.dirname(os.path.abspath(__file__))+'/..')
 import serial
 import time
 from config.configuration import *
-import logging
+from .arduino_station import ArduinoStation
 
-class Holder():
-    def __init__(self,port=HOLDER_PORT):
-        self.holder = serial.Serial(port=port, baudrate=9600)
+class Holder(ArduinoStation):
+    def __init__(self,port=HOLDER_PORT, ack_protocol=ARDUINO_ACK_PROTOCOL):
+        self.holder = serial.Serial(port=port, baudrate=9600, timeout=0.1)
         time.sleep(2)
-        self._logger = logging.getLogger("PumpHolder")
+        super().__init__(self.holder, name="PumpHolder", ack_protocol=ack_protocol, done_timeout=HOLDER_DONE_TIMEOUT)
     
-    def holding_position(self):
+    def holding_position(self, wait=False):
         self._logger.info("Moving to holding/wash position")
-        self.holder.write(b'1')
+        self.send_command(b'1', fallback_delay=6, wait=wait)
 
-    def infusing_position(self):
+    def infusing_position(self, wait=False):
         self._logger.info("Moving to dispensing position")
-        self.holder.write(b'0')
\ No newline at end of file
+        self.send_command(b'0', fallback_delay=6, wait=wait)
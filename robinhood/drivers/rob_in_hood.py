@@ -4,8 +4,8 @@
 ####################
 
 import math
+import inspect
 import logging
-import time
 import datetime
 from typing import Union
 from frankx import Affine, LinearRelativeMotion, Robot, Gripper
@@ -22,9 +22,28 @@ from ..drivers.shaker import Shaker
 from ..drivers.lightbox import LightBox
 from ..drivers.Filtbot.filt_machine import FiltMachine
 from ..utils.workflow_helper import Workflow_Helper
+from ..utils.device_bringup import DeviceBringup
+from ..utils.scheduler import StationScheduler
+from ..utils.sample_planner import SamplePlanner
+from ..utils.clock import RealClock, VirtualClock
+from ..utils.tracing import Tracer
+from ..utils.workflow_journal import WorkflowJournal
+from ..utils.operator_queue import OperatorQueue
+from ..utils.waypoint_store import WaypointStore
+from ..utils.route_graph import RouteGraph
+from ..utils.motion_program import MotionProgram, MotionProgramOptimiser
+from ..utils.telemetry import TelemetryRecorder
+from ..utils.kinematics import KinematicsService
+from ..utils.pump_router import PumpRouter
+from ..utils.pump_program import PumpProgram, PumpProgramCompiler
+from ..utils.stroke_planner import StrokePlanner
+from ..utils.speed_calibration import SpeedCalibration
+from ..utils.line_state import DispenseLineModel
+from ..utils.motion_executor import MotionExecutor
+from ..drivers.sim_devices import SimCamera, SimCapper, SimFiltMachine, SimFrankxHelpers, SimHolder, SimIKA, SimLightBox, SimPump, SimQuantos
 import json
+import threading
 
-from ..config.workflow_config import PUMP_PORT_ASSIGNMENTS
 ####################TODO remove when making this a pip package
 import sys
 import os 
@@ -36,7 +55,7 @@ class RobInHood():
     """
     This class connects with Panda robot.
     """
-    def __init__(self, inst_logger = "test_logger", data_path: str = DATA_PATH, conf_path=FILENAME, ip=PANDA_IP, sim=False, vel=0.05):
+    def __init__(self, inst_logger = "test_logger", data_path: str = DATA_PATH, conf_path=FILENAME, ip=PANDA_IP, sim=False, vel=0.05, setup_path: str = SETUP_PATH):
         """
         This constructor takes as input the filename, ip and sim.
         : param inst_logger: str name for the instrument logger file.
@@ -44,10 +63,13 @@ class RobInHood():
         :type: string
         :param ip: is a string containing the IP address of the Panda's robot API.
         :type: string
-        :param sim: is a bool value that allows to run the code in sumulation mode when set to True 
+        :param sim: is a bool value that allows to run the code in sumulation mode when set to True. No serial port or robot
+        connection is opened, every device is simulated on a virtual clock (see simulate_campaign).
         :type: bool
         :param vel: it is used to set the velocity of the robot which goes from 0.01 to 1.0
         :type: float
+        :param setup_path: folder with the dispense, quantos, filt and samples csv files
+        :type: string
         """
         #self.cfg=read_json_cfg(conf_path)
         self.robot=None
@@ -55,6 +77,9 @@ class RobInHood():
         self.ip=ip
         self.sim=sim
         self.vel=vel
+        self.clock = VirtualClock() if sim else RealClock()
+        self.running_variables_file = "running_variables_sim.json" if sim else "running_variables.json"
+        self.journal = None
 
         
 
@@ -67,71 +92,484 @@ class RobInHood():
         self._cartridge_in_quantos = saved_variables["cartridge_in_quantos"] #cartridge position on rack of cartridge currently on the quantos
         
         self.pump_port_assignments = PUMP_PORT_ASSIGNMENTS #dictionary with the ports of the dispense pumps
-
-   
-        if not sim:
-            #Runs workflow config helper object - looks for config in relevant files, creates output path for data (not logs)
-            self.workflow_helper = Workflow_Helper(config_path=SETUP_PATH, data_path=data_path)
-            self.dispense_dict,self.dispense_dict_meta, self.quantos_dict, self.filt_dict, self.sample_dict = self.workflow_helper.workflow_setup()
-        else:
-             self.dispense_dict, self.quantos_dict, self.filt_dict, self.sample_dict= {},{},{},{} 
-        
-        self.capper=Capper(camera_id=CAPPER_CAMERA_ID)
-        self.holder=Holder()
-        #self.shaker=Shaker()
-        
-        self.filt_machine = FiltMachine(machine_port=FILTERINGSTATION_PORT, pump_port=FILTRATIONPUMP_PORT, switch_address="1", port_config=self.filt_dict)
-        self.ika=RCTDigitalHotplate(device_name="IKA", connection_mode='serial', address='', port= IKA_PORT)
-        
-        
+        self.waypoints = WaypointStore(WAYPOINTS_PATH) #taught robot poses of the rack, IKA and transits between stations
+        self.routes = RouteGraph(self.waypoints) #shortest taught routes between stations
+        self.motion_optimiser = MotionProgramOptimiser(motion_overhead=self.routes.motion_overhead, gripper_time=GRIPPER_COMMAND_TIME, tolerance=MOTION_PROGRAM_TOLERANCE)
+        self.motion_reports = {} #last optimisation report of every motion program
+        self.kinematics = KinematicsService(PANDA_JOINT_LIMITS, tolerance=KINEMATICS_TOLERANCE, angle_tolerance=KINEMATICS_ANGLE_TOLERANCE) #memoised FK/IK of the waypoints
+        self.check_kinematics = VALIDATE_KINEMATICS #cartesian moves are checked against the IK cache before moving
+        self.kinematics_report = self.validate_kinematics() if self.check_kinematics else None
+
+        self.resource_locks = {resource: threading.Lock() for resource in STATION_RESOURCES} #shared with the station scheduler
+        self._running_variables_lock = threading.Lock()
+
+        #Runs workflow config helper object - looks for config in relevant files, creates output path for data (not logs)
+        self.workflow_helper = Workflow_Helper(config_path=setup_path, data_path=data_path)
+        self.dispense_dict,self.dispense_dict_meta, self.quantos_dict, self.filt_dict, self.sample_dict = self.workflow_helper.workflow_setup()
+        self.pump_router = PumpRouter(self.dispense_dict, self.pump_port_assignments) #pump and port arguments of every dispensed chemical
+        self.pump_commands = {device: MotionExecutor(clock=self.clock, name=f"{device}_commands", label="pump command") for device in self.pump_router.devices} #command thread of every pump, see start_pump
+        self.stroke_planners = {device: self.new_stroke_planner(line) for device, line in self.pump_router.devices.items()} #syringe strokes and predicted times
+        self.pump_compilers = {device: PumpProgramCompiler(planner, PUMP_COMMAND_MAX_LENGTH)
+                               for device, planner in self.stroke_planners.items()} #Cavro command strings of the pump programs
+        self.pump_reports = {} #last stroke plan and predicted time of every pump program
+        self.speed_calibration = SpeedCalibration(os.path.join(setup_path, SPEED_CALIBRATION_FILE)) #fastest accurate dispense speed of every solvent
+        self.line_model = DispenseLineModel(SOLVENT_COMPATIBILITY, COMPATIBILITY_TOLERANCES, LINE_FLUSH_RESIDUALS) #wash cycles of the dispense line primes
+        self._line_states = {device: saved_variables.get(line.line_state_variable) or {} for device, line in self.pump_router.devices.items()} #solvent fractions in every dispense line
         
-        
-        self.pump = XCalibur(self.pump_port_assignments["Dispense_1"]["name"], 'serial', port = PUMP_PORT, switch_address="0",address="1", syringe_size= "1.0mL")
-        self.pump_2 = C3000SyringePump(self.pump_port_assignments["Dispense_2"]["name"], port = ACID_PUMP_PORT, connection_mode="serial", address="1", switch_address="0", valve_type="6PORT_DISTR", syringe_size="12.5mL")
-        
-        
-        self.quantos=QuantosQB1(device_name="QUANTOS", connection_mode="serial", port=QUANTOS_PORT)
-        
-        self.timer=Timer()
-        self.lightbox=LightBox(camera_id=LIGHTBOX_CAMERA_ID)
-
-        self.camera_connected=self.init_camera()
-        self.ika_connected=self.init_ika()
-        self.pump_connected,self.pump2_connected =self.init_pumps()
-        self.quantos_connected=self.init_quantos()
-        self.filt_machine_connected = self.init_filt_machine()
-        self.robot_connected=self.init_robot()
+        self.timer=Timer(clock=self.clock)
+        if sim:
+            self.operator = OperatorQueue(backend="auto", clock=self.clock, operator_delay=SIM_DURATIONS["operator"])
+        else:
+            self.operator = OperatorQueue(backend=OPERATOR_QUEUE_BACKEND, request_path=OPERATOR_REQUEST_PATH)
+
+        self.bringup = self.init_devices()
+        self.clock.synchronise()
         self.devices_connected_report()
         self.hold_position()
-    
-    def linear_motion(self,pose):
-        self.robot.robot.read_once()
-        self.robot.robot.read_once()
-        self.robot.robot.read_once()
-        self.robot.move_robot_x(pose)
+
+    def init_devices(self) -> DeviceBringup:
+        """
+        Brings up every device concurrently on a thread pool. The devices are independent of each other,
+        so the start-up time is bounded by the slowest device rather than the sum of all of them.
+
+        :return: the DeviceBringup object holding the readiness report (per-device latency, success or failure)
+        """
+        bringup = DeviceBringup()
+        bringup.add_device("capper", self._bring_up_capper, critical=True)
+        bringup.add_device("holder", self._bring_up_holder, critical=True)
+        bringup.add_device("lightbox", self._bring_up_lightbox, critical=True)
+        bringup.add_device("camera", self._bring_up_camera)
+        bringup.add_device("ika", self._bring_up_ika)
+        bringup.add_device("pump", self._bring_up_pump)
+        bringup.add_device("pump_2", self._bring_up_pump_2)
+        bringup.add_device("quantos", self._bring_up_quantos, critical=True)
+        bringup.add_device("filt_machine", self._bring_up_filt_machine)
+        bringup.add_device("robot", self.init_robot, critical=True)
+        self._logger.info("Bringing up devices...")
+        bringup.run()
+
+        self.camera_connected = bringup.connected("camera")
+        self.ika_connected = bringup.connected("ika")
+        self.pump_connected = bringup.connected("pump")
+        self.pump2_connected = bringup.connected("pump_2")
+        self.quantos_connected = bringup.connected("quantos")
+        self.filt_machine_connected = bringup.connected("filt_machine")
+        self.robot_connected = bringup.connected("robot")
+        return bringup
+
+    def _bring_up_capper(self):
+        self.capper=SimCapper(self.clock) if self.sim else Capper(camera_id=CAPPER_CAMERA_ID)
+        return True
+
+    def _bring_up_holder(self):
+        self.holder=SimHolder(self.clock) if self.sim else Holder()
+        return True
+
+    def _bring_up_lightbox(self):
+        self.lightbox=SimLightBox(self.clock) if self.sim else LightBox(camera_id=LIGHTBOX_CAMERA_ID)
+        return True
+
+    def _bring_up_camera(self):
+        if self.sim:
+            self.camera = SimCamera(self.clock)
+        return self.init_camera()
+
+    def _bring_up_ika(self):
+        if self.sim:
+            self.ika=SimIKA(self.clock)
+        else:
+            self.ika=RCTDigitalHotplate(device_name="IKA", connection_mode='serial', address='', port= IKA_PORT)
+        return self.init_ika()
+
+    def _bring_up_pump(self):
+        if self.sim:
+            self.pump = SimPump(self.clock, "pump", self.pump_port_assignments["Dispense_1"]["name"], syringe_volume=1000.0, default_speed=11)
+        else:
+            self.pump = XCalibur(self.pump_port_assignments["Dispense_1"]["name"], 'serial', port = PUMP_PORT, switch_address="0",address="1", syringe_size= "1.0mL")
+        return self.init_pump()
+
+    def _bring_up_pump_2(self):
+        if self.sim:
+            self.pump_2 = SimPump(self.clock, "pump_2", self.pump_port_assignments["Dispense_2"]["name"], syringe_volume=12500.0, default_speed=20)
+        else:
+            self.pump_2 = C3000SyringePump(self.pump_port_assignments["Dispense_2"]["name"], port = ACID_PUMP_PORT, connection_mode="serial", address="1", switch_address="0", valve_type="6PORT_DISTR", syringe_size="12.5mL")
+        return self.init_pump_2()
+
+    def _bring_up_quantos(self):
+        if self.sim:
+            self.quantos=SimQuantos(self.clock)
+        else:
+            self.quantos=QuantosQB1(device_name="QUANTOS", connection_mode="serial", port=QUANTOS_PORT)
+        return self.init_quantos()
+
+    def _bring_up_filt_machine(self):
+        if self.sim:
+            self.filt_machine = SimFiltMachine(self.clock)
+        else:
+            self.filt_machine = FiltMachine(machine_port=FILTERINGSTATION_PORT, pump_port=FILTRATIONPUMP_PORT, switch_address="1", port_config=self.filt_dict)
+        return self.init_filt_machine()
+
+    def validate_kinematics(self) -> dict:
+        """
+        Checks the joint limits and the IK of every waypoint of the waypoint store (see KinematicsService.validate),
+        RobInHood does not start when a waypoint is out of the joint limits or unreachable.
+        """
+        report = self.kinematics.validate(self.waypoints)
+        if report["joint_limits"] or report["unreachable"]:
+            raise RuntimeError(f"Waypoints outside the joint limits {report['joint_limits']} or unreachable {report['unreachable']}, "
+                               f"fix {WAYPOINTS_PATH} or set VALIDATE_KINEMATICS = False")
+        return report
+
+    def check_reachable(self, *poses):
+        """
+        Raises a RuntimeError when a cartesian pose has no IK solution, before any robot motion to it.
+        The solutions are memoised (see KinematicsService.solve), a pose is solved once per run.
+        """
+        if not self.check_kinematics:
+            return
+        unreachable = [list(pose) for pose in poses if self.kinematics.solve(pose) is None]
+        if unreachable:
+            self._logger.error(f"No IK solution for {unreachable}")
+            raise RuntimeError(f"Cartesian poses out of reach: {unreachable}")
+
+    def linear_motion(self,pose,profile=None):
+        self.check_reachable(pose)
+        self.robot.get_state(ROBOT_STATE_MAX_AGE) #fresh robot state before the motion, from the state cache when possible
+        self.robot.move_robot_x(pose, profile=profile)
         return
-    def devices_connected_report(self): #TODO init filt machine
-        """
-        Terminates the program if one of the devices is not available.
-        """
-        if not self.camera_connected:
-            self._logger.error("Capper camera is not available.")
-        if not self.ika_connected:
-           self._logger.error("IKA station is not available.")
-        if not self.pump_connected:
-           self._logger.error("XCalibur Pump is not available.")
-        if not self.filt_machine_connected:
-            self._logger.error("Filtering machine not connected")
-        if not self.quantos_connected:
-            self._logger.error("Quantos is not connected.")
-            exit()
-        if not self.robot_connected:
-            self._logger.error("Robot not available or the emergency stop button is activated.") #removed pump connection check
-        if not self.robot_connected: #removed camera
+
+    def guarded_move(self, pose, force_limit=GUARDED_FORCE_LIMIT, profile=None, seat=False):
+        """
+        Linear move stopped by a contact force above force_limit [N].
+        :param seat: True when a contact means that the held object is seated (the move ends there),
+        False when a contact is a collision (RuntimeError)
+        returns: True when a contact stopped the move before pose
+        """
+        self.check_reachable(pose)
+        self.robot.get_state(ROBOT_STATE_MAX_AGE)
+        contact = self.robot.guarded_move_x(pose, force_limit, profile=profile)
+        if contact and not seat:
+            self._logger.error(f"Unexpected contact above {force_limit} N moving to {pose}")
+            self.robot.recover_from_errors()
+            raise RuntimeError(f"Unexpected contact moving to {pose}")
+        if contact:
+            self._logger.info(f"Contact before {pose}, object seated")
+        return contact
+
+    def linear_path(self, poses, blend_radius=MOTION_BLEND_RADIUS, profile=None):
+        """
+        Moves the robot through several cartesian poses as one blended trajectory instead of stopping at each pose.
+        The robot stops exactly at the last pose, so a path should end at the grasp or release point.
+        :param poses: list of cartesian poses [x, y, z, a, b, c]
+        :param blend_radius: [m] 0.0 stops at every pose
+        :param profile: motion profile of the path (see MOTION_PROFILES), None for the default profile
+        """
+        self.check_reachable(*poses)
+        self.robot.get_state(ROBOT_STATE_MAX_AGE)
+        self.robot.move_robot_path(poses, blend_radius=blend_radius, profile=profile)
+        return
+
+    def move_to_waypoint(self, waypoint, profile=None):
+        """
+        Moves the robot to a waypoint of the waypoint store, joint motion for joint waypoints and linear motion for cartesian ones.
+        :param profile: motion profile of the move when the waypoint has none of its own (see pose_profiles of the waypoint store)
+        """
+        profile = waypoint.profile or profile
+        if waypoint.kind == "j":
+            self.robot.move_robot_j(waypoint.pose, profile=profile)
+        else:
+            self.linear_motion(waypoint.pose, profile=profile)
+
+    def motion_program(self, name) -> MotionProgram:
+        """
+        Returns an empty motion program using the waypoint store and the route graph, run it with run_program.
+        """
+        return MotionProgram(name, self.waypoints, self.routes)
+
+    def run_program(self, program, optimise=MOTION_PROGRAM_OPTIMISE):
+        """
+        Runs the operations of a motion program, after removing its no-op moves, collinear stops and
+        redundant gripper commands when optimise is True (see MotionProgramOptimiser).
+        The optimisation report is kept in self.motion_reports under the program name.
+        """
+        if optimise:
+            program, self.motion_reports[program.name] = self.motion_optimiser.optimise(program)
+        self.check_reachable(*[pose for op in program.ops for pose in op.cartesian_poses()]) #nothing moves when a pose is out of reach
+        for op in program.ops:
+            if op.kind == "j":
+                self.robot.move_robot_j(op.target, profile=op.profile)
+            elif op.kind == "x":
+                self.linear_motion(op.target, profile=op.profile)
+            elif op.kind == "path":
+                self.linear_path(op.target, blend_radius=op.blend_radius, profile=op.profile)
+            elif op.kind == "guarded":
+                self.guarded_move(op.target, op.force_limit, op.profile, seat=op.seat)
+            elif op.kind == "clamp":
+                self.robot.close_gripper()
+            elif op.kind == "open":
+                self.robot.open_gripper()
+            elif op.kind == "width":
+                self.robot.open_gripper_set_width(op.target)
+        return
+
+    def motion_time_saved(self) -> float:
+        """
+        Returns the estimated time saved by the optimiser on the last run of every motion program, in seconds.
+        """
+        return sum(report["time_saved"] for report in self.motion_reports.values())
+
+    def follow_path(self, name, profile="transit"):
+        """
+        Moves the robot through the joint waypoints of a named path of the waypoint store (e.g. "home_to_rack").
+        :param profile: motion profile of the waypoints without a profile of their own
+        """
+        self.run_program(self.motion_program(name).path(name, profile))
+
+    def move_route(self, start, goal, loaded=True, include_start=False, profile="transit"):
+        """
+        Moves the robot along the shortest taught route between two stations or named poses of the route graph.
+        :param start: station or pose name where the robot is, the "leave" pose of a station
+        :param goal: station or pose name to move to, the "arrive" pose of a station
+        :param loaded: True when the robot holds a vial, only chains taught holding a vial are used
+        :param include_start: also moves to the start pose, for routes following a station sequence (pick at the rack or IKA)
+        :param profile: motion profile of the joint waypoints without a profile of their own, the cartesian via points
+        are next to a station and use the approach profile
+        returns: the list of RouteEdge followed
+        """
+        route = self.routes.route(start, goal, loaded=loaded)
+        self._logger.debug(f"Route {start} -> {goal}: {[edge.goal for edge in route]} ({self.routes.duration(route):.1f} s)")
+        self.run_program(self.motion_program(f"route_{start}_{goal}").route(start, goal, loaded, include_start, profile))
+        return route
+
+    def start_motion(self, function, *args, callback=None, **kwargs):
+        """
+        Starts a robot motion (a move or a transfer method such as self.vial_pump_to_rack) on the motion thread and
+        returns a MotionFuture straight away, so that device commands (lightbox, capper, holder, Quantos doors) run
+        while the arm is travelling. The device commands must not depend on where the arm is.
+        Call motion.result() before the next robot motion, it raises the exception of the motion.
+        motion.cancel() stops the motion and cancels the motions started after it.
+        :param callback: function called with the MotionFuture when the motion is finished, failed or cancelled
+        """
+        return self.robot.move_async(function, *args, callback=callback, **kwargs)
+
+    def wait_for_motions(self):
+        """
+        Blocks until every motion started with start_motion is finished.
+        """
+        self.robot.motions.wait()
+
+    def run_waypoint_steps(self, station, steps, blend_radius=None):
+        """
+        Runs the steps of a slot sequence returned by self.waypoints.sequence: waypoints, "clamp" and "release" gripper actions.
+        :param blend_radius: when set, consecutive cartesian waypoints are run as one blended path (see linear_path),
+        the robot still stops exactly before every gripper action and joint motion
+        Moves into and out of the gripper actions use the grasp motion profile, the other moves the approach profile.
+        """
+        self.run_program(self.motion_program(f"{station}_steps").steps(steps, self.waypoints.release_width(station), blend_radius))
+
+    def devices_connected_report(self):
+        """
+        Logs the readiness report of the bring-up phase (per-device latency, success or failure).
+        Terminates the program if one of the critical devices (Arduino stations, Quantos or robot) is not available.
+        """
+        self.bringup.log_report()
+        failed = self.bringup.failed_critical_devices()
+        if failed:
+            if "robot" in failed:
+                self._logger.error("Robot not available or the emergency stop button is activated.")
+            self._logger.error(f"Critical devices not available: {failed}")
             self._logger.error("Terminating the program.")
-            #if self.camera_connected:
-            #    self.camera.stop_streaming()
             exit()
+    #### Station scheduler methods ##################
+    def new_schedule(self, max_workers=4) -> StationScheduler:
+        """
+        Creates an empty workflow graph that shares the resource locks (arm, pumps, Quantos, capper...) of this object.
+        """
+        return StationScheduler(resource_locks=self.resource_locks, max_workers=max_workers, clock=self.clock)
+
+    def operation_resources(self, method_name, chemical=None) -> list:
+        """
+        Returns the resources held by a RobInHood method when it runs on the scheduler.
+        Methods not listed in METHOD_RESOURCES hold the arm. Pump methods also hold the pump the chemical is connected to.
+        """
+        resources = set(METHOD_RESOURCES.get(method_name, ["arm"]))
+        if chemical is not None:
+            resources.add(self.pump_router.route(chemical).device)
+        return sorted(resources)
+
+    def schedule_operation(self, schedule, name, method_name, *args, depends_on=(), resources=None, **kwargs) -> str:
+        """
+        Adds a RobInHood method call to a workflow graph created with new_schedule.
+
+        e.g. dose = rih.schedule_operation(schedule, "dose_1", "quantos_dosing", quantity=20)
+             rih.schedule_operation(schedule, "prime_acid", "pump_prime_dispense_tubing", chemical="EtOH")
+             rih.schedule_operation(schedule, "to_rack_1", "vial_quantos_to_rack", vial_number=1, depends_on=[dose])
+
+        Pump methods get the time predicted by predict_pump_operation as estimate, when several operations are ready
+        the scheduler starts the longest ones first.
+        :param resources: overrides the resources looked up with operation_resources
+        :return: the name of the operation
+        """
+        bound = inspect.signature(getattr(self, method_name)).bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        if resources is None:
+            chemical = arguments.get("chemical", arguments.get("cleaning_solvent"))
+            resources = self.operation_resources(method_name, chemical=chemical)
+        estimate = None
+        if method_name in PUMP_PROGRAM_METHODS:
+            estimate = self.predict_pump_operation(method_name, **arguments)["time"]
+        return schedule.add_operation(name, getattr(self, method_name), *args, resources=resources, depends_on=depends_on,
+                                      estimate=estimate, **kwargs)
+
+    def plan_sample_order(self, cost_table=CHANGEOVER_COSTS, apply=False) -> dict:
+        """
+        Reorders the samples of samples.csv to minimise Quantos cartridge swaps and dispense line primes,
+        starting from the cartridge and solvents currently loaded. Logs the optimised plan and the estimated time saved.
+
+        :param cost_table: changeover costs in seconds, see CHANGEOVER_COSTS in workflow_config
+        :param apply: when True self.sample_dict is replaced by the optimised samples dictionary
+        :return: the plan dictionary returned by SamplePlanner.plan
+        """
+        cartridge_solid = None
+        for solid, position in self.quantos_dict.items():
+            if position == self._cartridge_in_quantos:
+                cartridge_solid = solid
+        planner = SamplePlanner(self.pump_router, cost_table=cost_table)
+        primed_solvents = {pump.primed_variable: self._primed_solvent(pump) for pump in self.pump_router.pumps.values()}
+        plan = planner.plan(self.sample_dict, cartridge_solid=cartridge_solid, primed_solvents=primed_solvents)
+        if apply:
+            self.sample_dict = plan["samples"]
+        return plan
+
+    #### Workflow journal methods ##################
+    def start_journal(self, file_name=None, resume=True) -> WorkflowJournal:
+        """
+        Opens the append-only workflow journal in the data folder. Steps run with run_step are recorded and,
+        when resuming, skipped if they were completed before the program stopped.
+
+        :param file_name: journal file name, workflow_journal.jsonl (workflow_journal_sim.jsonl in simulation) when None
+        :param resume: False starts a new campaign, every step is run again
+        :return: the WorkflowJournal object, also stored in self.journal
+        """
+        if file_name is None:
+            file_name = "workflow_journal_sim.jsonl" if self.sim else "workflow_journal.jsonl"
+        self.journal = WorkflowJournal(os.path.join(self.workflow_helper.data_path, file_name), resume=resume)
+        if resume:
+            self.journal.log_resume_summary()
+        return self.journal
+
+    def _journal_state(self, method_name, sample_id, kwargs) -> dict:
+        state = dict(JOURNAL_STATE_CHANGES.get(method_name, {}))
+        if method_name.startswith("vial_") and "_to_" in method_name:
+            location = method_name.split("_to_")[-1]
+            slot = kwargs.get("ika_slot", kwargs.get("ika_slot_number", kwargs.get("vial_number", kwargs.get("rack_number"))))
+            if slot is not None and location in ("ika", "rack"):
+                location = f"{location} {slot}"
+            state["vials"] = {str(sample_id): location}
+        state["pump_1_primed_solvent"] = self._pump_1_primed_solvent
+        state["pump_2_primed_solvent"] = self._pump_2_primed_solvent
+        state["cartridge_in_quantos"] = self._cartridge_in_quantos
+        return state
+
+    def run_step(self, sample_id, step, method_name, *args, **kwargs):
+        """
+        Runs a RobInHood method as a journaled step of a sample. If the step was completed in the journaled
+        campaign it is skipped and the recorded result is returned.
+
+        e.g. rih.start_journal(resume=True)
+             for sample_id, sample in rih.sample_dict.items():
+                 rih.run_step(sample_id, "to_quantos", "vial_rack_to_quantos", vial_number=sample["vial"])
+                 mass = rih.run_step(sample_id, "dose", "quantos_dosing", quantity=sample["mass (mg)"])
+
+        :param step: name of the step, unique within the sample
+        :return: the result of the method
+        """
+        function = getattr(self, method_name)
+        if self.journal is None:
+            return function(*args, **kwargs)
+        if self.journal.is_done(sample_id, step):
+            self._logger.info(f"Skipping {step} of sample {sample_id}, already done")
+            return self.journal.result(sample_id, step)
+        self.journal.step_started(sample_id, step, method_name)
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            self.journal.step_failed(sample_id, step, method_name, e, state=self._journal_state("", sample_id, kwargs))
+            raise
+        self.journal.step_done(sample_id, step, method_name, result=result, state=self._journal_state(method_name, sample_id, kwargs))
+        return result
+
+    def enable_tracing(self, device_methods=TRACED_DEVICE_METHODS) -> Tracer:
+        """
+        Records a span for every public RobInHood method and for the robot, pump and Quantos calls made from them.
+        The spans are timed with self.clock and can be exported with self.tracer.export_chrome_trace(file_path)
+        and summarised with self.tracer.log_summary().
+
+        :param device_methods: {RobInHood device attribute: [methods]}, see TRACED_DEVICE_METHODS in workflow_config
+        :return: the Tracer object, also stored in self.tracer
+        """
+        if getattr(self, "tracer", None) is not None:
+            return self.tracer
+        self.tracer = Tracer(clock=self.clock)
+        self.tracer.instrument(self, "RiH", prefix="RobInHood",
+                               exclude=("enable_tracing", "disable_tracing", "start_system_logger", "new_schedule",
+                                        "operation_resources", "schedule_operation", "start_journal", "run_step"))
+        for attribute, methods in device_methods.items():
+            self.tracer.instrument(getattr(self, attribute, None), attribute, methods=methods)
+        self._logger.info("Tracing enabled")
+        return self.tracer
+
+    def disable_tracing(self):
+        """
+        Restores the untraced methods. The recorded spans are kept in the returned Tracer.
+        """
+        tracer = getattr(self, "tracer", None)
+        if tracer is not None:
+            tracer.remove_instrumentation()
+            self.tracer = None
+        return tracer
+
+    def start_telemetry(self, file_path=TELEMETRY_PATH, rate=TELEMETRY_RATE, capacity=TELEMETRY_CAPACITY) -> TelemetryRecorder:
+        """
+        Starts recording the robot joint positions, velocities, torques and external wrench on a background thread
+        into a memory-mapped ring buffer (see TelemetryRecorder). Sample times use self.clock like the tracer spans,
+        export the samples around a traced operation with self.export_telemetry.
+        :return: the TelemetryRecorder object, also stored in self.telemetry
+        """
+        if getattr(self, "telemetry", None) is not None:
+            return self.telemetry
+        self.telemetry = TelemetryRecorder(self.robot.read_telemetry, file_path=file_path, rate=rate, capacity=capacity, clock=self.clock)
+        self.telemetry.start()
+        return self.telemetry
+
+    def stop_telemetry(self):
+        """
+        Stops the telemetry recorder, the samples are kept in the returned TelemetryRecorder.
+        """
+        telemetry = getattr(self, "telemetry", None)
+        if telemetry is not None:
+            telemetry.stop()
+            self.telemetry = None
+        return telemetry
+
+    def export_telemetry(self, span_name, file_path, margin=1.0, occurrence=-1) -> int:
+        """
+        Writes the telemetry samples recorded during a traced operation to a csv file, needs enable_tracing and start_telemetry.
+        e.g. rih.export_telemetry("RobInHood.vial_rack_to_pump", "rack_to_pump.csv")
+        :param span_name: name of the span, e.g. "RobInHood.vial_pump_to_ika" or "FrankxHelpers.move_robot_x"
+        :param margin: [s] samples recorded before and after the operation that are exported too
+        :param occurrence: index of the call among the calls with this name, the last one by default
+        :return: the number of samples written
+        """
+        if getattr(self, "tracer", None) is None or getattr(self, "telemetry", None) is None:
+            raise ValueError("Telemetry export needs enable_tracing and start_telemetry")
+        spans = [span for span in self.tracer.spans if span.name == span_name]
+        if not spans:
+            raise ValueError(f"No traced operation named {span_name}")
+        spans.sort(key=lambda span: span.start)
+        return self.telemetry.export_span(spans[occurrence], file_path, margin=margin)
+
     #### Lightbox methods ###########################
     def open_lightbox(self):
         self.lightbox.opening_lightbox()
@@ -151,25 +589,19 @@ class RobInHood():
     #### Capper control methods #####################
     def cap(self):
         self._logger.info("Capping...")
-        self.capper.right()
-        time.sleep(90)
-        self.capper.left()
-        time.sleep(90)
+        self.capper.right(wait=True)
+        self.capper.left(wait=True)
     def check_capping(self):
         if self.capper.check_capping():
             self._logger.info("Capping process succesful.")
         else:
             self._logger.warning("Capping failed, please cap manually.")
-            while True:
-                self._logger.warning('Continue running workflow?(y/n)')
-                yn=input()
-                if yn =='y' or yn =='Y':
-                    self._logger.info("Resuming workflow.")
-                    break
-                elif yn == 'n' or yn == 'N':
-                    self._logger.info("Terminating workflow.")
-                    exit() 
-        time.sleep(5)
+            if self.operator.ask("Capping failed, please cap manually. Continue running workflow?", options=("y", "n"), source="capper") == "y":
+                self._logger.info("Resuming workflow.")
+            else:
+                self._logger.info("Terminating workflow.")
+                exit()
+        self.clock.sleep(5)
     #### Camera control methods #####################
     def init_camera(self):
         """
@@ -193,10 +625,10 @@ class RobInHood():
         self._logger.info("Connecting IKA RCT digital..")
         try:
             self.ika.connect()
-            time.sleep(2)
+            self.clock.sleep(2)
             self.ika.is_connected()
             self._logger.info("IKA RCT digital connected.")
-            time.sleep(1.5)
+            self.clock.sleep(1.5)
             temperature=self.ika.get_temperature(sensor=0)
             self._logger.info(f'Current temperature: {temperature}.')
             return True
@@ -206,28 +638,28 @@ class RobInHood():
     ###### Robot control methods##################################	
     def init_robot(self):
         """
-        This method stablishes connection with Panda robot when self.sim is set to True. TODO It is neccesary to work on the sim mode, which is currently not working. 
+        This method stablishes connection with Panda robot. When self.sim is set to True the robot is simulated on the virtual clock.
         
-        :return: True when the robot is connected, False when the robot connection fails and True hen the sim mode (self.sim) is set to True
+        :return: True when the robot is connected, False when the robot connection fails
         :type: bool
         """
-        if not self.sim:
-            try:
+        try:
+            if not self.sim:
                 self.robot = FrankxHelpers(self.ip,self.vel)
-                self.state = self.robot.robot.read_once()
-                self._logger.info(f'Panda robot connected to {self.ip}')
-                self.robot.open_gripper_set_width(0.03)
-                #self._logger.info('Current Pose: ', self.robot.robot.current_pose())
-                #self._logger.info('O_TT_E: ', self.state.O_T_EE)
-                #self._logger.info('Joints: ', self.state.q)
-                #self._logger.info('Elbow: ', self.state.elbow)
-                return True
-            except:
-                self._logger.error("Robot not connected...") 
-                return False  	
-        else:
-            self._logger.warning("Robot running in testing mode.")
+            else:
+                self.robot = SimFrankxHelpers(self.clock,self.vel)
+                self._logger.warning("Robot running in simulation mode.")
+            self.state = self.robot.get_state()
+            self._logger.info(f'Panda robot connected to {self.ip}')
+            self.robot.open_gripper_set_width(0.03)
+            #self._logger.info('Current Pose: ', self.robot.robot.current_pose())
+            #self._logger.info('O_TT_E: ', self.state.O_T_EE)
+            #self._logger.info('Joints: ', self.state.q)
+            #self._logger.info('Elbow: ', self.state.elbow)
             return True
+        except:
+            self._logger.error("Robot not connected...") 
+            return False  	
 	
 
     ##################################
@@ -237,34 +669,37 @@ class RobInHood():
         '''
         
         '''
-        self.linear_motion([0.024211, -0.466303, 0.389817, -1.587130, 0.0, 0.0])
-        self.robot.gripper.clamp()
-        self.linear_motion([0.024211, -0.466303, 0.439817, -1.587130, 0.0, 0.0])
-        self.linear_motion([0.024211,  -0.286303, 0.439817, -1.587130, 0.0, 0.0])
-        self.linear_motion([0.024211,  -0.286303, 0.439817, 0.001, 0.0, 0.0])
-        self.linear_motion([0.024211,  -0.286303, 0.219817, 0.001, 0.0, 0.0])
-        self.linear_motion([0.094211,  -0.286303, 0.224817, 0.001, 0.0, 0.0])
-        self.linear_motion([0.124211,  -0.286303, 0.224817, 0.001, 0.0, 0.0])
-        self.linear_motion([0.134211,  -0.286303, 0.223317, 0.001, 0.0, 0.0])
-        self.linear_motion([0.134211,  -0.260303, 0.223317, 0.001, 0.0, 0.0])
-        self.robot.open_gripper_set_width(0.03)
-        self.linear_motion([0.034211,  -0.260303, 0.223317, 0.001, 0.0, 0.0])
+        program = self.motion_program("vial_pump_to_lightbox")
+        program.move_x([0.024211, -0.466303, 0.389817, -1.587130, 0.0, 0.0]).clamp()
+        program.move_x([0.024211, -0.466303, 0.439817, -1.587130, 0.0, 0.0]) #lift out of the holder, exact stop
+        program.linear_path([[0.024211,  -0.286303, 0.439817, -1.587130, 0.0, 0.0],
+                             [0.024211,  -0.286303, 0.439817, 0.001, 0.0, 0.0],
+                             [0.024211,  -0.286303, 0.219817, 0.001, 0.0, 0.0]], MOTION_BLEND_RADIUS)
+        #entering the lightbox, exact stops
+        program.move_x([0.094211,  -0.286303, 0.224817, 0.001, 0.0, 0.0])
+        program.move_x([0.124211,  -0.286303, 0.224817, 0.001, 0.0, 0.0])
+        program.move_x([0.134211,  -0.286303, 0.223317, 0.001, 0.0, 0.0])
+        program.move_x([0.134211,  -0.260303, 0.223317, 0.001, 0.0, 0.0])
+        program.open(0.03)
+        program.move_x([0.034211,  -0.260303, 0.223317, 0.001, 0.0, 0.0])
+        self.run_program(program)
 
     def vial_lightbox_to_pump(self):
         '''
         
         '''
-        self.linear_motion([0.134211,  -0.260303, 0.223317, 0.001, 0.0, 0.0])
-        self.robot.gripper.clamp()
-        self.linear_motion([0.134211,  -0.286303, 0.223317, 0.001, 0.0, 0.0])
-        self.linear_motion([0.124211,  -0.286303, 0.224817, 0.001, 0.0, 0.0])
-        self.linear_motion([0.094211,  -0.286303, 0.224817, 0.001, 0.0, 0.0])
-        self.linear_motion([0.024211,  -0.286303, 0.219817, 0.001, 0.0, 0.0])
-        self.linear_motion([0.024211,  -0.286303, 0.439817, 0.001, 0.0, 0.0])
-        self.linear_motion([0.024211,  -0.286303, 0.439817, -1.587130, 0.0, 0.0])
-        self.linear_motion([0.024211, -0.466303, 0.439817, -1.587130, 0.0, 0.0])
-        self.linear_motion([0.024211, -0.466303, 0.389817, -1.587130, 0.0, 0.0])
-        self.robot.open_gripper_set_width(0.03)
+        program = self.motion_program("vial_lightbox_to_pump")
+        program.move_x([0.134211,  -0.260303, 0.223317, 0.001, 0.0, 0.0]).clamp()
+        program.move_x([0.134211,  -0.286303, 0.223317, 0.001, 0.0, 0.0])
+        program.move_x([0.124211,  -0.286303, 0.224817, 0.001, 0.0, 0.0])
+        program.move_x([0.094211,  -0.286303, 0.224817, 0.001, 0.0, 0.0])
+        program.move_x([0.024211,  -0.286303, 0.219817, 0.001, 0.0, 0.0])
+        program.linear_path([[0.024211,  -0.286303, 0.439817, 0.001, 0.0, 0.0],
+                             [0.024211,  -0.286303, 0.439817, -1.587130, 0.0, 0.0],
+                             [0.024211, -0.466303, 0.439817, -1.587130, 0.0, 0.0]], MOTION_BLEND_RADIUS)
+        program.move_x([0.024211, -0.466303, 0.389817, -1.587130, 0.0, 0.0]) #descent into the holder, exact stop
+        program.open(0.03)
+        self.run_program(program)
 
     def pick_and_place_cartridge_in_quantos(self, cartridge_number = 1):
         """
@@ -283,63 +718,63 @@ class RobInHood():
             if cartridge_number==1:
                 self.linear_motion([0.0, 0.1895, 0.693205, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.060, 0.1895, 0.693205, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.060, 0.1895, 0.699405, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.1895, 0.699405, 3.1414, 0.0, 0.0])
             if cartridge_number==2:
                 self.linear_motion([0.0, 0.1895, 0.621205, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.0595, 0.1895, 0.621205, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.0595, 0.1895, 0.623205, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.1895, 0.623205, 3.1414, 0.0, 0.0])
             if cartridge_number==3:
                 self.linear_motion([0.0, 0.1895, 0.549905, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.059, 0.1895, 0.549905, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.059, 0.1895,0.551905, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.1895,0.551905, 3.1414, 0.0, 0.0])
             if cartridge_number==4:
                 self.linear_motion([0.0, 0.1885, 0.478905, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.059, 0.1885, 0.478905, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.059, 0.1885,0.480905, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.1885,0.480905, 3.1414, 0.0, 0.0])
             if cartridge_number==5:
                 self.linear_motion([0.0, 0.1885, 0.406705, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.058, 0.1885, 0.406705, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.058, 0.1885,0.408705, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.1885,0.408705, 3.1414, 0.0, 0.0])
             if cartridge_number==6:
                 self.linear_motion([0.0, 0.2335, 0.693905, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.0605, 0.2335, 0.693905, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.0605, 0.2335, 0.696405, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.2335, 0.696405, 3.1414, 0.0, 0.0])
             if cartridge_number==7:
                 self.linear_motion([0.0, 0.2355, 0.622405, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.058, 0.2355, 0.622405, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.058, 0.2355, 0.624905, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.2355, 0.624905, 3.1414, 0.0, 0.0])
             if cartridge_number==8:
                 self.linear_motion([0.0, 0.235, 0.550755, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.058, 0.235, 0.550755, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.058, 0.235,0.552755, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.235, 0.552755, 3.1414, 0.0, 0.0])
                 ##
             if cartridge_number==9:
                 self.linear_motion([0.0, 0.234, 0.479555, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.057, 0.234, 0.479555, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.057, 0.234,0.481555, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.234, 0.481555, 3.1414, 0.0, 0.0])
                 ##
             if cartridge_number==10:
                 self.linear_motion([0.0, 0.234, 0.407855, 3.1414, 0.0, 0.0])
                 self.linear_motion([-0.057, 0.234, 0.407855, 3.1414, 0.0, 0.0])
-                self.robot.gripper.clamp()
+                self.robot.close_gripper()
                 self.linear_motion([-0.057, 0.234,0.409855, 3.1414, 0.0, 0.0])
                 self.linear_motion([0.0, 0.234, 0.409855, 3.1414, 0.0, 0.0])
             ####
@@ -387,7 +822,7 @@ class RobInHood():
             self.linear_motion([-0.020624, 0.343206, 0.152730, math.pi/2, 0.0, 0.0])
             self.robot.open_gripper_set_width(0.03)
             self.linear_motion([-0.020624, 0.462206, 0.152730, math.pi/2, 0.0, 0.0])
-            self.robot.gripper.clamp()
+            self.robot.close_gripper()
             self.linear_motion([-0.020624, 0.462206, 0.155430, math.pi/2, 0.0, 0.0])
             self.linear_motion([-0.020624, 0.445206, 0.155430, math.pi/2, 0.0, 0.0])
             self.linear_motion([-0.022624, 0.445206, 0.155430, math.pi/2, 0.0, 0.0])
@@ -517,172 +952,29 @@ class RobInHood():
         '''
         [WARNING] Set self.vial_pump_to_capper(to_home=False) when the next instruction is self.vial_capper_to_ika() otherwise the robot will hit the windows
         '''
-        #self.robot.move_robot_j([-1.631004642562126, 0.28467839003864087, 0.4286281546751658, -2.2697788718374152, -0.1717695542342133, 2.482683498965369, 1.3954791999037066])
-        #self.robot.move_robot_j([-1.6059555230467388, 0.29961175878591256, 0.40966219290934097, -2.2882557112375896, -0.28129480303982085, 2.5347412309148454, 1.4626395472064615])
-        self.robot.move_robot_j([-1.5684631792026085, 0.34770166642714384, 0.42795830030774223, -2.1893241288378986, -0.20302263963551162, 2.5031534219847784, 1.9735260637574934])
-        self.robot.move_robot_j([-1.5667437001445836, 0.33464824626536266, 0.39512410021246525, -2.2757827378657827, -0.24780863948891418, 2.599961003568437, 1.7159009337599078])
-        self.robot.gripper.clamp()
-        self.robot.move_robot_j([-1.5684631792026085, 0.34770166642714384, 0.42795830030774223, -2.1893241288378986, -0.20302263963551162, 2.5031534219847784, 1.9735260637574934])
-        self.robot.move_robot_j([-1.6344769049452634, 0.1768828558891744, 0.44529702574759433, -2.2810296887812322, -0.16951573207353385, 2.4211902517768915, 1.3592710603544218])
-        #self.robot.move_robot_j([-1.588050496302153, 0.23802719115331047, 0.4130570925273032, -2.2655216583118105, -0.28090555198589, 2.4344173424508835, 1.4987858605558673])
-        #self.robot.move_robot_j([-1.589136447900504, -0.08009124733690691, 0.45393646842732716, -2.2618028237192256, 0.04403724707212665, 2.194333258948699, 1.271420738713609])
-        self.robot.move_robot_j([-1.5880930238192676, -0.5781302808293178, 0.37144537852108234, -2.345866105398888, 0.1367536832925524, 1.7822089331414963, 1.1019700488167175])
-        self.robot.move_robot_j([-1.7351949474435657, -1.180955665220294, 0.14509397850213226, -2.571729930543063, 0.06623638577273916, 1.3931682261890832, 0.7017415762121477])
-        self.robot.move_robot_j([-1.759874905553229, -0.6764247191579719, 0.2556986531929781, -1.5075261749803028, 0.07029177997968157, 0.8591582140392726, 0.7754334529414771])
-        self.robot.move_robot_j([1.5492889621634232, -0.5542586173091019, -0.20297696281315983, -1.420489975134414, -0.06660811346107058, 0.7777394136852687, 0.733804698007802])
-        self.robot.move_robot_j([1.4590764963210017, -0.3678046862366173, -0.2696941103265997, -2.7311696465102444, -0.1572924031651551, 2.347920595116085, 0.47549712705500874])
-        self.linear_motion([0.148, 0.344, 0.22, math.pi/2, 0.0, 0.0])
-        ###above slot 1 ika
-        if ika_slot==1:
-            self.linear_motion([0.148, 0.344, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.148, 0.344, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.148, 0.344, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.148, 0.344, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.14, 0.34, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.148, 0.344, 0.22, math.pi/2, 0.0, 0.0])
-        ###above slot 4 ika
-        if ika_slot==4:
-            self.linear_motion([0.146, 0.310, 0.22, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.146, 0.310, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.146, 0.310, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.146, 0.310, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.146, 0.310, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.146, 0.310, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.146, 0.310, 0.22, math.pi/2, 0.0, 0.0])
-        ###above slot 7 ika
-        if ika_slot==7:
-            self.linear_motion([0.145, 0.278, 0.22, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.145, 0.278, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.145, 0.278, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.145, 0.278, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.145, 0.278, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.145, 0.278, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.145, 0.278, 0.22, math.pi/2, 0.0, 0.0])
-        ####ika slot 9
-        if ika_slot==9:
-            self.linear_motion([0.235, 0.273, 0.22, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.273, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.273, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.273, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.235, 0.273, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.273, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.273, 0.22, math.pi/2, 0.0, 0.0])
-        #### ika slot 6
-        if ika_slot==6:
-            self.linear_motion([0.235, 0.3065, 0.22, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.3065, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.3065, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.3065, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.235, 0.3065, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.3065, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.235, 0.3065, 0.22, math.pi/2, 0.0, 0.0])
-        ###above slot 2 ika
-        if ika_slot==2:
-            self.linear_motion([0.193, 0.359, 0.22, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.359, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.359, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.359, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.193, 0.359, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.359, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.359, 0.22, math.pi/2, 0.0, 0.0])
-        ###above slot 3 ika
-        if ika_slot==3:
-            self.robot.move_robot_j([1.229144522867757, -0.2276054212035856, -0.2702685516717807, -2.6262098842163732, -0.08914504645167846, 2.4024826297230186, 0.24604706308990712])
-            self.linear_motion([0.238, 0.340, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.238, 0.340, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.238, 0.340, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.238, 0.340, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.238, 0.340, 0.14, math.pi/2, 0.0, 0.0])
-            self.robot.move_robot_j([1.229144522867757, -0.2276054212035856, -0.2702685516717807, -2.6262098842163732, -0.08914504645167846, 2.4024826297230186, 0.24604706308990712])
-        ###above slot 5 ika        
-        if ika_slot==5:
-            self.linear_motion([0.193, 0.3255, 0.22, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.3255, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.3255, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.3255, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.193, 0.3255, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.3255, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.193, 0.3255, 0.22, math.pi/2, 0.0, 0.0])
-        ###above slot 8 ika
-        if ika_slot==8:
-            self.linear_motion([0.191, 0.292, 0.22, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.191, 0.292, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.191, 0.292, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.191, 0.292, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.191, 0.292, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.191, 0.292, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.191, 0.292, 0.22, math.pi/2, 0.0, 0.0])
-        if ika_slot==10:
-            self.linear_motion([0.189, 0.2585, 0.22, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.189, 0.2585, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.189, 0.2585, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.189, 0.2585, 0.108, math.pi/2, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
-            self.linear_motion([0.189, 0.2585, 0.117, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.189, 0.2585, 0.14, math.pi/2, 0.0, 0.0])
-            self.linear_motion([0.189, 0.2585, 0.22, math.pi/2, 0.0, 0.0])
-        ##returning to home
-        #self.robot.move_robot_j([1.438259602831121, -0.12324632104536457, -0.2692658616953947, -2.795705357884375, -0.13904051625863798, 2.6679343693969, 0.5386535819545388])
-        #self.robot.move_robot_j([1.3853694243012813, -0.6445677989658557, -0.2282886732816696, -2.5076456596311716, -0.17347363211362868, 1.8872272850122644, 0.4908269000227253])
-        self.robot.move_robot_j([1.4590764963210017, -0.3678046862366173, -0.2696941103265997, -2.7311696465102444, -0.1572924031651551, 2.347920595116085, 0.47549712705500874])
-        self.robot.move_robot_j([1.5492889621634232, -0.5542586173091019, -0.20297696281315983, -1.420489975134414, -0.06660811346107058, 0.7777394136852687, 0.733804698007802])
+        steps = self.waypoints.sequence("ika", ika_slot, "place")
+        program = self.motion_program("vial_capper_to_ika").path("capper_grasp").clamp().route("capper", "ika")
+        program.waypoint(self.waypoints.get("ika", None, "entry"), "approach")
+        program.steps(steps, self.waypoints.release_width("ika"), guard=(GUARDED_FORCE_LIMIT, GUARDED_SEAT_DISTANCE)).path("ika_to_side")
+        self.run_program(program)
     def vial_pump_to_capper(self,to_home=True):    
         '''
         [WARNING] Set self.vial_pump_to_capper(to_home=False) when the next instruction is self.vial_capper_to_ika() otherwise the robot will hit the windows lol
         and Set self.vial_pump_to_capper(to_home=True) when the next instruction is self.vial_capper_to_rack(rack_number=x) otherwise the robot will crash against the stirrer bar dispenser.
         '''
    
-        self.linear_motion([0.021236, -0.465330, 0.394236, -1.571787, 0.0, 0.0])
-        self.robot.gripper.clamp()
-        self.linear_motion([0.021236, -0.465330, 0.434236, -1.571787, 0.0, 0.0])
-        self.robot.move_robot_j([-1.7136670180538245, -0.5689924604683757, 0.10537462299434762, -2.2986901622571443, 0.05726123642330354, 1.7045236183332284, 0.7697684820666909])
-        self.robot.move_robot_j([-1.5371494567770707, -0.8286127007634791, 0.32445757481586696, -2.725710542377673, 0.2266123803324169, 1.8949780377811856, 0.9430858572489685])
-        self.robot.move_robot_j([-1.557104405286019, -0.13233281780195513, 0.436899661101793, -2.4847547997943162, 0.03855509165591663, 2.3825743986235723, 1.1308030216072997])
-        self.robot.move_robot_j([-1.6309107643429097, 0.2406991912000892, 0.44632846840267143, -2.304063950277352, -0.157368533031808, 2.5017716337309945, 1.3200139085605669])
-        self.robot.move_robot_j([-1.5684631792026085, 0.34770166642714384, 0.42795830030774223, -2.1893241288378986, -0.20302263963551162, 2.5031534219847784, 1.9735260637574934])
-        self.robot.move_robot_j([-1.5667437001445836, 0.33464824626536266, 0.39512410021246525, -2.2757827378657827, -0.24780863948891418, 2.599961003568437, 1.7159009337599078])
-        self.robot.open_gripper()
-        self.robot.move_robot_j([-1.5684631792026085, 0.34770166642714384, 0.42795830030774223, -2.1893241288378986, -0.20302263963551162, 2.5031534219847784, 1.9735260637574934])
-        self.robot.move_robot_j([-1.6344769049452634, 0.1768828558891744, 0.44529702574759433, -2.2810296887812322, -0.16951573207353385, 2.4211902517768915, 1.3592710603544218])
-        if to_home:
-            self.robot.move_robot_j([-1.557104405286019, -0.13233281780195513, 0.436899661101793, -2.4847547997943162, 0.03855509165591663, 2.3825743986235723, 1.1308030216072997])
-            self.robot.move_robot_j([-1.5371494567770707, -0.8286127007634791, 0.32445757481586696, -2.725710542377673, 0.2266123803324169, 1.8949780377811856, 0.9430858572489685])
-            self.robot.move_robot_j([-1.7136670180538245, -0.5689924604683757, 0.10537462299434762, -2.2986901622571443, 0.05726123642330354, 1.7045236183332284, 0.7697684820666909])
-            self.robot.move_robot_j([-1.759874905553229, -0.6764247191579719, 0.2556986531929781, -1.5075261749803028, 0.07029177997968157, 0.8591582140392726, 0.7754334529414771]) 
-            self.robot.move_robot_j([-0.052387438984816535, -0.5442788602176466, 0.03260193974825373, -1.4529518636099459, 0.024215675451689296, 0.756491325802273, 0.8650050505176187])
-    
+        program = self.motion_program("vial_pump_to_capper").waypoint("pump_holder").clamp().route("pump", "capper").open()
+        program.route("capper", "home_hood" if to_home else "capper_retreat", loaded=False)
+        self.run_program(program)
+
     def vial_capper_to_pump(self):
         '''
         [WARNING] This moves the robot from home to the capper 
         [WARNING] Set self.vial_pump_to_capper(to_home=True) when the next instruction is self.vial_capper_to_pump() otherwise the robot will crash against the stirrer bar dispenser.
         '''
-        self.robot.move_robot_j([-1.759874905553229, -0.6764247191579719, 0.2556986531929781, -1.5075261749803028, 0.07029177997968157, 0.8591582140392726, 0.7754334529414771])
-        self.robot.move_robot_j([-1.7351949474435657, -1.180955665220294, 0.14509397850213226, -2.571729930543063, 0.06623638577273916, 1.3931682261890832, 0.7017415762121477])
-        self.robot.move_robot_j([-1.5880930238192676, -0.5781302808293178, 0.37144537852108234, -2.345866105398888, 0.1367536832925524, 1.7822089331414963, 1.1019700488167175])
-        self.robot.move_robot_j([-1.589136447900504, -0.08009124733690691, 0.45393646842732716, -2.2618028237192256, 0.04403724707212665, 2.194333258948699, 1.271420738713609])
-        self.robot.move_robot_j([-1.588050496302153, 0.23802719115331047, 0.4130570925273032, -2.2655216583118105, -0.28090555198589, 2.4344173424508835, 1.4987858605558673])
-        self.robot.move_robot_j([-1.5684631792026085, 0.34770166642714384, 0.42795830030774223, -2.1893241288378986, -0.20302263963551162, 2.5031534219847784, 1.9735260637574934])
-        self.robot.move_robot_j([-1.5667437001445836, 0.33464824626536266, 0.39512410021246525, -2.2757827378657827, -0.24780863948891418, 2.599961003568437, 1.7159009337599078])
-        self.robot.gripper.clamp()
-        self.robot.move_robot_j([-1.5667437001445836, 0.33464824626536266, 0.39512410021246525, -2.2757827378657827, -0.24780863948891418, 2.599961003568437, 1.7159009337599078])
-        self.robot.move_robot_j([-1.5684631792026085, 0.34770166642714384, 0.42795830030774223, -2.1893241288378986, -0.20302263963551162, 2.5031534219847784, 1.9735260637574934])
-        self.robot.move_robot_j([-1.6385354666077911, 0.2752530936525579, 0.4484024262835129, -2.290046701732434, -0.159073760220551, 2.5323927586343555, 1.3208766644728673])
-        self.robot.move_robot_j([-1.8042963885452152, -0.8104631285918386, 0.7506233098622437, -2.6818241853663936, 0.45941034520506363, 2.00530636400654, 0.9124445720584017])
-        self.robot.move_robot_j([-1.8673497444591318, -0.8604081446481199, 0.23389602297525025, -2.4771717399926976, 0.17391716161039142, 1.5993189661767746, 0.7278961102341611])
-        self.robot.move_robot_j([-1.8714251921637015, -0.3732063998688628, 0.2661084838038997, -2.1345591327265683, 0.13079034563347144, 1.7676654745207891, 0.735445656750812])
-        self.robot.move_robot_j([-1.7434511746189032, -0.30624892114940766, 0.19484101154929712, -2.118301702708177, 0.06236463957693841, 1.8054099711842007, 0.7798532573547629])
-        self.linear_motion([0.021236, -0.465330, 0.434236, -1.571787, 0.0, 0.0])
-        self.linear_motion([0.021236, -0.465330, 0.394236, -1.571787, 0.0, 0.0])
-        self.robot.open_gripper_set_width(0.03)
+        program = self.motion_program("vial_capper_to_pump").waypoint("hood_left", "transit")
+        program.route("hood_left", "capper", loaded=False).clamp().route("capper", "pump").open(0.03)
+        self.run_program(program)
     def vial_capper_to_rack(self, rack_number=1):
         '''
         [WARNING] This moves the robot from home to the capper 
@@ -697,146 +989,10 @@ class RobInHood():
         :param vial_number: an integer which possible values go from 1 to 16 
         """
         try:
-            self.robot.move_robot_j([-0.13743377816351218, -0.5749181416624936, 0.0819944231651873, -1.49696418198368, -0.008074455948339568, 0.8040668631659613, 0.7686585235761272])
-            self.robot.move_robot_j([-1.743650449039492, -0.7486180810175443, 0.22241080045281791, -1.5211490588941072, 0.005688086230194893, 0.7976024832725525, 0.6795741435431754])   
-            self.robot.move_robot_j([-1.7285189013062858, -1.2744280272868642, 0.18960489550808016, -2.6532256667884626, 0.1529083159873238, 1.3535750827259487, 0.6962508853450418])
-            self.robot.move_robot_j([-1.9410520033418084, -1.3629693503796398, 0.10535519492312481, -2.676664989002964, 0.1223482074176301, 1.3162604484028286, 2.0521033040848042]) 
-            ##Home to rack
-            #Rack 1
-            if vial_number==1:
-                self.linear_motion([-0.013, -0.151, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.151, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.073, -0.151, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.151, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.151, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 2
-            if vial_number==2:         
-                self.linear_motion([-0.013, -0.203, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.203, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.073, -0.203, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.203, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.203, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 3
-            if vial_number==3: 
-                self.linear_motion([-0.013, -0.251, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.251, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.073, -0.251, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.251, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.251, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 4
-            if vial_number==4: 
-                self.linear_motion([-0.013, -0.302, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.302, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.073, -0.302, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.302, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.302, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 5
-            if vial_number==5: 
-                self.linear_motion([-0.013, -0.351, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.351, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.073, -0.351, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.351, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.351, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 6
-            if vial_number==6: 
-                self.linear_motion([-0.013, -0.403, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.0745, -0.403, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.0745, -0.403, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.403, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.403, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 7
-            if vial_number==7: 
-                self.linear_motion([-0.013, -0.453, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.075, -0.453, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.075, -0.453, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.453, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.453, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack
-            if vial_number==8: 
-                self.linear_motion([-0.013, -0.503, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.077, -0.503, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.077, -0.503, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.503, 0.464198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.503, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 9
-            if vial_number==9:
-                self.linear_motion([-0.013, -0.149, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.112, -0.149, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.112, -0.149, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.149, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.149, 0.517198, 3.128527, 0.015399, 0.004588])
-            #Rack 10
-            if vial_number==10:         
-                self.linear_motion([-0.013, -0.200, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.200, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.114, -0.200, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.200, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.200, 0.517198, 3.128527, 0.015399, 0.004588])
-            #Rack 11 
-            if vial_number==11: 
-                self.linear_motion([-0.013, -0.251, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.251, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.114, -0.251, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.251, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.251, 0.517198, 3.128527, 0.015399, 0.004588])
-            #Rack 12 
-            if vial_number==12: 
-                self.linear_motion([-0.013, -0.301, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.301, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.114, -0.301, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.301, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.301, 0.517198, 3.128527, 0.015399, 0.004588])
-            #Rack 13 
-            if vial_number==13: 
-                self.linear_motion([-0.013, -0.348, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.115, -0.348, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.115, -0.348, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.348, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.348, 0.517198, 3.128527, 0.015399, 0.004588])
-            #Rack 14 
-            if vial_number==14: 
-                self.linear_motion([-0.013, -0.400, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.117, -0.400, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.117, -0.400, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.400, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.400, 0.517198, 3.128527, 0.015399, 0.004588])
-            #Rack 15 
-            if vial_number==15: 
-                self.linear_motion([-0.013, -0.451, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.117, -0.451, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.117, -0.451, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.451, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.451, 0.517198, 3.128527, 0.015399, 0.004588])
-            #Rack 16 
-            if vial_number==16: 
-                self.linear_motion([-0.013, -0.502, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.1175, -0.502, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.gripper.clamp()
-                self.linear_motion([-0.1175, -0.502, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.502, 0.537198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.502, 0.517198, 3.128527, 0.015399, 0.004588])
-            ###placing
-            self.robot.move_robot_j([-1.7125169298272385, -0.9589622717991378, 0.22067854790161406, -2.60667933711671, 0.12227936733431286, 1.6349339764383102, 0.8318518518476216])
-            self.robot.move_robot_j([-1.7459924050548619, -0.6597527398045244, 0.1841714407644774, -2.3162459762974787, 0.07382472326404896, 1.658117745740659, 0.8202390908916841])
-            self.robot.move_robot_j([-1.749480187366384, -0.29367109431908056, 0.19448403653483382, -2.1096611268365324, 0.06114327257563501, 1.7995932398619674, 0.7559862168803811])
-            self.robot.move_robot_j([-1.750921373616417, -0.28819621214300506, 0.19862928508042696, -2.1684026530545992, 0.06158574515249994, 1.8673437302377487, 0.7740015745337558])
-            self.robot.move_robot_j([-1.7496210484086416, -0.27930905445416765, 0.19761741688988496, -2.171783759620725, 0.06241802596383625, 1.8665404551294116, 0.7710181514596273])
-            self.robot.open_gripper()       
+            steps = self.waypoints.sequence("rack", vial_number, "pick")
+            program = self.motion_program("vial_rack_to_pump").path("home_to_rack")
+            program.steps(steps, self.waypoints.release_width("rack")).path("rack_to_pump").open()
+            self.run_program(program)
         except:
             self._logger.error(f'Vial {vial_number} not available.')
             #exit()
@@ -850,8 +1006,7 @@ class RobInHood():
         """
         try:
             self.vial_rack_to_pump(vial_number=vial_number)
-            self.vial_pump_to_capper(to_home=False) #TODO get rid of this step
-            self.vial_capper_to_ika(ika_slot=ika_slot_number)
+            self.vial_pump_to_ika(ika_slot=ika_slot_number)
 
             return
         except:
@@ -887,158 +1042,19 @@ class RobInHood():
         :param ika_slot_number: an integer which possible values go from 1 to 12
         """
         self.check_quantos_door_position()
-        self.vial_ika_to_pump(ika_slot_number=ika_slot_number)
+        self.vial_ika_to_pump(ika_slot=ika_slot_number)
         self.vial_pump_to_quantos()
         return
     def vial_pump_to_rack(self, vial_number=1):
         """
         Moves a vial from the vial holder of the pump to the rack.
-        :param vial_number: an integer which possible values go from 1 to 22 
-        :param from_home: bool when set to True, the robot executes this method from its home position. When is set to False, the robot executes its movements from a position close to the pump.
+        :param vial_number: an integer which possible values go from 1 to 16
         """
         try:
-            self.robot.move_robot_j([-1.7496210484086416, -0.27930905445416765, 0.19761741688988496, -2.171783759620725, 0.06241802596383625, 1.8665404551294116, 0.7710181514596273])
-            self.robot.gripper.clamp()
-            self.robot.move_robot_j([-1.750921373616417, -0.28819621214300506, 0.19862928508042696, -2.1684026530545992, 0.06158574515249994, 1.8673437302377487, 0.7740015745337558])
-            self.robot.move_robot_j([-1.749480187366384, -0.29367109431908056, 0.19448403653483382, -2.1096611268365324, 0.06114327257563501, 1.7995932398619674, 0.7559862168803811])
-            self.robot.move_robot_j([-1.7459924050548619, -0.6597527398045244, 0.1841714407644774, -2.3162459762974787, 0.07382472326404896, 1.658117745740659, 0.8202390908916841])
-            self.robot.move_robot_j([-1.7125169298272385, -0.9589622717991378, 0.22067854790161406, -2.60667933711671, 0.12227936733431286, 1.6349339764383102, 0.8318518518476216])
-            self.robot.move_robot_j([-1.834956466708267, -1.262718312179833, 0.07695800682013496, -2.5448007061955655, 0.09362280228402879, 1.2683053020824353, 2.280488008309181])
-            ##vials###
-            #Rack 16
-            if vial_number==16:        
-                self.linear_motion([-0.013, -0.502, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.502, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.1175, -0.502, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.1175, -0.502, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.502, 0.517198, 3.128527, 0.015399, 0.004588])    
-            #Rack 15
-            if vial_number==15:        
-                self.linear_motion([-0.013, -0.451, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.451, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.117, -0.451, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.117, -0.451, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.451, 0.517198, 3.128527, 0.015399, 0.004588]) 
-            #Rack 14
-            if vial_number==14:        
-                self.linear_motion([-0.013, -0.400, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.400, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.117, -0.400, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.117, -0.400, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.400, 0.517198, 3.128527, 0.015399, 0.004588]) 
-            #Rack 13
-            if vial_number==13:        
-                self.linear_motion([-0.013, -0.348, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.348, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.115, -0.348, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.115, -0.348, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.348, 0.517198, 3.128527, 0.015399, 0.004588]) 
-            #Rack 12
-            if vial_number==12:        
-                self.linear_motion([-0.013, -0.301, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.301, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.301, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.301, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.301, 0.517198, 3.128527, 0.015399, 0.004588]) 
-            #Rack 11
-            if vial_number==11:        
-                self.linear_motion([-0.013, -0.251, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.251, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.251, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.251, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.251, 0.517198, 3.128527, 0.015399, 0.004588]) 
-            #Rack 10
-            if vial_number==10:        
-                self.linear_motion([-0.013, -0.200, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.200, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.200, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.114, -0.200, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.200, 0.517198, 3.128527, 0.015399, 0.004588])           
-            ######Rack 9
-            if vial_number==9:
-                self.linear_motion([-0.013, -0.149, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.149, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.112, -0.149, 0.539198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.112, -0.149, 0.517198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.149, 0.517198, 3.128527, 0.015399, 0.004588])
-            #Rack
-            if vial_number==8: 
-                self.linear_motion([-0.013, -0.503, 0.444198, 3.128527, 0.015399, 0.004588]) 
-                self.linear_motion([-0.013, -0.503, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.077, -0.503, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.077, -0.503, 0.444198, 3.128527, 0.015399, 0.004588])  
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.503, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 7
-            if vial_number==7: 
-                self.linear_motion([-0.013, -0.452, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.452, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.0745, -0.452, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.0745, -0.452, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.452, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 6
-            if vial_number==6:
-                self.linear_motion([-0.013, -0.401, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.401, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.074, -0.401, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.074, -0.401, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.401, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 5
-            if vial_number==5: 
-                self.linear_motion([-0.013, -0.351, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.351, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.351, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.351, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.351, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 4
-            if vial_number==4: 
-                self.linear_motion([-0.013, -0.302, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.302, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.302, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.302, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.302, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 3
-            if vial_number==3: 
-                self.linear_motion([-0.013, -0.252, 0.444198, 3.128527, 0.015399, 0.004588]) 
-                self.linear_motion([-0.013, -0.252, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.252, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.252, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.252, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 2
-            if vial_number==2:     
-                self.linear_motion([-0.013, -0.203, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.203, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.203, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.203, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.203, 0.444198, 3.128527, 0.015399, 0.004588])
-            #Rack 1
-            if vial_number==1:
-                self.linear_motion([-0.013, -0.151, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.013, -0.151, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.151, 0.466198, 3.128527, 0.015399, 0.004588])
-                self.linear_motion([-0.073, -0.151, 0.444198, 3.128527, 0.015399, 0.004588])
-                self.robot.open_gripper_set_width(0.03)
-                self.linear_motion([-0.013, -0.151, 0.444198, 3.128527, 0.015399, 0.004588])
-            ##end
-            self.robot.move_robot_j([-1.9410520033418084, -1.3629693503796398, 0.10535519492312481, -2.676664989002964, 0.1223482074176301, 1.3162604484028286, 2.0521033040848042])
-            self.robot.move_robot_j([-1.7285189013062858, -1.2744280272868642, 0.18960489550808016, -2.6532256667884626, 0.1529083159873238, 1.3535750827259487, 0.6962508853450418])
-            self.robot.move_robot_j([-1.743650449039492, -0.7486180810175443, 0.22241080045281791, -1.5211490588941072, 0.005688086230194893, 0.7976024832725525, 0.6795741435431754])   
-            self.robot.move_robot_j([-0.13743377816351218, -0.5749181416624936, 0.0819944231651873, -1.49696418198368, -0.008074455948339568, 0.8040668631659613, 0.7686585235761272])            
-            ###
+            steps = self.waypoints.sequence("rack", vial_number, "place")
+            program = self.motion_program("vial_pump_to_rack").path("pump_grasp").clamp().route("pump_place", "rack")
+            program.steps(steps, self.waypoints.release_width("rack")).path("rack_to_home")
+            self.run_program(program)
         except:
             self._logger.error(f'Vial {vial_number} not available.')
             self.camera.stop_streaming()
@@ -1051,120 +1067,27 @@ class RobInHood():
         :param ika_slot: an integer which possible values go from 1 to 10
         """
         try:
-            self.robot.open_gripper_set_width(0.03)
-            self.robot.move_robot_j([1.5492889621634232, -0.5542586173091019, -0.20297696281315983, -1.420489975134414, -0.06660811346107058, 0.7777394136852687, 0.733804698007802])    
-            self.robot.move_robot_j([1.4590764963210017, -0.3678046862366173, -0.2696941103265997, -2.7311696465102444, -0.1572924031651551, 2.347920595116085, 0.47549712705500874])
-        ###above slot 1 ika
-            if ika_slot==10:
-                self.linear_motion([0.189, 0.2585, 0.22, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.189, 0.2585, 0.14, math.pi/2, 0.0, 0.0]) 
-                self.linear_motion([0.189, 0.2585, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.189, 0.2585, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.189, 0.2585, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.189, 0.2585, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.189, 0.2585, 0.22, math.pi/2, 0.0, 0.0])
-            ####ika slot 9
-            if ika_slot==9:
-                self.linear_motion([0.235, 0.273, 0.22, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.273, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.273, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.273, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.235, 0.273, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.273, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.273, 0.22, math.pi/2, 0.0, 0.0])
-            ###above slot 8 ika
-            if ika_slot==8:
-                self.linear_motion([0.191, 0.292, 0.22, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.191, 0.292, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.191, 0.292, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.191, 0.292, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.191, 0.292, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.191, 0.292, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.191, 0.292, 0.22, math.pi/2, 0.0, 0.0])
-            ###above slot 7 ika
-            if ika_slot==7:
-                self.linear_motion([0.145, 0.278, 0.22, math.pi/2, 0.0, 0.0]) 
-                self.linear_motion([0.145, 0.278, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.145, 0.278, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.145, 0.278, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.145, 0.278, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.145, 0.278, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.145, 0.278, 0.22, math.pi/2, 0.0, 0.0])
-            #### ika slot 6
-            if ika_slot==6:
-                self.linear_motion([0.235, 0.3065, 0.22, math.pi/2, 0.0, 0.0]) 
-                self.linear_motion([0.235, 0.3065, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.3065, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.3065, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.235, 0.3065, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.3065, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.235, 0.3065, 0.22, math.pi/2, 0.0, 0.0])
-            ###above slot 5 ika        
-            if ika_slot==5:
-                self.linear_motion([0.193, 0.3255, 0.22, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.3255, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.3255, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.3255, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.193, 0.3255, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.3255, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.3255, 0.22, math.pi/2, 0.0, 0.0])
-            ###above slot 4 ika
-            if ika_slot==4:
-                self.linear_motion([0.146, 0.310, 0.22, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.146, 0.310, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.146, 0.310, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.146, 0.310, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.146, 0.310, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.146, 0.310, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.146, 0.310, 0.22, math.pi/2, 0.0, 0.0])
-            ###above slot 3 ika
-            if ika_slot==3:
-                self.robot.move_robot_j([1.229144522867757, -0.2276054212035856, -0.2702685516717807, -2.6262098842163732, -0.08914504645167846, 2.4024826297230186, 0.24604706308990712]) 
-                self.robot.move_robot_j([1.2276909838894436, -0.026947655328010255, -0.2702575307155834, -2.6803075786724424, -0.0160901819860408, 2.6531646594471403, 0.1863803567806512])
-                self.robot.move_robot_j([1.2357093439909963, 0.04515318062603092, -0.27001008293777884, -2.6817974331169796, 0.028857123146899772, 2.7236437854237026, 0.15409815305230973])
-                self.robot.move_robot_j([1.2399981366375037, 0.07434085780277597, -0.26990263710735446, -2.6808501467210526, 0.05119902942692767, 2.7505977432992723, 0.1381451022789547])
-                self.robot.gripper.clamp()
-                self.robot.move_robot_j([1.2357093439909963, 0.04515318062603092, -0.27001008293777884, -2.6817974331169796, 0.028857123146899772, 2.7236437854237026, 0.15409815305230973])
-                self.robot.move_robot_j([1.2276909838894436, -0.026947655328010255, -0.2702575307155834, -2.6803075786724424, -0.0160901819860408, 2.6531646594471403, 0.1863803567806512])
-                self.robot.move_robot_j([1.229144522867757, -0.2276054212035856, -0.2702685516717807, -2.6262098842163732, -0.08914504645167846, 2.4024826297230186, 0.24604706308990712])
-            ###above slot 2 ika
-            if ika_slot==2:
-                self.linear_motion([0.193, 0.359, 0.22, math.pi/2, 0.0, 0.0]) 
-                self.linear_motion([0.193, 0.359, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.359, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.359, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.193, 0.359, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.359, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.193, 0.359, 0.22, math.pi/2, 0.0, 0.0])                               
-            if ika_slot==1:
-                self.linear_motion([0.148, 0.344, 0.22, math.pi/2, 0.0, 0.0]) 
-                self.linear_motion([0.14, 0.34, 0.14, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.148, 0.344, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.148, 0.344, 0.108, math.pi/2, 0.0, 0.0])
-                self.robot.gripper.clamp()
-                self.linear_motion([0.148, 0.344, 0.117, math.pi/2, 0.0, 0.0])
-                self.linear_motion([0.148, 0.344, 0.14, math.pi/2, 0.0, 0.0])
-            #self.linear_motion([0.148, 0.344, 0.22, math.pi/2, 0.0, 0.0]) #TODO change
-            self.robot.move_robot_j([1.417212652725086, -0.3701414478774185, -0.2697282641770565, -2.7568747279183903, -0.14130196021942054, 2.3940143196847705, 0.48386919909351966])
-            ####
-            self.robot.move_robot_j([1.4590764963210017, -0.3678046862366173, -0.2696941103265997, -2.7311696465102444, -0.1572924031651551, 2.347920595116085, 0.47549712705500874])
-            self.robot.move_robot_j([1.5492889621634232, -0.5542586173091019, -0.20297696281315983, -1.420489975134414, -0.06660811346107058, 0.7777394136852687, 0.733804698007802])
-            self.robot.move_robot_j([-1.759874905553229, -0.6764247191579719, 0.2556986531929781, -1.5075261749803028, 0.07029177997968157, 0.8591582140392726, 0.7754334529414771])
-            self.robot.move_robot_j([-1.7125169298272385, -0.9589622717991378, 0.22067854790161406, -2.60667933711671, 0.12227936733431286, 1.6349339764383102, 0.8318518518476216])
-            self.robot.move_robot_j([-1.7459924050548619, -0.6597527398045244, 0.1841714407644774, -2.3162459762974787, 0.07382472326404896, 1.658117745740659, 0.8202390908916841])
-            self.robot.move_robot_j([-1.749480187366384, -0.29367109431908056, 0.19448403653483382, -2.1096611268365324, 0.06114327257563501, 1.7995932398619674, 0.7559862168803811])
-            self.robot.move_robot_j([-1.750921373616417, -0.28819621214300506, 0.19862928508042696, -2.1684026530545992, 0.06158574515249994, 1.8673437302377487, 0.7740015745337558])
-            self.robot.move_robot_j([-1.7496210484086416, -0.27930905445416765, 0.19761741688988496, -2.171783759620725, 0.06241802596383625, 1.8665404551294116, 0.7710181514596273])
-            ####
-            self.robot.open_gripper()  
+            steps = self.waypoints.sequence("ika", ika_slot, "pick")
+            program = self.motion_program("vial_ika_to_pump").open(0.03).path("side_to_ika")
+            program.steps(steps, self.waypoints.release_width("ika")).route("ika", "pump", include_start=True).open()
+            self.run_program(program)
+            return
+        except:
+            self._logger.error(f'IKA slot {ika_slot} not available.')
+            self.camera.stop_streaming()
+            exit()
+
+    def vial_pump_to_ika(self, ika_slot=1):
+        """
+        Moves a vial from the vial holder of the pump to the IKA station, without stopping at the capper.
+        :param ika_slot: an integer which possible values go from 1 to 10
+        """
+        try:
+            steps = self.waypoints.sequence("ika", ika_slot, "place")
+            program = self.motion_program("vial_pump_to_ika").waypoint("pump_holder").clamp().route("pump", "ika")
+            program.waypoint(self.waypoints.get("ika", None, "entry"), "approach")
+            program.steps(steps, self.waypoints.release_width("ika"), guard=(GUARDED_FORCE_LIMIT, GUARDED_SEAT_DISTANCE)).path("ika_to_side")
+            self.run_program(program)
             return
         except:
             self._logger.error(f'IKA slot {ika_slot} not available.')
@@ -1178,7 +1101,7 @@ class RobInHood():
         """
         self.check_quantos_door_position()
         self.vial_quantos_to_pump()
-        self.vial_pump_to_ika(ika_slot_number=ika_slot_number)
+        self.vial_pump_to_ika(ika_slot=ika_slot_number)
         return
     
     def vial_quantos_to_rack(self,vial_number=1):
@@ -1199,25 +1122,13 @@ class RobInHood():
         """
         try:
             self.check_quantos_door_position()
-            self.linear_motion([0.021236, -0.465330, 0.394236, -1.571787, 0.0, 0.0])
-            self.robot.gripper.clamp()
-            self.linear_motion([0.021236, -0.465330, 0.434236, -1.571787, 0.0, 0.0])
-            self.linear_motion([0.021236, -0.265330, 0.434236, -1.571787, 0.0, 0.0])
-            self.linear_motion([0.021236, -0.265330, 0.734236, -1.571787, 0.0, 0.0])
-            self.robot.move_robot_j([-0.49146811520560546, -0.5483666040604575, 0.008699827790391025, -1.424562310637089, -0.1584492087530014, 0.9070381476330659, 0.6617912204484846])
-            self.robot.move_robot_j([0.863253819507465, -0.5490223970580519, -0.060526590153836365, -1.505593206711674, -0.023240255180332396, 0.8139228273497687, 1.0326294075855897])
-            self.robot.move_robot_j([1.5437224203633981, -0.8535716153432693, -0.02090855556648028, -2.3220350435825816, -0.030267629832360667, 1.4690346631473965, 0.7142224947785337])
-            self.linear_motion([0.020783, 0.277155, 0.513770, math.pi/2, 0.0, 0.0])
-            self.robot.move_robot_j([1.6131610135697478, -0.853325663533127, -0.05353319992935447, -2.69698212503132, -0.09767679642968707, 1.8604011267523237, 0.8483259122309667])
-            self.robot.move_robot_j( [1.6149535670902366, -0.30035995266730325, -0.09664097981222683, -2.7755572217900024, -0.09452590536408127, 2.496923201190101, 0.8401453860774636])
-            self.robot.move_robot_j([1.628786448913708, 0.07672654361264745, -0.092344672147254, -2.68894268090585, -0.023956333485348303, 2.7958885248242646, 0.2166834870786398])
-            self.robot.move_robot_j([1.6339519956488358, 0.20316569954888863, -0.01437163186073303, -2.527209927679671, -0.016769896860926475, 2.70550021408811, 0.8611653534736896])
-            self.linear_motion([-0.021548, 0.455917, 0.094333, math.pi/2, 0.0, 0.0])
-            self.linear_motion([-0.018376, 0.475474, 0.089415, 1.570832, 0.001657, -0.000339])
-            self.robot.open_gripper_set_width(0.035)
-            self.linear_motion([-0.018376, 0.325474, 0.089415, 1.570832, 0.001657, -0.000339])
-            self.robot.move_robot_j([1.612750472587451, -0.9394352493369788, -0.1741023376255535, -2.94717707379659, -0.10549786026286026, 1.9851371329095377, 0.7427021295096015])
-            self.robot.move_robot_j([1.643955648388779, -0.7035506518127264, -0.11034566835980666, -1.699107937695687, -0.03175135499520129, 0.9279511667357548, 0.7056178085434384])
+            program = self.motion_program("vial_pump_to_quantos").waypoint("pump_holder").clamp().route("pump", "quantos")
+            program.move_x([-0.021548, 0.455917, 0.094333, math.pi/2, 0.0, 0.0])
+            program.move_x([-0.018376, 0.475474, 0.089415, 1.570832, 0.001657, -0.000339])
+            program.open(0.035)
+            program.move_x([-0.018376, 0.325474, 0.089415, 1.570832, 0.001657, -0.000339])
+            program.waypoint("quantos_exit").waypoint("quantos_side", "transit")
+            self.run_program(program)
             return
         except:
             self._logger.error(f'Robot not available, terminating program...')
@@ -1232,24 +1143,13 @@ class RobInHood():
         """
         try:
             self.check_quantos_door_position() 
-            self.robot.move_robot_j([1.612750472587451, -0.9394352493369788, -0.1741023376255535, -2.94717707379659, -0.10549786026286026, 1.9851371329095377, 0.7427021295096015])
-            self.linear_motion([-0.018376, 0.325474, 0.089415, 1.570832, 0.001657, -0.000339])
-            self.linear_motion([-0.018376, 0.475474, 0.089415, 1.570832, 0.001657, -0.000339])
-            self.robot.gripper.clamp()
-            self.linear_motion([-0.021548, 0.455917, 0.094333, math.pi/2, 0.0, 0.0])
-            self.robot.move_robot_j([1.6339519956488358, 0.20316569954888863, -0.01437163186073303, -2.527209927679671, -0.016769896860926475, 2.70550021408811, 0.8611653534736896])
-            self.robot.move_robot_j([1.628786448913708, 0.07672654361264745, -0.092344672147254, -2.68894268090585, -0.023956333485348303, 2.7958885248242646, 0.2166834870786398])
-            self.robot.move_robot_j( [1.6149535670902366, -0.30035995266730325, -0.09664097981222683, -2.7755572217900024, -0.09452590536408127, 2.496923201190101, 0.8401453860774636])
-            self.robot.move_robot_j([1.6131610135697478, -0.853325663533127, -0.05353319992935447, -2.69698212503132, -0.09767679642968707, 1.8604011267523237, 0.8483259122309667])
-            self.linear_motion([0.020783, 0.277155, 0.513770, math.pi/2, 0.0, 0.0])
-            self.robot.move_robot_j([1.5437224203633981, -0.8535716153432693, -0.02090855556648028, -2.3220350435825816, -0.030267629832360667, 1.4690346631473965, 0.7142224947785337])
-            self.robot.move_robot_j([0.863253819507465, -0.5490223970580519, -0.060526590153836365, -1.505593206711674, -0.023240255180332396, 0.8139228273497687, 1.0326294075855897])
-            self.robot.move_robot_j([-0.49146811520560546, -0.5483666040604575, 0.008699827790391025, -1.424562310637089, -0.1584492087530014, 0.9070381476330659, 0.6617912204484846])
-            self.linear_motion([0.021236, -0.265330, 0.734236, -1.571787, 0.0, 0.0])
-            self.linear_motion([0.021236, -0.265330, 0.434236, -1.571787, 0.0, 0.0])
-            self.linear_motion([0.021236, -0.465330, 0.434236, -1.571787, 0.0, 0.0])
-            self.linear_motion([0.021236, -0.465330, 0.394236, -1.571787, 0.0, 0.0])
-            self.robot.open_gripper_set_width(0.03)
+            program = self.motion_program("vial_quantos_to_pump").waypoint("quantos_exit")
+            program.move_x([-0.018376, 0.325474, 0.089415, 1.570832, 0.001657, -0.000339])
+            program.move_x([-0.018376, 0.475474, 0.089415, 1.570832, 0.001657, -0.000339])
+            program.clamp()
+            program.move_x([-0.021548, 0.455917, 0.094333, math.pi/2, 0.0, 0.0])
+            program.route("quantos", "pump", include_start=True).open(0.03)
+            self.run_program(program)
             return
         except:
             self._logger.error(f'Terminating program.')
@@ -1307,222 +1207,330 @@ class RobInHood():
     ####################
 
     def init_pumps(self):
+        """
+        Starts serial connection to both dispense pumps and initialises them.
+
+        Returns a tuple of bools (XCalibur connected, C3000 connected).
+        """
+        return self.init_pump(), self.init_pump_2()
+
+    def init_pump(self):
         """
         Starts serial connection to the pump. Initialises the pump by force stalling. During initialisation valve connected to 
         waste port specified in the workflow configuration file.
 
-        All ports for pump 2 are saved as 12 greater than they should be to avoid confusion
-        with the dispense pump so 12 is automatically subtracted in the function calls.
-        
         Returns True when connected to the XCalibur pump, False otherwise.
 
         """
         self._logger.info("Connecting Pump..")
         try:
             self.pump.connect()
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
             self.pump.is_connected()
             self._logger.info("Pump connected.")
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
             self.pump.is_idle()
             self.pump.check_errors()
             self.pump.initialize_device(input_port=self.dispense_dict["Waste"],output_port=self.dispense_dict["Waste"])
             self._logger.info(f" Pump, {self.pump.device_name} initialised.")
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
             self._logger.info("Checking for pump errors")
             self.pump.check_errors() #logger in pump code will respond.
-            _tecan_error_flag = True
+            return True
     
             #TODO adding microstepping option
         except Exception as e:
             self._logger.error("Pump not connected.")
             self._logger.error(e)
-            
-            _tecan_error_flag = False
+            return False
+
+    def init_pump_2(self):
+        """
+        Starts serial connection to the dispense pump 2 and initialises it.
+
+        All ports for pump 2 are saved as 12 greater than they should be to avoid confusion
+        with the dispense pump, the pump router subtracts the port_offset of PUMP_PORT_ASSIGNMENTS in the function calls.
 
+        Returns True when connected to the C3000 pump, False otherwise.
+        """
         self._logger.info("Connecting Dispense Pump 2..") 
         try:
             self.pump_2.connect()
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
             self.pump_2.is_connected()
             self._logger.info("Dispense Pump 2 connected.")
-            time.sleep(0.5)
-            waste_port = str(self.dispense_dict["Waste_2"]-12)
-            self.pump_2.initialize_device(input_port=waste_port,output_port=(self.dispense_dict["Waste_2"]-12))
+            self.clock.sleep(0.5)
+            waste_port = self.pump_router.pump("pump_2").valve_position(self.dispense_dict["Waste_2"])
+            self.pump_2.initialize_device(input_port=str(waste_port),output_port=waste_port)
             self._logger.info(f" Pump, {self.pump_2.device_name} initialised.")
     
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
             self._logger.info("Checking for pump errors")
             self.pump_2.check_errors() #logger in pump code will respond.
-            _tricont_error_flag = True
+            return True
     
             #TODO adding microstepping option
             
         except Exception as e:
             self._logger.error("Dispense Pump 2 not connected.")
             self._logger.error(e)
-            _tricont_error_flag = False
-        
-        return _tecan_error_flag, _tricont_error_flag
-
-
-    def pump_prime_reagent_tubing(self, chemical:str, prime_volume:float= 6000):
-        """
-        Standard reagent tubing prime - sends prime_volume (default = 6 ml)
-        solvent of chosen chemical to waste port specified in workflow config file
+            return False
 
-        """
 
-        if self.dispense_dict[chemical] <= 12:
-            self._logger.info((f"{chemical} is on pump: {self.pump.device_name}"))
-            self._logger.info(f'Priming reagent tubing with {chemical} from port {self.dispense_dict[chemical]} into waste on port: {self.dispense_dict["Waste"]}')
-            self.pump.dispense(prime_volume, source_port = self.dispense_dict[chemical], destination_port = self.dispense_dict["Waste"])
-            self.pump.is_idle()
+    def _pump_device(self, route):
+        return getattr(self, route.device)
 
-        elif self.dispense_dict[chemical] > 12:
-            self._logger.info((f"{chemical} is on pump: {self.pump_2.device_name}"))
-            chemical_port = "I" + str(self.dispense_dict[chemical]-12)
-            waste_port = "I" + str(self.dispense_dict["Waste_2"]-12)
-            self._logger.info(f'Pump priming reagent tubing with {chemical} from port {self.dispense_dict[chemical]} into waste on port: {self.dispense_dict["Waste_2"]}')
-            self.pump_2.dispense(prime_volume, source_port = chemical_port, destination_port = waste_port)
-            self.pump_2.is_idle()
-        
+    def _primed_solvent(self, pump) -> str:
+        return getattr(self, "_" + pump.primed_variable, None)
 
+    def line_state(self, line) -> dict:
+        """
+        Returns the solvent fractions in the dispense line of a pump line (see DispenseLineModel). The primed solvent
+        variable wins: an empty state when it is None, the primed solvent alone when the recorded state disagrees with it.
+        """
+        primed = self._primed_solvent(line)
+        state = self._line_states.get(line.device, {})
+        if primed is None:
+            return {}
+        if state.get(primed, 0.0) <= 0.5:
+            return {primed: 1.0}
+        return state
 
-    def pump_expel_reagent_tubing(self, chemical:str, expel_volume:float = 6000):
+    def run_pump_program(self, program, speed=None):
         """
-        Removes solvent in reagent tubing using air to push it back into storage vessels. Default volume is 6 ml. 
+        Runs a PumpProgram on its pump. When PUMP_PROGRAMS is set and the pump takes raw command strings
+        (see send_pump_command_string), the program is compiled into a few Cavro command strings, each sent in one
+        serial round trip and waited for with an idle poll. Otherwise every transfer is a dispense call.
+        :param speed: predefined speed of the program, None keeps the pump speed
+        """
+        line = program.line
+        pump = getattr(self, line.device)
+        report = self.pump_program_report(program, speed)
+        self._logger.info(f"Running {program.name} on pump {pump.device_name}: {report['transfers']} transfers, {report['strokes']} strokes, "
+                          f"{report['commands']} commands, predicted {report['time']:.1f} s")
+        if PUMP_PROGRAMS and self.takes_command_strings(pump):
+            for command in self.pump_compilers[line.device].compile(program, speed):
+                self.send_pump_command_string(pump, command)
+            return
+        if speed is not None:
+            pump.set_predefined_speed(speed)
+        for volume, source_port, destination_port in program.transfers():
+            pump.dispense(volume, source_port=line.token(source_port), destination_port=line.token(destination_port))
+        pump.is_idle()
 
+    @staticmethod
+    def takes_command_strings(pump) -> bool:
         """
-        if self.dispense_dict[chemical] <= 12:
-            self._logger.info((f"{chemical} is on pump: {self.pump.device_name}"))   
-            self._logger.info(f'Expelling reagent tubing with chemical: {chemical} from port {self.dispense_dict[chemical]} back into its container')
-            self.pump.dispense(expel_volume, source_port = self.dispense_dict["Air"], destination_port = self.dispense_dict[chemical])
-            self.pump.is_idle()
+        True when raw Cavro command strings can be sent to a pump: the simulated pumps and the pylabware pumps
+        with a serial connection (XCalibur, C3000).
+        """
+        return hasattr(pump, "send_command_string") or hasattr(pump, "connection")
 
-        elif self.dispense_dict[chemical] > 12:
-            self._logger.info((f"{chemical} is on pump: {self.pump_2.device_name}"))
-            chemical_port = "I" + str(self.dispense_dict[chemical]-12)
-            air_port = "I" + str(self.dispense_dict["Air_2"]-12)
+    def send_pump_command_string(self, pump, command, poll_interval=0.2):
+        """
+        Sends a Cavro command string (e.g. "S11I3A3000I1A0R", see PumpProgramCompiler) to a pump in one serial round
+        trip and blocks until the pump is idle again. pylabware pumps get the string on their serial connection with
+        their address prefix and terminator.
+        """
+        if hasattr(pump, "send_command_string"):
+            pump.send_command_string(command)
+        else:
+            pump.connection.transmit(f"{pump.command_prefix}{command}{pump.command_terminator}")
+            reply = pump.connection.receive()
+            self._logger.debug(f"{pump.device_name} <- {command}, reply {getattr(reply, 'body', reply)}")
+        while not pump.is_idle():
+            self.clock.sleep(poll_interval)
 
-            self._logger.info(f'Expelling reagent tubing with chemical: {chemical} from port {self.dispense_dict[chemical]} back into its container')
-            self.pump_2.dispense(expel_volume, source_port = air_port, destination_port = chemical_port)
-            self.pump_2.is_idle()
-    
-    
-    def pump_prime_dispense_tubing(self, chemical:str, cycle_number:int = 2):
+    def new_stroke_planner(self, line) -> StrokePlanner:
         """
-        Primes dispense line of the pump with solvent from chosen port.
-        cycle_number (default 2) cycles of 1 ml washing are followed by a 1 ml prime
-        
+        StrokePlanner of a pump line, timed with the Cavro speed table or, in simulation, with the simulated pump model.
         """
-        if self.dispense_dict[chemical] <= 12:
-            self._logger.info((f"{chemical} is on pump: {self.pump.device_name}"))
-            if chemical == self._pump_1_primed_solvent:
-                self._logger.info(f"Dispense line already primed with {chemical} from port : {self.dispense_dict[chemical]}")
-                
-            else:
-                self._logger.info(f"Priming dispense line with {chemical} from port: {self.dispense_dict[chemical]}")
+        if not self.sim:
+            return StrokePlanner(line.syringe_volume, line.full_steps, PUMP_VALVE_TIME, PUMP_COMMAND_TIME)
+        plunger_time = lambda steps, speed: SIM_DURATIONS["pump_stroke"] / 2 * steps / line.full_steps * speed / line.default_speed
+        return StrokePlanner(line.syringe_volume, line.full_steps, SIM_DURATIONS["pump_valve"], SIM_DURATIONS["pump_command"], plunger_time)
+
+    def pump_program_report(self, program, speed=None) -> dict:
+        """
+        Returns the stroke plan and predicted time of a PumpProgram (see StrokePlanner.report), also kept in self.pump_reports.
+        :param speed: predefined speed of the program, None for the default speed of the pump
+        """
+        line = program.line
+        pump = getattr(self, line.device, None)
+        compiled = PUMP_PROGRAMS and self.takes_command_strings(pump)
+        transfers = [(volume, line.valve_position(source), line.valve_position(destination)) for volume, source, destination in program.transfers()]
+        commands = len(self.pump_compilers[line.device].compile(program, speed)) if compiled and transfers else None
+        report = self.stroke_planners[line.device].report(program.name, transfers, line.default_speed if speed is None else speed, commands)
+        self.pump_reports[program.name] = report
+        return report
+
+    def pump_program(self, method_name, chemical:str, **kwargs) -> PumpProgram:
+        """
+        Returns the PumpProgram run by a pump method (PUMP_PROGRAM_METHODS) with the given arguments,
+        e.g. rih.pump_program("pump_prime_reagent_tubing", "EtOH", prime_volume=3000)
+        """
+        route = self.pump_router.route(chemical)
+        line = route.pump
+        program = PumpProgram(method_name.replace("pump_", ""), line)
+        if method_name == "pump_prime_reagent_tubing":
+            program.transfer(kwargs.get("prime_volume", 6000), route.port, line.waste_port)
+        elif method_name == "pump_expel_reagent_tubing":
+            program.transfer(kwargs.get("expel_volume", 6000), line.air_port, route.port)
+        elif method_name == "pump_prime_dispense_tubing":
+            cycles = self.line_model.wash_cycles(self.line_state(line), chemical)
+            if cycles is not None:
+                if kwargs.get("cycle_number") is not None:
+                    cycles = kwargs["cycle_number"]
+                wash = PumpProgram("wash", line).transfer(1000, route.port, line.dispense_port).transfer(2000, line.dispense_port, line.waste_port)
+                program.transfer(2000, line.dispense_port, line.waste_port).repeat(cycles, wash)
+                program.transfer(1000, route.port, line.dispense_port)
+        elif method_name in ("dispense_volume", "dispense_dropwise"):
+            program.transfer(kwargs["vol"], route.port, line.dispense_port)
+        else:
+            raise ValueError(f"{method_name} is not a pump method, pump methods: {PUMP_PROGRAM_METHODS}")
+        return program
 
-                self._logger.info(f"Emptying 2 ml volume from dispense line port {self.dispense_dict['Dispense']} into waste on port '{self.dispense_dict['Waste']}")    
-                self.pump.dispense(2000, source_port=self.dispense_dict["Dispense"], destination_port=self.dispense_dict["Waste"])
-                cycle = 0 
+    def predict_pump_operation(self, method_name, chemical:str, **kwargs) -> dict:
+        """
+        Returns the stroke plan and predicted time [s] of a pump method before running it,
+        e.g. rih.predict_pump_operation("dispense_volume", "EtOH", vol=5000)["time"]
+        """
+        speed = None
+        if method_name == "dispense_volume":
+            speed = kwargs.get("speed") or self.dispense_speed(chemical)
+        elif method_name == "dispense_dropwise":
+            speed = self.dispense_speed(chemical, dropwise=True)
+        return self.pump_program_report(self.pump_program(method_name, chemical, **kwargs), speed)
 
-                while cycle < cycle_number:
-                    self._logger.info(f"Starting {cycle+1} backward washing cycle")
+    def start_pump(self, function, chemical:str, *args, callback=None, **kwargs):
+        """
+        Starts a pump method (dispense_volume, dispense_dropwise, pump_prime_reagent_tubing, pump_expel_reagent_tubing,
+        pump_prime_dispense_tubing) on the command thread of the pump the chemical is connected to and returns a
+        MotionFuture straight away. The pumps are on separate serial ports, so both pumps can work at the same time,
+        and the arm can move while a pump works. Commands started on the same pump run one after the other.
+        Call future.result() before using the liquid, it raises the exception of the pump method.
 
-                    self._logger.info(f"Dispensing 1 mL {chemical} from port: {self.dispense_dict[chemical]} - overspill into waste vial")
-                    self.pump.dispense(volume = 1000, source_port=self.dispense_dict[chemical], destination_port=self.dispense_dict["Dispense"])
+        e.g. prime = rih.start_pump(rih.pump_prime_dispense_tubing, "HCl")
+             rih.dispense_volume(500, "Water(DI)")
+             prime.result()
 
-                    self._logger.info(f"Aspirating 2 mL volume from dispense line (port: {self.dispense_dict['Dispense']}) to waste (port: {self.dispense_dict['Waste']})")
-                    self.pump.dispense(volume =2000, source_port=self.dispense_dict["Dispense"], destination_port=self.dispense_dict["Waste"])
-                    
-                    cycle = cycle + 1
+        Do not call the blocking pump methods for a pump that still runs a started command.
+        :param callback: function called with the MotionFuture when the command is finished or failed
+        """
+        device = self.pump_router.route(chemical).device
+        return self.pump_commands[device].submit(function, *args, chemical=chemical, callback=callback,
+                                                 description=f"{getattr(function, '__name__', 'pump')} {chemical}", **kwargs)
 
-                self._logger.info(f"Priming the dispense line (port: {self.dispense_dict['Dispense']}) with {chemical} port {self.dispense_dict[chemical]}")
-                self.pump.dispense(volume = 1000, source_port=self.dispense_dict[chemical], destination_port= self.dispense_dict['Dispense'])
+    def wait_for_pumps(self):
+        """
+        Blocks until every pump command started with start_pump is finished, then raises the exception of the first
+        command that failed, unless it was already raised by future.result().
+        """
+        failures = [failure for commands in self.pump_commands.values() for failure in commands.wait()]
+        if failures:
+            raise failures[0]
 
-            self._pump_1_primed_solvent = chemical #update primed solvent
-            self.pump.is_idle()
+    def pump_prime_reagent_tubing(self, chemical:str, prime_volume:float= 6000):
+        """
+        Standard reagent tubing prime - sends prime_volume (default = 6 ml)
+        solvent of chosen chemical to waste port specified in workflow config file
 
-        if self.dispense_dict[chemical] > 12:
-            self._logger.info((f"{chemical} is on pump: {self.pump_2.device_name}"))
-            dispense_port = "I" + str(self.dispense_dict["Dispense_2"]-12)
-            chemical_port = "I" + str(self.dispense_dict[chemical]-12)
-            waste_port = "I" + str(self.dispense_dict["Waste_2"]-12)
+        """
+        route = self.pump_router.route(chemical)
+        pump = self._pump_device(route)
+        self._logger.info((f"{chemical} is on pump: {pump.device_name}"))
+        self._logger.info(f'Priming reagent tubing with {chemical} from port {route.port} into waste on port: {route.pump.waste_port}')
+        self.run_pump_program(self.pump_program("pump_prime_reagent_tubing", chemical, prime_volume=prime_volume))
+        
 
-            if chemical == self._pump_2_primed_solvent:
-                self._logger.info(f"Dispense line already primed with {chemical} from port : {self.dispense_dict[chemical]}")
-            else:
-                self._logger.info(f"Priming dispense line with {chemical} from port: {self.dispense_dict[chemical]}")
-                self._logger.info(f"Emptying 2 ml volume from dispense line port {self.dispense_dict['Dispense_2']} into waste on port '{self.dispense_dict['Waste_2']}")    
-                self.pump_2.dispense(2000, source_port=dispense_port, destination_port=waste_port)
-           
-                cycle = 0 
-                while cycle < cycle_number:
-                    self._logger.info(f"Starting {cycle+1} backward washing cycle")
 
-                    self._logger.info(f"Dispensing 1 mL {chemical} from port: {self.dispense_dict[chemical]} - overspill into waste vial")
-                    self.pump_2.dispense(volume = 1000, source_port= chemical_port, destination_port = dispense_port)
+    def pump_expel_reagent_tubing(self, chemical:str, expel_volume:float = 6000):
+        """
+        Removes solvent in reagent tubing using air to push it back into storage vessels. Default volume is 6 ml. 
 
-                    self._logger.info(f"Aspirating 2 mL volume from dispense line (port: {dispense_port}) to waste (port: {waste_port})")
-                    self.pump_2.dispense(volume =2000, source_port=dispense_port, destination_port=waste_port)
-                
-                    cycle = cycle + 1
+        """
+        route = self.pump_router.route(chemical)
+        pump = self._pump_device(route)
+        self._logger.info((f"{chemical} is on pump: {pump.device_name}"))   
+        self._logger.info(f'Expelling reagent tubing with chemical: {chemical} from port {route.port} back into its container')
+        self.run_pump_program(self.pump_program("pump_expel_reagent_tubing", chemical, expel_volume=expel_volume))
+    
+    
+    def pump_prime_dispense_tubing(self, chemical:str, cycle_number:int = None):
+        """
+        Primes dispense line of the pump with solvent from chosen port.
+        cycle_number cycles of 1 ml washing are followed by a 1 ml prime. By default the line model chooses the fewest
+        cycles (up to 2) leaving the residues of the previous solvents within the tolerances of SOLVENT_COMPATIBILITY,
+        the line is not primed when it already holds the solvent and is clean enough.
+        
+        """
+        route = self.pump_router.route(chemical)
+        pump = self._pump_device(route)
+        line = route.pump
+        state = self.line_state(line)
+        self._logger.info((f"{chemical} is on pump: {pump.device_name}"))
+        cycles = self.line_model.wash_cycles(state, chemical)
+        if cycles is None:
+            self._logger.info(f"Dispense line already primed with {chemical} from port : {route.port}")
+            
+        else:
+            if cycle_number is not None:
+                cycles = cycle_number
+            cycle_number = cycles
+            self._logger.info(f"Priming dispense line with {chemical} from port: {route.port}, line holds {self.line_model.describe(state)}")
 
-                self._logger.info(f"Priming the dispense line (port: {self.dispense_dict['Dispense_2']}) with {chemical} port {self.dispense_dict[chemical]}")
-                self.pump_2.dispense(volume = 1000, source_port= chemical_port, destination_port= dispense_port)
+            self._logger.info(f"Emptying 2 ml volume from dispense line port {line.dispense_port} into waste on port '{line.waste_port}")    
+            self._logger.info(f"{cycle_number} backward washing cycles: dispensing 1 mL {chemical} from port: {route.port} - overspill into waste vial, "
+                              f"aspirating 2 mL volume from dispense line (port: {line.dispense_port}) to waste (port: {line.waste_port})")
+            self._logger.info(f"Priming the dispense line (port: {line.dispense_port}) with {chemical} port {route.port}")
+            self.run_pump_program(self.pump_program("pump_prime_dispense_tubing", chemical, cycle_number=cycle_number))
+            self._line_states[line.device] = self.line_model.primed(state, chemical, cycles)
 
-                self._pump_2_primed_solvent = chemical #update primed solvent
-                self.pump_2.is_idle()
+        setattr(self, "_" + line.primed_variable, chemical) #update primed solvent
+        pump.is_idle()
 
         self.save_running_variables()
 
     
+    def dispense_speed(self, chemical:str, dropwise:bool = False) -> int:
+        """
+        Returns the predefined speed chemical is dispensed at: the calibrated speed of the chemical on its pump
+        (see calibrate_dispense_speed), the default or dropwise speed of the pump in PUMP_PORT_ASSIGNMENTS otherwise.
+        """
+        line = self.pump_router.route(chemical).pump
+        if dropwise:
+            return self.speed_calibration.dropwise_speed(chemical, line.key, line.dropwise_speed)
+        return self.speed_calibration.speed(chemical, line.key, line.default_speed)
+
     def dispense_volume(self, vol:float, chemical:str, speed:int=None):
         """
         Volume dispensing of volume in uL from port specified to Dispense port specified in workflow config (1)
 
-        For the Tecan Xcalibur pump by default the speed is predefined speed 11 (default speed) and for the C3000 pump the speed is set to 20.
-        These numbers have been meassured to give accurate results for dispensing with water. 
+        By default the speed is chosen by dispense_speed: the calibrated speed of the chemical when there is one,
+        otherwise the default_speed of the pump in PUMP_PORT_ASSIGNMENTS, predefined speed 11 for the Tecan Xcalibur
+        pump and 20 for the C3000 pump. These numbers have been meassured to give accurate results for dispensing with water.
+        The pump is set back to its default speed after dispensing.
         
         """
-        if self.dispense_dict[chemical] <= 12:
-            self._logger.info((f"{chemical} is on pump: {self.pump.device_name}"))
-           
-            if speed is not None:
-                self.pump.set_predefined_speed(speed)
+        route = self.pump_router.route(chemical)
+        pump = self._pump_device(route)
+        line = route.pump
+        self._logger.info((f"{chemical} is on pump: {pump.device_name}"))
 
-            if chemical != self._pump_1_primed_solvent:
-                raise Exception(f"Need to prime with {chemical} from port {self.dispense_dict[chemical]}")
-        
-            self._logger.info(f"Dispensing {vol} uL of {chemical} from port {self.dispense_dict[chemical]} to dispense port ({self.dispense_dict['Dispense']})")
-            self.pump.dispense(vol, source_port = self.dispense_dict[chemical], destination_port = self.dispense_dict['Dispense'])
-            
-            self.pump.set_predefined_speed(11) # resetting to default after dispensing is done
-            self.pump.is_idle()
+        if chemical != self._primed_solvent(line):
+            raise Exception(f"Need to prime with {chemical} from port {route.port}")
 
-        elif self.dispense_dict[chemical] > 12:
-            self._logger.info((f"{chemical} is on pump: {self.pump_2.device_name}"))
+        if speed is None:
+            speed = self.dispense_speed(chemical)
+        self._logger.info(f"setting top pre-defined speed to {speed}")
+        pump.set_predefined_speed(speed)
 
-            if speed is None:
-                speed = 20
-            
-            if chemical != self._pump_2_primed_solvent:
-                raise Exception(f"Need to prime with {chemical} from port {self.dispense_dict[chemical]}")
-        
-            dispense_port = "I" + str(self.dispense_dict["Dispense_2"]-12)
-            chemical_port = "I" + str(self.dispense_dict[chemical]-12)
-
-            self._logger.info(f"setting top pre-defined speed to {speed}")
-            self.pump_2.set_predefined_speed(speed)
+        self._logger.info(f"Dispensing {vol} uL of {chemical} from port {route.port} to dispense port ({line.dispense_port})")
+        pump.dispense(vol, source_port = route.source, destination_port = route.dispense)
 
-            self._logger.info(f"Dispensing {vol} uL of {chemical} from port {self.dispense_dict[chemical]} to dispense port ({self.dispense_dict['Dispense_2']})")
-          
-
-        
-            self.pump_2.dispense(vol, source_port = chemical_port, destination_port = dispense_port)
-            self.pump_2.is_idle()
+        if speed != line.default_speed:
+            pump.set_predefined_speed(line.default_speed) # resetting to default after dispensing is done
+        pump.is_idle()
 
 
     def dispense_dropwise(self, vol:float, chemical:str = "Water(DI)" ):
@@ -1530,17 +1538,76 @@ class RobInHood():
         Volume dispensing, but dropwise, of volume in uL from port specified to Dispense port specified in workflow config (1)
         
         """
-        if self.dispense_dict[chemical] <= 12:
-            self._logger.info(f"Dropwise dispensing {vol} uL of {chemical}")
-            self.pump.set_predefined_speed(speed = 14)
-            self.dispense_volume(vol, chemical)
-            self.pump.set_predefined_speed(11) # resetting to default after dropwise dispensing is done
-        
-        elif self.dispense_dict[chemical] > 12:
-            self._logger.info(f"Dropwise dispensing {vol} uL of {chemical}")
-            self.pump_2.set_predefined_speed(speed=27)
-            self.dispense_volume(vol, chemical)
-            self.pump_2.set_predefined_speed(20)
+        self._logger.info(f"Dropwise dispensing {vol} uL of {chemical}")
+        self.dispense_volume(vol, chemical, speed=self.dispense_speed(chemical, dropwise=True))
+
+    def calibrate_dispense_speed(self, chemical:str, vial_number:int, volume:float = 500, speeds:list = None, tolerance:float = 0.02,
+                                 repeats:int = 1, density:float = None, vial_volume:float = 6000) -> int:
+        """
+        Gravimetric calibration of the fastest accurate dispense speed of chemical, recorded in the speed calibration table.
+
+        An empty vial from the rack is weighed on the Quantos, then volume uL are dispensed into it at each speed, from
+        the fastest to the slowest, and the vial is weighed after every dispense. The first speed whose relative errors
+        are all within tolerance is the calibrated speed. The dispense line must be primed with chemical.
+
+        :param vial_number: rack position of the empty calibration vial, put back on the rack at the end
+        :param speeds: predefined speeds to try, from the fastest (lowest code), by default the 6 speed codes faster than
+        the default speed of the pump and the default speed itself
+        :param repeats: dispenses per speed
+        :param density: [g/mL] density of chemical, from the calibration table or SOLVENT_DENSITIES when None
+        :param vial_volume: [uL] largest total volume dispensed into the vial, the calibration stops before exceeding it
+        :return: the calibrated speed, the default speed of the pump when no speed was accurate
+        """
+        line = self.pump_router.route(chemical).pump
+        if density is None:
+            density = self.speed_calibration.density(chemical, SOLVENT_DENSITIES.get(chemical))
+        if density is None:
+            raise ValueError(f"No density for {chemical}, pass density or add it to SOLVENT_DENSITIES")
+        if speeds is None:
+            speeds = list(range(max(0, line.default_speed - 6), line.default_speed + 1))
+        self._logger.info(f"Calibrating the dispense speed of {chemical} on pump {line.name}, speeds {speeds}, {volume} uL x {repeats}")
+        self.pump_prime_dispense_tubing(chemical)
+
+        def weigh():
+            self.quantos.close_front_door()
+            mass = self.take_weight()
+            self.quantos.open_front_door()
+            return mass
+
+        self.robot.open_gripper_set_width(0.03)
+        self.vial_rack_to_quantos(vial_number=vial_number)
+        mass = weigh()
+        self.vial_quantos_to_pump()
+
+        calibrated, calibrated_error, dispensed = None, None, 0.0
+        for speed in sorted(speeds):
+            if dispensed + volume * repeats > vial_volume:
+                self._logger.warning(f"Calibration vial full after {dispensed} uL, speeds slower than {speed} not tried")
+                break
+            errors = []
+            for _ in range(repeats):
+                self.infuse_position()
+                self.dispense_volume(volume, chemical, speed=speed)
+                self.hold_position()
+                dispensed += volume
+                self.vial_pump_to_quantos()
+                new_mass = weigh()
+                errors.append(self.speed_calibration.relative_error(new_mass - mass, volume, density))
+                mass = new_mass
+                self.vial_quantos_to_pump()
+            worst = max(errors, key=abs)
+            self._logger.info(f"{chemical} at speed {speed}: relative errors {[round(error, 4) for error in errors]}")
+            if abs(worst) <= tolerance:
+                calibrated, calibrated_error = speed, worst
+                break
+
+        self.vial_pump_to_rack(vial_number=vial_number)
+
+        if calibrated is None:
+            self._logger.warning(f"No speed dispensed {chemical} within {tolerance:.1%}, keeping the default speed {line.default_speed}")
+            return line.default_speed
+        self.speed_calibration.set(chemical, line.key, calibrated, density=density, error=round(calibrated_error, 5))
+        return calibrated
         
 
 
@@ -1553,16 +1620,14 @@ class RobInHood():
         
         '''
         self._logger.info("Moving holder to home position...")
-        self.holder.holding_position()
-        time.sleep(6)
+        self.holder.holding_position(wait=True)
     
     def infuse_position(self):
         '''
         
         '''
         self._logger.info("Moving holder to infusing position...")
-        self.holder.infusing_position()
-        time.sleep(6)
+        self.holder.infusing_position(wait=True)
 
     #######################
     # Filter Machine Init #
@@ -1591,20 +1656,20 @@ class RobInHood():
         Tares the Quantos
         
         """
-        time.sleep(5)
+        self.clock.sleep(5)
         self._logger.info("Taring Quantos")
         self.quantos.tare()
-        time.sleep(5)
+        self.clock.sleep(5)
 
     def zero(self):
         """
         Zeros the Quantos
         
         """
-        time.sleep(5)
+        self.clock.sleep(5)
         self._logger.info("Zeroing Quantos")
         self.quantos.zero()
-        time.sleep(5)
+        self.clock.sleep(5)
 
     def set_antistatic(self, pause=5):
         """
@@ -1614,7 +1679,7 @@ class RobInHood():
         """
         self._logger.info(f"Setting antistatic on for {pause} secs")
         self.quantos.set_antistatic_on()
-        time.sleep(pause)
+        self.clock.sleep(pause)
         self._logger.info("Setting antistatic off")
         self.quantos.set_antistatic_off()
 
@@ -1625,7 +1690,7 @@ class RobInHood():
         
         returns: mass in g as a float.
         """
-        time.sleep(5)
+        self.clock.sleep(5)
         self.set_antistatic(pause = 20)
         self._logger.info("Getting stable weight")
         weight = self.quantos.get_stable_weight()
@@ -1671,9 +1736,9 @@ class RobInHood():
         try:
             self._logger.info("Connecting to the Quantos - opening doors")
             side = self.quantos.open_side_door()
-            time.sleep(1)
+            self.clock.sleep(1)
             front = self.quantos.open_front_door()
-            time.sleep(4)
+            self.clock.sleep(4)
             pin = self.quantos.unlock_dosing_head_pin()
             self._logger.info("Quantos connected..")
             if side["success"] and front["success"] and pin["success"] == True:
@@ -1691,12 +1756,12 @@ class RobInHood():
         """
         self._logger.info("setting antistatinc on for 30 seconds")
         self.quantos.set_antistatic_on()
-        time.sleep(30) 
+        self.clock.sleep(30) 
         self.quantos.set_antistatic_off()
         self._logger.info("Closing the Quantos doors")
         self.quantos.close_front_door()
         self.quantos.close_side_door()
-        time.sleep(2)
+        self.clock.sleep(2)
         self._logger.info("Taring the vial")
         self.quantos.tare()
         self._logger.info(f"Setting target mass: {quantity} mg")
@@ -1719,7 +1784,7 @@ class RobInHood():
             self._logger.error("Dosing pin did not unlock!")
             self.camera.stop_streaming()
             exit()
-        time.sleep(2)
+        self.clock.sleep(2)
         return mass_3
     
     def check_quantos_door_position(self, debug = False):
@@ -1805,7 +1870,7 @@ class RobInHood():
         self.linear_motion([0.001982, 0.376151, 0.526305, 3.1116, 0.0, 0.0])
         self.linear_motion([-0.011982, 0.376151, 0.526305, 3.1116, 0.0, 0.0])
         self.linear_motion([-0.041982, 0.376051, 0.526305, 3.1116, 0.0, 0.0])
-        self.robot.gripper.clamp()    
+        self.robot.close_gripper()    
         self.linear_motion([-0.041982, 0.376151, 0.540705, 3.1116, 0.0, 0.0])
         self.linear_motion([0.169982, 0.375151, 0.540705, 3.1116, 0.0, 0.0])
         self.robot.move_robot_j([1.3810990672865433, -0.4376424354630252, -0.16643925884942884, -1.9463214740920483, -0.07087051429637338, 1.5159071390893721, 0.41702839089840543])
@@ -1827,20 +1892,20 @@ class RobInHood():
     def place_pouring_vial(self):
         self.robot.open_gripper()
         self.linear_motion([0.022258, -0.467369, 0.398940, -1.595905, 0.0, 0.0])
-        self.robot.gripper.clamp()
+        self.robot.close_gripper()
         self.linear_motion([0.022258, -0.467369, 0.418940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.022258, -0.367369, 0.418940, -1.595905, 0.0, 0.0])
         self.robot.move_robot_j([-1.6825831973092593, -0.7512689684489675, 0.10107567072019243, -1.4848797843832717, 0.050245032940314245, 0.7522517192800073, 0.9702840447599688])
         self.robot.move_robot_j([0.025837634441163083, -0.5176102407355057, 0.03080867797267018, -1.3993947949827763, -0.02509436809981876, 0.7529030797853492, 0.8734131455595293])
         self.robot.move_robot_j([1.750326817479648, -0.44464414172915323, -0.23112342370038044, -1.390864142585219, -0.014127235525181456, 0.9074308650758531, 0.8713202182625731])
         self.robot.move_robot_j([1.6719688030542637, -0.8834351108366983, -0.26671000717412824, -2.2992954718941134, -0.21853025324254666, 1.4411707397379108, 1.4808894478894459])
-        self.robot.move_robot_j([1.7415798643011793, -0.0069504058194177895, -0.46784280477804047, -1.5596739162143904, -0.02469401671323521, 1.555493745115068, 1.2319450958743936])
-        self.robot.move_robot_j([1.7415834835788657, -0.006952786336996053, -0.4678375150644988, -1.5596669560649934, -0.02469401671323511, 1.5554923209614222, 1.2319494700597393])
-        self.robot.move_robot_j([1.7521364097260588, -0.05325885548002933, -0.4686465469368717, -1.670775921484095, -0.04249728541703545, 1.6499860881446284, 1.2195799009179076])
-        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0])
-        self.linear_motion([0.167485, 0.522769, 0.479766, 0.852446, 0.0, 0.0])
+        self.robot.move_robot_j([1.7415798643011793, -0.0069504058194177895, -0.46784280477804047, -1.5596739162143904, -0.02469401671323521, 1.555493745115068, 1.2319450958743936], profile="pour")
+        self.robot.move_robot_j([1.7415834835788657, -0.006952786336996053, -0.4678375150644988, -1.5596669560649934, -0.02469401671323511, 1.5554923209614222, 1.2319494700597393], profile="pour")
+        self.robot.move_robot_j([1.7521364097260588, -0.05325885548002933, -0.4686465469368717, -1.670775921484095, -0.04249728541703545, 1.6499860881446284, 1.2195799009179076], profile="pour")
+        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0], profile="pour")
+        self.linear_motion([0.167485, 0.522769, 0.479766, 0.852446, 0.0, 0.0], profile="pour")
         self.robot.open_gripper_set_width(0.03)
-        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0])
+        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0], profile="pour")
         self.robot.move_robot_j([1.8239471924765067, -0.2191294359424024, -0.41650516700744616, -1.457997336354172, -0.015636471908125612, 1.188983913368649, 1.2006505843130706])
         self.robot.move_robot_j([1.4417549399440945, -0.30650558163038505, -0.06792560008212559, -1.1878539450628716, -0.015183169519735707, 0.7825317940182156, 0.7487085182201909])
         self.robot.move_robot_j([0.04891864797682642, -0.36952059863329684, -0.034476075749482936, -1.087221138013657, -0.015606996442708701, 0.6221409357674151, 0.7824923388328234])
@@ -1848,20 +1913,20 @@ class RobInHood():
     def place_pouring_cleaning_vial(self,vial_number):
         self.vial_rack_to_pump(vial_number=vial_number)
         self.linear_motion([0.022258, -0.467369, 0.398940, -1.595905, 0.0, 0.0])
-        self.robot.gripper.clamp() 
+        self.robot.close_gripper() 
         self.linear_motion([0.022258, -0.467369, 0.418940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.022258, -0.367369, 0.418940, -1.595905, 0.0, 0.0])
         self.robot.move_robot_j([-1.6825831973092593, -0.7512689684489675, 0.10107567072019243, -1.4848797843832717, 0.050245032940314245, 0.7522517192800073, 0.9702840447599688])
         self.robot.move_robot_j([0.025837634441163083, -0.5176102407355057, 0.03080867797267018, -1.3993947949827763, -0.02509436809981876, 0.7529030797853492, 0.8734131455595293])
         self.robot.move_robot_j([1.750326817479648, -0.44464414172915323, -0.23112342370038044, -1.390864142585219, -0.014127235525181456, 0.9074308650758531, 0.8713202182625731])
         self.robot.move_robot_j([1.6719688030542637, -0.8834351108366983, -0.26671000717412824, -2.2992954718941134, -0.21853025324254666, 1.4411707397379108, 1.4808894478894459])
-        self.robot.move_robot_j([1.7415798643011793, -0.0069504058194177895, -0.46784280477804047, -1.5596739162143904, -0.02469401671323521, 1.555493745115068, 1.2319450958743936])
-        self.robot.move_robot_j([1.7415834835788657, -0.006952786336996053, -0.4678375150644988, -1.5596669560649934, -0.02469401671323511, 1.5554923209614222, 1.2319494700597393])
-        self.robot.move_robot_j([1.7521364097260588, -0.05325885548002933, -0.4686465469368717, -1.670775921484095, -0.04249728541703545, 1.6499860881446284, 1.2195799009179076])
-        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0])
-        self.linear_motion([0.167485, 0.522769, 0.479766, 0.852446, 0.0, 0.0])
+        self.robot.move_robot_j([1.7415798643011793, -0.0069504058194177895, -0.46784280477804047, -1.5596739162143904, -0.02469401671323521, 1.555493745115068, 1.2319450958743936], profile="pour")
+        self.robot.move_robot_j([1.7415834835788657, -0.006952786336996053, -0.4678375150644988, -1.5596669560649934, -0.02469401671323511, 1.5554923209614222, 1.2319494700597393], profile="pour")
+        self.robot.move_robot_j([1.7521364097260588, -0.05325885548002933, -0.4686465469368717, -1.670775921484095, -0.04249728541703545, 1.6499860881446284, 1.2195799009179076], profile="pour")
+        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0], profile="pour")
+        self.linear_motion([0.167485, 0.522769, 0.479766, 0.852446, 0.0, 0.0], profile="pour")
         self.robot.open_gripper_set_width(0.03)
-        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0])
+        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0], profile="pour")
         self.robot.move_robot_j([1.8239471924765067, -0.2191294359424024, -0.41650516700744616, -1.457997336354172, -0.015636471908125612, 1.188983913368649, 1.2006505843130706])
         self.robot.move_robot_j([1.4417549399440945, -0.30650558163038505, -0.06792560008212559, -1.1878539450628716, -0.015183169519735707, 0.7825317940182156, 0.7487085182201909])
         self.robot.move_robot_j([0.04891864797682642, -0.36952059863329684, -0.034476075749482936, -1.087221138013657, -0.015606996442708701, 0.6221409357674151, 0.7824923388328234])
@@ -1870,13 +1935,13 @@ class RobInHood():
         self.robot.move_robot_j([0.04891864797682642, -0.36952059863329684, -0.034476075749482936, -1.087221138013657, -0.015606996442708701, 0.6221409357674151, 0.7824923388328234])
         self.robot.move_robot_j([1.4417549399440945, -0.30650558163038505, -0.06792560008212559, -1.1878539450628716, -0.015183169519735707, 0.7825317940182156, 0.7487085182201909])
         self.robot.move_robot_j([1.8239471924765067, -0.2191294359424024, -0.41650516700744616, -1.457997336354172, -0.015636471908125612, 1.188983913368649, 1.2006505843130706])
-        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0])
-        self.linear_motion([0.167485, 0.522769, 0.479766, 0.852446, 0.0, 0.0])
-        self.robot.gripper.clamp()
-        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0])
-        self.robot.move_robot_j([1.7521364097260588, -0.05325885548002933, -0.4686465469368717, -1.670775921484095, -0.04249728541703545, 1.6499860881446284, 1.2195799009179076])
-        self.robot.move_robot_j([1.7415834835788657, -0.006952786336996053, -0.4678375150644988, -1.5596669560649934, -0.02469401671323511, 1.5554923209614222, 1.2319494700597393])
-        self.robot.move_robot_j([1.7415798643011793, -0.0069504058194177895, -0.46784280477804047, -1.5596739162143904, -0.02469401671323521, 1.555493745115068, 1.2319450958743936])
+        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0], profile="pour")
+        self.linear_motion([0.167485, 0.522769, 0.479766, 0.852446, 0.0, 0.0], profile="pour")
+        self.robot.close_gripper()
+        self.linear_motion([0.167485, 0.522769, 0.506766, 0.852446, 0.0, 0.0], profile="pour")
+        self.robot.move_robot_j([1.7521364097260588, -0.05325885548002933, -0.4686465469368717, -1.670775921484095, -0.04249728541703545, 1.6499860881446284, 1.2195799009179076], profile="pour")
+        self.robot.move_robot_j([1.7415834835788657, -0.006952786336996053, -0.4678375150644988, -1.5596669560649934, -0.02469401671323511, 1.5554923209614222, 1.2319494700597393], profile="pour")
+        self.robot.move_robot_j([1.7415798643011793, -0.0069504058194177895, -0.46784280477804047, -1.5596739162143904, -0.02469401671323521, 1.555493745115068, 1.2319450958743936], profile="pour")
         self.robot.move_robot_j([1.750326817479648, -0.44464414172915323, -0.23112342370038044, -1.390864142585219, -0.014127235525181456, 0.9074308650758531, 0.8713202182625731])
         self.robot.move_robot_j([0.025837634441163083, -0.5176102407355057, 0.03080867797267018, -1.3993947949827763, -0.02509436809981876, 0.7529030797853492, 0.8734131455595293])
         self.robot.move_robot_j([-1.6825831973092593, -0.7512689684489675, 0.10107567072019243, -1.4848797843832717, 0.050245032940314245, 0.7522517192800073, 0.9702840447599688])
@@ -1890,7 +1955,7 @@ class RobInHood():
     def place_filtered_vial(self,vial_number):
         self.vial_rack_to_pump(vial_number=vial_number)
         self.linear_motion([0.022258, -0.467369, 0.398940, -1.595905, 0.0, 0.0])
-        self.robot.gripper.clamp()
+        self.robot.close_gripper()
         self.linear_motion([0.022258, -0.467369, 0.418940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.022258, -0.367369, 0.418940, -1.595905, 0.0, 0.0])
         self.robot.move_robot_j([-1.6825831973092593, -0.7512689684489675, 0.10107567072019243, -1.4848797843832717, 0.050245032940314245, 0.7522517192800073, 0.9702840447599688])
@@ -1914,7 +1979,7 @@ class RobInHood():
         self.robot.move_robot_j([1.5006457277599135, -0.6531259591905769, -0.20413154550438192, -2.2995178853085165, -0.1337984819014867, 1.6078263387150236, 0.5208376335718204])
         self.linear_motion([0.242288, 0.375569, 0.243143, 1.596921, 0.0, 0.0])
         self.linear_motion([0.242288, 0.425569, 0.243143, 1.596921, 0.0, 0.0])
-        self.robot.gripper.clamp()
+        self.robot.close_gripper()
         self.linear_motion([0.242288, 0.425569, 0.267143, 1.596921, 0.0, 0.0])
         self.robot.move_robot_j([1.6719688030542637, -0.8834351108366983, -0.26671000717412824, -2.2992954718941134, -0.21853025324254666, 1.4411707397379108, 1.4808894478894459])
         self.robot.move_robot_j([1.750326817479648, -0.44464414172915323, -0.23112342370038044, -1.390864142585219, -0.014127235525181456, 0.9074308650758531, 0.8713202182625731])
@@ -1935,7 +2000,7 @@ class RobInHood():
         """Moves the vial from the rack to the decapper and then from the decapper to the liquid handling station"""
         self.vial_rack_to_pump(vial_number=vial_number)
         self.linear_motion([0.022258, -0.467369, 0.398940, -1.595905, 0.0, 0.0])
-        self.robot.gripper.clamp()
+        self.robot.close_gripper()
         self.linear_motion([0.022258, -0.467369, 0.418940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.022258, -0.367369, 0.418940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.172258, -0.367369, 0.418940, -1.595905, 0.0, 0.0])
@@ -1950,10 +2015,10 @@ class RobInHood():
         self.capper.right()
         self.linear_motion([-0.092258, -0.367369, 0.204940, -1.595905, 0.0, 0.0])
         self.linear_motion([-0.092258, -0.397369, 0.204940, -1.595905, 0.0, 0.0])
-        time.sleep(80)
+        self.capper.wait_for_completion(fallback_delay=80)
         self.linear_motion([-0.092258, -0.397369, 0.144940, -1.595905, 0.0, 0.0])
         self.linear_motion([-0.092258, -0.407369, 0.144940, -1.595905, 0.0, 0.0])
-        self.robot.gripper.clamp()
+        self.robot.close_gripper()
         self.linear_motion([-0.092258, -0.407369, 0.174940, -1.595905, 0.0, 0.0])
         self.linear_motion([-0.092258, -0.337369, 0.174940, -1.595905, 0.0, 0.0])
         self.capper.left()
@@ -1963,10 +2028,10 @@ class RobInHood():
         self.linear_motion([-0.092258, -0.367369, 0.204940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.192258, -0.367369, 0.204940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.192258, -0.367369, 0.154940, -1.595905, 0.0, 0.0])
-        time.sleep(68)
+        self.capper.wait_for_completion(fallback_delay=68)
         self.linear_motion([0.192258, -0.417369, 0.154940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.192258, -0.417369, 0.124940, -1.595905, 0.0, 0.0])
-        self.robot.gripper.clamp()
+        self.robot.close_gripper()
         self.linear_motion([0.192258, -0.417369, 0.148940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.172258, -0.367369, 0.148940, -1.595905, 0.0, 0.0])
         self.linear_motion([0.172258, -0.367369, 0.418940, -1.595905, 0.0, 0.0])
@@ -1985,19 +2050,23 @@ class RobInHood():
         
         self._logger.info(f"Priming the dispense station with {cleaning_solvent} solvent")
         self.hold_position()
-        self.pump_prime_dispense_tubing(chemical=cleaning_solvent)
+        # the dispense line primes into the waste while the arm brings the cleaning vial
+        prime = self.start_pump(self.pump_prime_dispense_tubing, cleaning_solvent)
         
 
         self.robot.open_gripper_set_width(0.03)
         self.vial_rack_to_pump(vial_number=cleaning_vial_number)
+        prime.result()
         self.infuse_position()
         self.dispense_volume(vol = cleaning_solvent_volume, chemical=cleaning_solvent)
         self.hold_position()
-        self.vial_pump_to_rack(vial_number=cleaning_vial_number)
+        # the Quantos door is away from the rack, it closes while the arm takes the vial back
+        motion = self.start_motion(self.vial_pump_to_rack, vial_number=cleaning_vial_number)
 
         self._logger.info("Placing filter cartridge")
 
         self.quantos.close_front_door()
+        motion.result()
         self.robot.open_gripper()
         self.pick_up_filtering_catridge()
         
@@ -2040,44 +2109,52 @@ class RobInHood():
         self._logger.info(f"Removing filtered sample vial {sample_vial_number} from the filter machine")
         self.remove_pouring_vial(vial_number=sample_vial_number)
 
-    def filter_cleaning_packdown(self, cleaning_solvent:str, cleaning_solvent_volume:float):
-        """Cleans the filtration machine after filtering a vial"""
+    def request_filter_replacement(self):
+        """
+        Asks the operator to replace the filter cartridge and waits for the confirmation. Only the calling thread waits,
+        operations of other samples on the station scheduler carry on.
+        """
+        while self.operator.ask("Please replace the filter cartridge. Replaced?", options=("y", "n"), source="filt_machine") != "y":
+            self._logger.warning("Please replace the cartridge.")
+        self._logger.info("Resuming workflow.")
+
+    def filter_cleaning_packdown(self, cleaning_solvent:str, cleaning_solvent_volume:float, wait_for_operator:bool = True):
+        """Cleans the filtration machine after filtering a vial.
+        When wait_for_operator is False the filter replacement is not requested, schedule request_filter_replacement as a separate
+        operation so the arm is free for other samples while the operator replaces the cartridge."""
         self.filt_machine.clean(volume_filtered=cleaning_solvent_volume, wash_solvent= cleaning_solvent)
 
         self.quantos.open_front_door()
-        self._logger.warning("Please replace the filter cartridge")
-
-        while True:
-            self._logger.warning("Please replace the filter cartridge(y/n)?")
-            yn = input()
-            if yn =='y' or yn =='Y':
-                self._logger.info("Resuming workflow.")
-                break
-            elif yn == 'n' or yn == 'N':
-                self._logger.warning("Please replace the cartridge.")
+        if wait_for_operator:
+            self.request_filter_replacement()
         
 
 
     def filter_sample_collect_filtrate(self,sample_vial_number:int,sample_vial_volume:int, filtrate_vial_number:int, cleaning_vial_number:int,
-                                        cleaning_solvent:str, cleaning_solvent_volume:float, filter_time: Union[int, None] = None):
+                                        cleaning_solvent:str, cleaning_solvent_volume:float, filter_time: Union[int, None] = None,
+                                        wait_for_operator:bool = True):
 
         self._logger.info("Washing the filter and funnel prior to filtration")
         
         self._logger.info(f"Priming the dispense station with {cleaning_solvent} solvent")
         self.hold_position()
-        self.pump_prime_dispense_tubing(chemical=cleaning_solvent)
+        # the dispense line primes into the waste while the arm brings the cleaning vial
+        prime = self.start_pump(self.pump_prime_dispense_tubing, cleaning_solvent)
         
 
         self.robot.open_gripper_set_width(0.03)
         self.vial_rack_to_pump(vial_number=cleaning_vial_number)
+        prime.result()
         self.infuse_position()
         self.dispense_volume(vol = cleaning_solvent_volume, chemical=cleaning_solvent)
         self.hold_position()
-        self.vial_pump_to_rack(vial_number=cleaning_vial_number)
+        # the Quantos door is away from the rack, it closes while the arm takes the vial back
+        motion = self.start_motion(self.vial_pump_to_rack, vial_number=cleaning_vial_number)
 
         self._logger.info("Placing filter cartridge")
 
         self.quantos.close_front_door()
+        motion.result()
         self.robot.open_gripper()
         self.pick_up_filtering_catridge()
         
@@ -2104,41 +2181,38 @@ class RobInHood():
         self.filt_machine.clean(volume_filtered=sample_vial_volume, wash_solvent= cleaning_solvent)
 
         self.quantos.open_front_door()
-        self._logger.warning("Please replace the filter cartridge")
-
-        while True:
-            self._logger.warning("Please replace the filter cartridge(y/n)?")
-            yn = input()
-            if yn =='y' or yn =='Y':
-                self._logger.info("Resuming workflow.")
-                break
-            elif yn == 'n' or yn == 'N':
-                self._logger.warning("Please replace the cartridge.")
+        if wait_for_operator:
+            self.request_filter_replacement()
         
         return 
 
     def filter_sample_disgard_filtrate(self,sample_vial_number:int, sample_vial_volume:int,  cleaning_vial_number:int,
-                                        cleaning_solvent:str, cleaning_solvent_volume:float, filter_time: Union[int, None] = None):
+                                        cleaning_solvent:str, cleaning_solvent_volume:float, filter_time: Union[int, None] = None,
+                                        wait_for_operator:bool = True):
 
         self._logger.info("Washing the filter and funnel prior to filtration")
         
         self._logger.info(f"Priming the dispense station with {cleaning_solvent} solvent")
         self.hold_position()
-        self.pump_prime_dispense_tubing(chemical=cleaning_solvent)
+        # the dispense line primes into the waste while the arm brings the cleaning vial
+        prime = self.start_pump(self.pump_prime_dispense_tubing, cleaning_solvent)
 
 
         self.robot.open_gripper_set_width(0.03)
         self.vial_rack_to_pump(vial_number=cleaning_vial_number)
+        prime.result()
         self.infuse_position()
 
 
         self.dispense_volume(vol = cleaning_solvent_volume, chemical=cleaning_solvent)
         self.hold_position()
-        self.vial_pump_to_rack(vial_number=cleaning_vial_number)
+        # the Quantos door is away from the rack, it closes while the arm takes the vial back
+        motion = self.start_motion(self.vial_pump_to_rack, vial_number=cleaning_vial_number)
 
         self._logger.info("Placing filter cartridge")
 
         self.quantos.close_front_door()
+        motion.result()
         self.robot.open_gripper()
         self.pick_up_filtering_catridge()
         
@@ -2166,16 +2240,8 @@ class RobInHood():
         self.filt_machine.clean(volume_filtered=sample_vial_volume, wash_solvent= cleaning_solvent)
 
         self.quantos.open_front_door()
-        self._logger.warning("Please replace the filter cartridge")
-
-        while True:
-            self._logger.warning("Please replace the filter cartridge(y/n)?")
-            yn = input()
-            if yn =='y' or yn =='Y':
-                self._logger.info("Resuming workflow.")
-                break
-            elif yn == 'n' or yn == 'N':
-                self._logger.warning("Please replace the cartridge.")
+        if wait_for_operator:
+            self.request_filter_replacement()
         
         return 
 
@@ -2183,16 +2249,18 @@ class RobInHood():
     # json method #
     ############################# 
 
-    def load_running_variables(self, json_file_path: str = "running_variables.json") -> dict:
+    def load_running_variables(self, json_file_path: str = None) -> dict:
         """Load a JSON file and return its content as a dictionary.
 
         Args:
-            json_file_path (str): Path to the JSON file.
+            json_file_path (str): Path to the JSON file, defaults to self.running_variables_file.
 
         Returns:
             dict: Content of the JSON file.
         """
-        
+        if json_file_path is None:
+            json_file_path = self.running_variables_file
+
         try:
             with open(json_file_path, 'r') as f:
                 variable_dict = json.load(f)
@@ -2206,13 +2274,15 @@ class RobInHood():
             }
     
 
-    def save_running_variables(self, json_file_path: str = "running_variables.json") -> None: 
+    def save_running_variables(self, json_file_path: str = None) -> None: 
         """Save a dictionary to a JSON file.
 
         Args:
-            json_file_path (str): Path to the JSON file.
+            json_file_path (str): Path to the JSON file, defaults to self.running_variables_file.
             data (dict): Data to save.
         """
+        if json_file_path is None:
+            json_file_path = self.running_variables_file
 
         data = {
 
@@ -2221,6 +2291,8 @@ class RobInHood():
             'cartridge_in_quantos': self._cartridge_in_quantos,
 
         }
+        for device, line in self.pump_router.devices.items():
+            data[line.line_state_variable] = self._line_states.get(device, {})
 
-        with open(json_file_path, 'w+') as f:
+        with self._running_variables_lock, open(json_file_path, 'w+') as f:
             json.dump(data, f, indent=4)
\ No newline at end of file
@@ -0,0 +1,457 @@
+import re
+import math
+import logging
+from ..config.configuration import SIM_DURATIONS, ROBOT_STATE_MAX_AGE, MOTION_PROFILES, GRIPPER_WIDTH_TOLERANCE
+from ..utils.robot_state_cache import RobotStateCache
+from ..utils.motion_profiles import MotionProfiles
+from ..utils.motion_executor import MotionExecutor
+from ..utils.gripper_state import GripperState
+
+
+class SimDevice():
+    """
+    Base class of the simulated devices used by RobInHood(sim=True).
+
+    Every command occupies the device station on the virtual clock for the time given by the duration models.
+    pylabware commands that are not modelled explicitly take SIM_DURATIONS["command"] and succeed.
+
+    :param clock: VirtualClock shared by all the simulated devices
+    :param station: name of the station in the utilisation report
+    """
+    def __init__(self, clock, station, device_name="", durations=SIM_DURATIONS):
+        self.clock = clock
+        self.station = station
+        self.device_name = device_name or station
+        self.durations = durations
+        self._logger = logging.getLogger(f"Sim_{self.device_name}")
+
+    def _busy(self, key, seconds=None, label=None):
+        self.clock.busy(self.station, self.durations[key] if seconds is None else seconds, label or key)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs):
+            self._busy("command", label=name)
+            return {"success": True, "outcomes": [None, None]}
+        return command
+
+
+class SimPump(SimDevice):
+    """
+    Simulated syringe pump (XCalibur or C3000).
+    :param syringe_volume: syringe volume in uL
+    """
+    def __init__(self, clock, station, device_name="", syringe_volume=1000.0, default_speed=11):
+        super().__init__(clock, station, device_name)
+        self.syringe_volume = syringe_volume
+        self.default_speed = default_speed
+        self.speed = default_speed
+
+    def connect(self):
+        self._busy("device_init", label="connect")
+
+    def initialize_device(self, *args, **kwargs):
+        self._busy("device_init", label="initialize_device")
+
+    def set_predefined_speed(self, speed):
+        self.speed = speed
+
+    def is_idle(self):
+        return True
+
+    def dispense(self, volume, source_port=None, destination_port=None):
+        """
+        Each stroke switches the valve twice; stroke time scales with the predefined speed
+        (higher Cavro speed codes are slower).
+        """
+        strokes = max(1, math.ceil(float(volume) / self.syringe_volume))
+        stroke_time = self.durations["pump_stroke"] * (float(volume) / self.syringe_volume) * (self.speed / self.default_speed)
+        self._busy("pump_stroke", seconds=self.durations["pump_command"] + strokes * 2 * self.durations["pump_valve"] + stroke_time,
+                   label=f"dispense {volume} uL {source_port}->{destination_port}")
+
+    def send_command_string(self, command, full_steps=3000):
+        """
+        Runs a Cavro command string (see PumpProgramCompiler): valve switches I<port>, absolute plunger moves A<steps>,
+        speed S<speed>, loops g ... G<count>, execute R. Plunger time scales with the steps moved, half a full
+        stroke time for a full aspirate or dispense.
+        """
+        tokens = re.findall(r"([IASgGR])(\d*)", command)
+        seconds, position = self.durations["pump_command"], 0
+
+        def run(start, speed):
+            nonlocal seconds, position
+            i = start
+            while i < len(tokens):
+                letter, value = tokens[i]
+                if letter == "I":
+                    seconds += self.durations["pump_valve"]
+                elif letter == "A":
+                    seconds += self.durations["pump_stroke"] / 2 * abs(int(value) - position) / full_steps * (speed / self.default_speed)
+                    position = int(value)
+                elif letter == "S":
+                    self.speed = speed = int(value)
+                elif letter == "g":
+                    end = None
+                    for _ in range(loop_count(i)):
+                        end = run(i + 1, speed)
+                    i = end
+                elif letter == "G":
+                    return i
+                i += 1
+            return i
+
+        def loop_count(start):
+            depth = 0
+            for letter, value in tokens[start:]:
+                depth += {"g": 1, "G": -1}.get(letter, 0)
+                if depth == 0:
+                    return int(value or 1)
+            return 1
+
+        run(0, self.speed)
+        self._busy("pump_stroke", seconds=seconds, label=f"command {command}")
+
+
+class SimIKA(SimDevice):
+    """
+    Simulated IKA hotplate stirrer, every command takes SIM_DURATIONS["command"].
+    """
+    def __init__(self, clock):
+        super().__init__(clock, "ika", "IKA")
+
+
+class SimQuantos(SimDevice):
+    """
+    Simulated Quantos balance and solid dispenser.
+    """
+    def __init__(self, clock):
+        super().__init__(clock, "quantos", "QUANTOS")
+        self.front_door_open = False
+        self.side_door_open = False
+        self.target_mass = 0.0
+        self.mass = 0.0
+
+    def _door(self, front, is_open):
+        self._busy("quantos_door", label=("open " if is_open else "close ") + ("front door" if front else "side door"))
+        if front:
+            self.front_door_open = is_open
+        else:
+            self.side_door_open = is_open
+        return {"success": True, "outcomes": [None]}
+
+    def open_front_door(self):
+        return self._door(True, True)
+
+    def close_front_door(self):
+        return self._door(True, False)
+
+    def open_side_door(self):
+        return self._door(False, True)
+
+    def close_side_door(self):
+        return self._door(False, False)
+
+    def get_front_door_position(self):
+        return {"success": True, "outcomes": ["Open position" if self.front_door_open else "Close position"]}
+
+    def get_side_door_position(self):
+        return {"success": True, "outcomes": [self.side_door_open]}
+
+    def get_head_data(self):
+        return {"success": True, "outcomes": ["Mounted"]}
+
+    def tare(self):
+        self._busy("command", label="tare")
+        self.mass = 0.0
+
+    def set_target_mass(self, quantity):
+        self.target_mass = float(quantity)
+        return {"success": True, "outcomes": [None]}
+
+    def start_dosing(self):
+        self._busy("quantos_dosing", label=f"dosing {self.target_mass} mg")
+        self.mass += self.target_mass / 1000
+        return {"success": True, "outcomes": [None]}
+
+    def get_stable_weight(self):
+        self._busy("quantos_stable_weight", label="stable weight")
+        return {"success": True, "outcomes": [None, self.mass]}
+
+
+class SimFiltMachine(SimDevice):
+    """
+    Simulated filtration station.
+    """
+    def __init__(self, clock):
+        super().__init__(clock, "filt_machine", "FiltMachine")
+
+    def initialise_filtmachine(self):
+        self._busy("device_init", label="initialise")
+
+    def filter_setup(self, volume_filtered=0, wait_time=None):
+        self._busy("filtration", seconds=wait_time, label="filter setup")
+
+    def filter_vial(self, volume_filtered=0, wait_time=None, filtrate=True):
+        self._busy("filtration", seconds=wait_time, label="filter vial")
+
+    def clean(self, volume_filtered=0, wash_solvent=None):
+        self._busy("filter_cleaning", label="clean")
+
+
+class SimArduinoStation(SimDevice):
+    """
+    Simulated Arduino station; commands run in the background until wait_for_completion is called,
+    like the ArduinoStation drivers.
+    """
+    def __init__(self, clock, station):
+        super().__init__(clock, station)
+        self._busy("serial_open", label="open port")
+        self._done_at = 0.0
+
+    def send_command(self, key, label, wait=True):
+        self._done_at = self.clock.reserve(self.station, self.durations[key], label)
+        if wait:
+            self.wait_for_completion()
+
+    def wait_for_completion(self, fallback_delay=None):
+        self.clock.wait_until(self._done_at)
+
+
+class SimCapper(SimArduinoStation):
+    def __init__(self, clock):
+        super().__init__(clock, "capper")
+
+    def right(self, wait=False):
+        self.send_command("capper_spin", "right", wait)
+
+    def left(self, wait=False):
+        self.send_command("capper_spin", "left", wait)
+
+    def check_capping(self):
+        self._busy("camera", label="check capping")
+        return True
+
+
+class SimHolder(SimArduinoStation):
+    def __init__(self, clock):
+        super().__init__(clock, "holder")
+
+    def holding_position(self, wait=False):
+        self.send_command("holder_move", "holding position", wait)
+
+    def infusing_position(self, wait=False):
+        self.send_command("holder_move", "infusing position", wait)
+
+
+class SimLightBox(SimArduinoStation):
+    def __init__(self, clock):
+        super().__init__(clock, "lightbox")
+
+    def opening_lightbox(self, wait=True):
+        self.send_command("lightbox_door", "open", wait)
+
+    def closing_lightbox(self, wait=True):
+        self.send_command("lightbox_door", "close", wait)
+
+    def light_on(self):
+        self.send_command("lightbox_command", "light on")
+
+    def light_off(self):
+        self.send_command("lightbox_command", "light off")
+
+    def stirr_on(self):
+        self.send_command("lightbox_command", "stirring on")
+
+    def stirr_off(self):
+        self.send_command("lightbox_command", "stirring off")
+
+    def take_picture(self, dye_name="", solid_name="", path=""):
+        self._busy("camera", label="picture")
+
+
+class SimCamera(SimDevice):
+    def __init__(self, clock):
+        super().__init__(clock, "camera")
+
+    def init_camera(self):
+        return True
+
+    def start_streaming(self):
+        return
+
+    def stop_streaming(self):
+        return
+
+
+class SimRobotState():
+    def __init__(self, q, x):
+        self.q = list(q)
+        self.O_T_EE = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, x[0], x[1], x[2], 1.0]
+        self.dq = [0.0] * 7
+        self.ddq_d = [0.0] * 7
+        self.q_d = list(q)
+        self.dq_d = [0.0] * 7
+        self.tau_J = [0.0] * 7
+        self.tau_J_d = [0.0] * 7
+
+
+class SimPose():
+    def __init__(self, pose):
+        self.x, self.y, self.z = pose[0], pose[1], pose[2]
+
+
+class SimRobot():
+    """
+    Stands in for frankx.Robot inside SimFrankxHelpers.
+    """
+    def __init__(self, helpers):
+        self._helpers = helpers
+
+    def read_once(self):
+        return SimRobotState(self._helpers.q, self._helpers.x)
+
+    def current_pose(self):
+        return SimPose(self._helpers.x)
+
+    def recover_from_errors(self):
+        return True
+
+    def set_dynamic_rel(self, vel):
+        self._helpers.vel = vel
+
+
+class SimGripper():
+    """
+    Stands in for frankx.Gripper inside SimFrankxHelpers.
+    """
+    def __init__(self, helpers):
+        self._helpers = helpers
+        self._width = 0.08
+        self.gripper_speed = 0.02
+        self.gripper_force = 20.0
+
+    def move(self, width):
+        self._helpers._busy("gripper", label=f"gripper {width}")
+        self._width = width
+        return True
+
+    def clamp(self):
+        self._helpers._busy("gripper", label="clamp")
+        self._width = 0.02
+        return True
+
+    def open(self):
+        return self.move(0.08)
+
+    def width(self):
+        return self._width
+
+    def is_grasping(self):
+        return self._width == 0.02
+
+
+class SimFrankxHelpers(SimDevice):
+    """
+    Simulated FrankxHelpers. Motion durations grow with the joint displacement (joint motions) or the
+    travelled distance (cartesian motions) and shrink with the velocity of the motion profile.
+    """
+    HOME = [-0.052387438984816535, -0.5442788602176466, 0.03260193974825373, -1.4529518636099459, 0.024215675451689296, 0.756491325802273, 0.8650050505176187]
+
+    def __init__(self, clock, vel=0.01, profiles=MOTION_PROFILES):
+        super().__init__(clock, "arm", "Panda")
+        self.vel = vel
+        self.profiles = MotionProfiles(vel, profiles)
+        self.q = list(self.HOME)
+        self.x = [0.3, 0.0, 0.5, math.pi, 0.0, 0.0]
+        self.robot = SimRobot(self)
+        self.gripper = SimGripper(self)
+        self.gripper_state = GripperState(GRIPPER_WIDTH_TOLERANCE)
+        self.state_cache = RobotStateCache(self.robot.read_once, clock=clock) # no background reader in simulation
+        self.motions = MotionExecutor(stop_function=self.stop_motion, clock=clock)
+
+    def reset_robot(self):
+        return
+
+    def recover_from_errors(self):
+        return
+
+    def open_gripper(self):
+        self.open_gripper_set_width(0.04)
+
+    def open_gripper_set_width(self, width, force=False):
+        self.gripper_state.open_gripper(self.gripper, width, force)
+
+    def close_gripper(self, force=False):
+        self.gripper_state.close_gripper(self.gripper, force)
+
+    def guarded_move_x(self, position_x, force_limit, profile=None):
+        """
+        There is no contact in simulation, the guarded move always reaches its target.
+        """
+        self.move_robot_x(position_x, profile)
+        return False
+
+    def read_telemetry(self):
+        return self.robot.read_once()
+
+    def move_async(self, function, *args, callback=None, **kwargs):
+        return self.motions.submit(function, *args, callback=callback, **kwargs)
+
+    def stop_motion(self):
+        """
+        A simulated motion takes no wall time, cancellation takes effect at the next move.
+        """
+        return
+
+    def move_robot_j(self, position_j, profile=None):
+        self.motions.check_cancelled()
+        displacement = max(abs(a - b) for a, b in zip(position_j, self.q))
+        velocity = self.profiles.get(profile)["velocity"]
+        with self.state_cache.motion():
+            self._busy("joint_motion_base", seconds=self.durations["joint_motion_base"] + displacement / (self.durations["joint_speed"] * velocity),
+                       label="move_robot_j")
+            self.q = list(position_j)
+
+    def move_robot_x(self, position_x, profile=None):
+        self.motions.check_cancelled()
+        distance = math.dist(position_x[:3], self.x[:3])
+        velocity = self.profiles.get(profile)["velocity"]
+        with self.state_cache.motion():
+            self._busy("linear_motion_base", seconds=self.durations["linear_motion_base"] + distance / (self.durations["linear_speed"] * velocity),
+                       label="move_robot_x")
+            self.x = list(position_x)
+
+    def move_robot_path(self, positions_x, blend_radius=0.0, profile=None):
+        """
+        A blended path pays the fixed part of a motion once instead of once per waypoint.
+        """
+        self.motions.check_cancelled()
+        distance = 0.0
+        previous = self.x
+        for position_x in positions_x:
+            distance += math.dist(position_x[:3], previous[:3])
+            previous = position_x
+        base = self.durations["linear_motion_base"] * (1 if blend_radius > 0.0 else len(positions_x))
+        with self.state_cache.motion():
+            self._busy("linear_motion_base", seconds=base + distance / (self.durations["linear_speed"] * self.profiles.get(profile)["velocity"]),
+                       label="move_robot_path")
+            self.x = list(positions_x[-1])
+
+    def get_state(self, max_age=ROBOT_STATE_MAX_AGE):
+        return self.state_cache.get(max_age)
+
+    def get_cartesian_pose(self, max_age=ROBOT_STATE_MAX_AGE):
+        return list(self.get_state(max_age).O_T_EE[12:15])
+
+    def get_joint_pose(self, max_age=ROBOT_STATE_MAX_AGE):
+        return self.get_state(max_age).q
+
+    def get_state_j(self, max_age=ROBOT_STATE_MAX_AGE):
+        state = self.get_state(max_age)
+        return (state.q, state.dq, state.tau_J)
+
+    def get_desired_state_j(self, max_age=ROBOT_STATE_MAX_AGE):
+        state = self.get_state(max_age)
+        return (state.q_d, state.dq_d, state.ddq_d, state.tau_J_d)
@@ -0,0 +1,55 @@
+import logging
+
+
+def simulate_campaign(workflow, rih=None, min_gap=1.0, **rih_kwargs) -> dict:
+    """
+    Runs a full samples.csv campaign on a simulated RobInHood and reports the predicted makespan.
+
+    Every device is simulated on a virtual clock with the duration models in SIM_DURATIONS, so a campaign
+    of several hours runs in seconds and scheduling changes can be evaluated without occupying the hood.
+
+    e.g. def workflow(rih, sample_id, sample):
+             rih.quantos_cartridge_handling_logic(sample["solid"])
+             rih.vial_rack_to_quantos(vial_number=sample["vial"])
+             ...
+         report = simulate_campaign(workflow, inst_logger="sim_campaign")
+
+    :param workflow: callable(rih, sample_id, sample) run for every sample of rih.sample_dict, in order
+    :param rih: simulated RobInHood object, created with sim=True and rih_kwargs when None
+    :param min_gap: idle periods shorter than min_gap seconds are not reported
+    :return: dictionary with the makespan, the per-station busy time, utilisation and idle gaps
+    and the simulated start/end time of every sample
+    """
+    if rih is None:
+        from ..drivers.rob_in_hood import RobInHood
+        rih = RobInHood(sim=True, **rih_kwargs)
+    if not rih.sim:
+        raise ValueError("simulate_campaign needs a RobInHood object created with sim=True")
+
+    samples = {}
+    for sample_id, sample in rih.sample_dict.items():
+        start = rih.clock.now()
+        workflow(rih, sample_id, sample)
+        rih.clock.synchronise()
+        samples[sample_id] = (start, rih.clock.now())
+
+    report = rih.clock.report(min_gap=min_gap)
+    report["samples"] = samples
+    log_simulation_report(report)
+    return report
+
+
+def log_simulation_report(report: dict):
+    """
+    Logs the makespan, the per-station utilisation and the idle gaps of a simulation report.
+    """
+    logger = logging.getLogger("Campaign_Simulation")
+    makespan = report["makespan"]
+    hours, remainder = divmod(makespan, 3600)
+    logger.info(f"Predicted makespan: {int(hours)} h {int(remainder // 60)} m ({makespan:.0f} s)")
+    if report.get("samples"):
+        logger.info(f"Predicted throughput: {3600 * len(report['samples']) / makespan:.2f} samples per hour")
+    for station, entry in sorted(report["stations"].items()):
+        idle = sum(end - start for start, end in entry["idle_gaps"])
+        logger.info(f"{station}: busy {entry['busy']:.0f} s ({100 * entry['utilisation']:.1f} %), "
+                    f"{len(entry['idle_gaps'])} idle gaps totalling {idle:.0f} s")
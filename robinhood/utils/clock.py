@@ -0,0 +1,114 @@
+import time
+import threading
+
+
+class RealClock():
+    """
+    Wall clock used when running on the real system.
+    """
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def busy(self, station, seconds, label=""):
+        time.sleep(seconds)
+
+    def set_thread_time(self, t):
+        return
+
+    def wait_until(self, t):
+        time.sleep(max(0.0, t - self.now()))
+
+    def synchronise(self):
+        return
+
+
+class VirtualClock():
+    """
+    Virtual clock used by the simulation backend, sleeping advances the simulated time instantly.
+
+    Every thread has its own time cursor so operations running concurrently on the station scheduler overlap
+    in simulated time. Stations (arm, pumps, Quantos...) are busy for one operation at a time; an operation
+    requesting a busy station starts when the station is free. Busy intervals are recorded per station
+    to report the makespan, utilisation and idle gaps.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.horizon = 0.0
+        self.station_free = {}
+        self.intervals = {}
+
+    def now(self):
+        return getattr(self._local, "now", 0.0)
+
+    def set_thread_time(self, t):
+        """
+        Sets the simulated time of the current thread, e.g. when a worker thread starts a new operation.
+        """
+        self._local.now = t
+        with self._lock:
+            self.horizon = max(self.horizon, t)
+
+    def synchronise(self):
+        """
+        Moves the current thread to the latest simulated time, used after joining concurrent work.
+        """
+        self._local.now = self.horizon
+
+    def sleep(self, seconds):
+        self.set_thread_time(self.now() + max(0.0, seconds))
+
+    def reserve(self, station, seconds, label=""):
+        """
+        Occupies a station for the given time without blocking the calling thread, e.g. a capper spinning
+        while the arm moves. The station starts once both the calling thread and the station are free.
+
+        returns: the simulated time at which the station is free again
+        """
+        with self._lock:
+            start = max(self.now(), self.station_free.get(station, 0.0))
+            end = start + max(0.0, seconds)
+            self.station_free[station] = end
+            self.intervals.setdefault(station, []).append((start, end, label))
+            self.horizon = max(self.horizon, end)
+        return end
+
+    def wait_until(self, t):
+        """
+        Blocks the calling thread until the simulated time t.
+        """
+        self.set_thread_time(max(self.now(), t))
+
+    def busy(self, station, seconds, label=""):
+        """
+        Occupies a station for the given time and blocks the calling thread until the station is done.
+        """
+        self.wait_until(self.reserve(station, seconds, label))
+
+    def report(self, min_gap=1.0) -> dict:
+        """
+        returns: dictionary with
+            makespan = simulated time in seconds
+            stations = {station: {"busy", "utilisation", "idle_gaps": [(start, end)...]}}
+        """
+        makespan = self.horizon
+        stations = {}
+        for station, intervals in self.intervals.items():
+            busy = sum(end - start for start, end, _ in intervals)
+            gaps = []
+            previous_end = 0.0
+            for start, end, _ in sorted(intervals):
+                if start - previous_end >= min_gap:
+                    gaps.append((previous_end, start))
+                previous_end = max(previous_end, end)
+            if makespan - previous_end >= min_gap:
+                gaps.append((previous_end, makespan))
+            stations[station] = {
+                "busy": busy,
+                "utilisation": busy / makespan if makespan > 0 else 0.0,
+                "idle_gaps": gaps,
+            }
+        return {"makespan": makespan, "stations": stations}
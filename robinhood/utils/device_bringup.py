@@ -0,0 +1,85 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DeviceBringup():
+    """
+    Connects independent devices concurrently on a thread pool and keeps a readiness report.
+
+    Every device is registered with a callable that connects/initialises it and returns True when the
+    device is ready. Callables that raise are reported as not connected together with the error.
+
+    :param max_workers: maximum number of devices brought up at the same time
+    :type: int
+    """
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self._devices = {}
+        self.report = {}
+        self.total_latency = 0.0
+        self._logger = logging.getLogger("Device_Bringup")
+
+    def add_device(self, name, init_function, critical=False):
+        """
+        Registers a device for the bring-up phase.
+        :param name: device name used in the readiness report
+        :param init_function: callable without arguments, returns True when the device is ready
+        :param critical: when True the workflow cannot run without this device
+        """
+        self._devices[name] = {"init": init_function, "critical": critical}
+
+    def _bring_up(self, name):
+        start = time.monotonic()
+        error = None
+        try:
+            connected = bool(self._devices[name]["init"]())
+        except Exception as e:
+            connected = False
+            error = repr(e)
+        latency = time.monotonic() - start
+        return {
+            "connected": connected,
+            "latency": latency,
+            "critical": self._devices[name]["critical"],
+            "error": error,
+        }
+
+    def run(self) -> dict:
+        """
+        Brings up every registered device concurrently and waits for all of them.
+
+        returns: readiness report {device: {"connected", "latency", "critical", "error"}}, the overall latency
+        in seconds, bounded by the slowest device, is kept in self.total_latency.
+        """
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bringup") as pool:
+            futures = {name: pool.submit(self._bring_up, name) for name in self._devices}
+            self.report = {name: future.result() for name, future in futures.items()}
+        self.total_latency = time.monotonic() - start
+        return self.report
+
+    def connected(self, name) -> bool:
+        """
+        Returns True when the device was brought up successfully.
+        """
+        return name in self.report and self.report[name]["connected"]
+
+    def failed_critical_devices(self) -> list:
+        """
+        Returns the names of the critical devices that failed to connect.
+        """
+        return [name for name, entry in self.report.items() if entry["critical"] and not entry["connected"]]
+
+    def log_report(self):
+        """
+        Logs the per-device readiness and latency.
+        """
+        for name, entry in self.report.items():
+            if entry["connected"]:
+                self._logger.info(f"{name} ready in {entry['latency']:.1f} s")
+            elif entry["error"] is not None:
+                self._logger.error(f"{name} not available after {entry['latency']:.1f} s: {entry['error']}")
+            else:
+                self._logger.error(f"{name} not available after {entry['latency']:.1f} s")
+        self._logger.info(f"Device bring-up finished in {self.total_latency:.1f} s")
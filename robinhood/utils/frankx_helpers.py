@@ -1,90 +1,208 @@
 import numpy as np
-from frankx import Affine, LinearRelativeMotion, Robot, JointMotion, Kinematics, ImpedanceMotion, Gripper, LinearMotion
+from frankx import Affine, LinearRelativeMotion, Robot, JointMotion, Kinematics, ImpedanceMotion, Gripper, LinearMotion, WaypointMotion, Waypoint, MotionData, NullSpaceHandling, Reaction, Measure
 from time import sleep
+from .robot_state_cache import RobotStateCache
+from .motion_profiles import MotionProfiles
+from .motion_executor import MotionExecutor
+from .gripper_state import GripperState
+from ..config.configuration import ROBOT_STATE_RATE, ROBOT_STATE_MAX_AGE, MOTION_PROFILES, GRIPPER_WIDTH_TOLERANCE
 
 class FrankxHelpers():
-    def __init__(self, host, vel=0.01):
+    def __init__(self, host, vel=0.01, profiles=MOTION_PROFILES):
         self.robot = Robot(host)
         self.gripper = Gripper(host)
         self.gripper.gripper_speed = 0.02 # [m/s]
         self.gripper.gripper_force = 20.0 # [N]
+        self.gripper_state = GripperState(GRIPPER_WIDTH_TOLERANCE) # skips openings and clamps that would not change the gripper
         self.robot.recover_from_errors()
         # self.gripper.recover_from_errors()
-        # Set velocity, acceleration and jerk to 10% of the maximum
-        self.robot.set_dynamic_rel(vel) 
+        # Motions without a profile run with velocity, acceleration and jerk set to vel of the maximum.
+        # The robot dynamics are set to the fastest profile, every motion scales them down with its MotionData
+        self.profiles = MotionProfiles(vel, profiles)
+        self.dynamic_rel = self.profiles.max_rel()
+        self.robot.set_dynamic_rel(self.dynamic_rel) 
         self.robot.current_pose()
+        # Background reader keeping the latest robot state, state queries use it instead of a blocking read_once
+        self.state_cache = RobotStateCache(self.robot.read_once, rate=ROBOT_STATE_RATE)
+        self.state_cache.start()
+        # Motion thread of move_async, the calling thread can command other devices while the arm moves
+        self.motions = MotionExecutor(stop_function=self.stop_motion, recover_function=self.recover_from_errors)
 
 
     def reset_robot(self):
-        self.robot.read_once()
+        self.state_cache.refresh()
         return
     
     def open_gripper(self):
-        self.gripper.move(0.04)
+        self.open_gripper_set_width(0.04)
         #self.gripper.open()
         return
 
-    def open_gripper_set_width(self, width):
+    def open_gripper_set_width(self, width, force=False):
+        """
+        Opens the gripper to width [m], nothing is done when the gripper is already open at that width (see GripperState).
+        force: moves the gripper even when it is already at width
+        """
         # gripper.move(50.0); // [mm]
         #self.gripper.recover_from_errors()
-        self.gripper.move(width)
+        self.gripper_state.open_gripper(self.gripper, width, force)
         return
-    def close_gripper(self):
-        self.gripper.clamp()
+
+    def close_gripper(self, force=False):
+        """
+        Clamps the gripper, nothing is done when it already holds the object it clamped (see GripperState).
+        force: clamps even when the gripper already holds an object
+        """
+        self.gripper_state.close_gripper(self.gripper, force)
         return
 
 
     def recover_from_errors(self):
-        self.robot.recover_from_errors()
+        with self.state_cache.motion():
+            self.robot.recover_from_errors()
         return
 
 
 
-    def move_robot_j(self, position_j):
+    def move_async(self, function, *args, callback=None, **kwargs):
+        """
+        Runs a motion function on the motion thread and returns a MotionFuture straight away, e.g.
+        motion = robot.move_async(robot.move_robot_j, position_j, profile="transit"). The function can be any
+        sequence of moves. Call motion.result() before the next blocking move, motion.cancel() stops it.
+        callback: function called with the MotionFuture when the motion is finished, failed or cancelled
+        """
+        return self.motions.submit(function, *args, callback=callback, **kwargs)
 
+    def stop_motion(self):
         """
-        Move robot in the joint space (q1 ... q7) e.g. position_j = JointMotion([-0.06801003708232913, -0.7946914721790113, -0.025459439155041123, -3.0178200251866536, 0.008655966668493218, 2.2786499461597867, 0.7173295130719647])
+        Stops the running motion, the robot has to recover from errors before moving again.
+        """
+        self.robot.stop()
+        return
 
+    def motion_data(self, profile=None):
         """
-        self.robot.move(JointMotion(position_j))
+        MotionData with the dynamics of a motion profile (name from MOTION_PROFILES, dictionary or None for the default profile).
+        frankx multiplies the robot dynamics with the motion data, so the profile is divided by the robot dynamics.
+        """
+        dynamics = self.profiles.get(profile)
+        data = MotionData()
+        data.velocity_rel = dynamics["velocity"] / self.dynamic_rel
+        data.acceleration_rel = dynamics["acceleration"] / self.dynamic_rel
+        data.jerk_rel = dynamics["jerk"] / self.dynamic_rel
+        return data
+
+    def move_robot_j(self, position_j, profile=None):
+
+        """
+        Move robot in the joint space (q1 ... q7) e.g. position_j = JointMotion([-0.06801003708232913, -0.7946914721790113, -0.025459439155041123, -3.0178200251866536, 0.008655966668493218, 2.2786499461597867, 0.7173295130719647])
+        profile: motion profile of the move e.g. "transit", None for the default profile
+        """
+        self.motions.check_cancelled()
+        with self.state_cache.motion():
+            self.robot.move(JointMotion(position_j), self.motion_data(profile))
         return
 
-    def move_robot_x(self, position_x):
+    def move_robot_x(self, position_x, profile=None):
         """
         Move robot in the cartesian space (x, y, z, a, b, c) e.g. position_x = LinearMotion(Affine(0.2, -0.4, 0.3, math.pi / 2, 0.0, 0.0))
+        profile: motion profile of the move e.g. "approach", None for the default profile
         """
         position_x=LinearMotion(Affine(position_x[0], position_x[1], position_x[2], position_x[3], position_x[4], position_x[5]))
 
-        self.robot.move(position_x)
+        self.motions.check_cancelled()
+        with self.state_cache.motion():
+            self.robot.move(position_x, self.motion_data(profile))
+        return
+
+    def move_robot_path(self, positions_x, blend_radius=0.0, profile=None):
+        """
+        Move robot through several poses in the cartesian space as a single trajectory e.g. positions_x = [[x, y, z, a, b, c], ...]
+        The intermediate poses are blended within blend_radius [m] instead of stopping at each of them, the robot always stops exactly at the last pose.
+        profile: motion profile of the whole path, None for the default profile
+        """
+        waypoints = []
+        for i, position_x in enumerate(positions_x):
+            waypoint = Waypoint(Affine(position_x[0], position_x[1], position_x[2], position_x[3], position_x[4], position_x[5]))
+            if blend_radius > 0.0 and i < len(positions_x) - 1:
+                try:
+                    waypoint.blend_max_distance = blend_radius
+                except AttributeError:
+                    pass # frankx versions without blending stop at every waypoint
+            waypoints.append(waypoint)
+
+        self.motions.check_cancelled()
+        with self.state_cache.motion():
+            self.robot.move(WaypointMotion(waypoints), self.motion_data(profile))
         return
 
-    def get_cartesian_pose(self):
+    def guarded_move_x(self, position_x, force_limit, profile=None):
         """
-        Get robot pose in the cartesian space (x, y, z, a, b, c)
+        Linear move to position_x (x, y, z, a, b, c) that stops as soon as the external force is above force_limit [N].
+        returns: True when the force stopped the motion before position_x
         """
-        current_pose = self.robot.current_pose()
-        cartesian_pose = np.array([current_pose.x, current_pose.y, current_pose.z])
+        position_x=LinearMotion(Affine(position_x[0], position_x[1], position_x[2], position_x[3], position_x[4], position_x[5]))
+        data = self.add_constraints(self.motion_data(profile), force_limit=force_limit)
+
+        self.motions.check_cancelled()
+        with self.state_cache.motion():
+            self.robot.move(position_x, data)
+        return self.reaction_fired(data)
+
+    @staticmethod
+    def reaction_fired(data):
+        """
+        True when a stop reaction of data ended the last motion run with it. frankx keeps copies of the reactions
+        given to with_reaction, so the result is read from the MotionData and not from the Reaction objects.
+        """
+        if getattr(data, "did_break", False):
+            return True
+        return any(reaction.has_fired for reaction in data.reactions)
+
+    def get_state(self, max_age=ROBOT_STATE_MAX_AGE):
+        """
+        Get the robot state not older than max_age [s], from the state cache when it is fresh enough
+        """
+        return self.state_cache.get(max_age)
+
+    def read_telemetry(self):
+        """
+        Robot state for the telemetry recorder, also during motions: the state of the running control loop
+        (frankx get_state without read_once), the cached state when the frankx version does not provide it.
+        """
+        try:
+            return self.robot.get_state(read_once=False)
+        except (AttributeError, TypeError):
+            snapshot = self.state_cache.snapshot()
+            return None if snapshot is None else snapshot[1]
+
+    def get_cartesian_pose(self, max_age=ROBOT_STATE_MAX_AGE):
+        """
+        Get robot position in the cartesian space (x, y, z) from the end effector transformation O_T_EE (column major)
+        """
+        state = self.get_state(max_age)
+        cartesian_pose = np.array(state.O_T_EE[12:15])
         return cartesian_pose
 
-    def get_joint_pose(self):
+    def get_joint_pose(self, max_age=ROBOT_STATE_MAX_AGE):
         """
         Get robot pose in the joint space (q1 .. q7)
         """
-        state = self.robot.read_once()
+        state = self.get_state(max_age)
         return (state.q)
     
-    def get_state_j(self):
+    def get_state_j(self, max_age=ROBOT_STATE_MAX_AGE):
         """
         Get robot state in the joint space (q1 .. q7, dq1 .. dq7, tau1 .. tau7)
         """
-        state = self.robot.read_once()
+        state = self.get_state(max_age)
         return (state.q, state.dq, state.tau_J)     
 
-    def get_desired_state_j(self):
+    def get_desired_state_j(self, max_age=ROBOT_STATE_MAX_AGE):
         """
         Get desired robot state in the joint space (q1 .. q7, dq1 .. dq7, ddq1 .. ddq7, tau1 .. tau7)
         """
-        state = self.robot.read_once()
+        state = self.get_state(max_age)
         return (state.q_d, state.dq_d, state.ddq_d, state.tau_J_d)       
 
     
@@ -105,11 +223,12 @@ class FrankxHelpers():
 
         # Inverse kinematic with target, initial joint angles, and Null space configuration
         q_new = Kinematics.inverse(x_current.vector(), q_current, null_space)
+        return q_new
 
     def impedance_controller(self, target_goal):
 
         # Define and move forwards
-        self.robot.move(target_goal)
+        self.robot.move(target_goal, self.motion_data())
 
         # Define and move forwards
         impedance_motion = ImpedanceMotion(2000.0, 200.0)
@@ -141,19 +260,21 @@ class FrankxHelpers():
         # initial_target = impedance_motion.target
 
 
-    def add_constraints(self):
-        # Stop motion if the overall force is greater than 30N
-        d1 = MotionData().with_reaction(Reaction(Measure.ForceXYZNorm() > 30.0))
-
-        # Apply reaction motion if the force in negative z-direction is greater than 10N
-        d2 = MotionData().with_reaction(Reaction(Measure.ForceZ() < -10.0), reaction_motion)
-
-        # Stop motion if its duration is above 30s
-        d3 = MotionData().with_reaction(Reaction(Measure.Time() >= 30.0))
-
-        # e.g. robot.move(m2, d2)
-
-        # # Check if the reaction was triggered
-        # if d2.has_fired:
-        #     robot.recover_from_errors()
-        #     print('Force exceeded 10N!')
+    def add_constraints(self, data, force_limit=None, time_limit=None):
+        """
+        Adds stop reactions to a MotionData: the motion stops when the overall external force is greater than
+        force_limit [N] or when it lasts longer than time_limit [s].
+        returns: data, self.reaction_fired(data) is True after a reaction stopped the motion (frankx copies the
+        reactions into the MotionData, the Reaction objects created here are never updated)
+        e.g. data = self.add_constraints(self.motion_data("grasp"), force_limit=10.0)
+             self.robot.move(motion, data)
+             contact = self.reaction_fired(data)
+        """
+        reactions = []
+        if force_limit is not None:
+            reactions.append(Reaction(Measure.ForceXYZNorm() > force_limit))
+        if time_limit is not None:
+            reactions.append(Reaction(Measure.Time() >= time_limit))
+        for reaction in reactions:
+            data.with_reaction(reaction)
+        return data
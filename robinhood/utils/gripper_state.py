@@ -0,0 +1,91 @@
+import logging
+
+
+class GripperState():
+    """
+    Commanded and measured state of the gripper, used to skip gripper actuations that would not change anything.
+
+    A gripper move is a blocking command of several seconds at the gripper speed, the transfer methods open the
+    gripper before every approach whether it is already open or not. An opening is skipped when the last command
+    was an opening to the same width and the measured width still matches it, a clamp is skipped when the last
+    command was a clamp and the gripper still measures a grasp. Anything unknown (start-up, a failed command, a
+    measurement that disagrees with the command) makes the next command run.
+
+    :param tolerance: [m] largest difference between two widths considered equal
+    """
+    def __init__(self, tolerance=0.001):
+        self.tolerance = tolerance
+        self.commanded_width = None # [m] width of the last opening, None when unknown or clamped
+        self.grasped = None # True after a successful clamp, False after an opening, None when unknown
+        self.skipped = 0
+        self._logger = logging.getLogger("Gripper_State")
+
+    def needs_move(self, width, measured_width=None) -> bool:
+        """
+        Returns False when the gripper is already open at width, True when the measured width is unknown (None).
+        """
+        if self.grasped is not False or self.commanded_width is None or abs(self.commanded_width - width) > self.tolerance:
+            return True
+        if measured_width is None:
+            return True
+        if abs(measured_width - width) > self.tolerance:
+            self._logger.debug(f"Gripper measured at {measured_width:.4f} m instead of {width:.4f} m")
+            return True
+        self.skipped += 1
+        return False
+
+    def needs_clamp(self, measured_grasping=None) -> bool:
+        """
+        Returns False when the gripper already holds the object it clamped, True when the grasp is unknown (None).
+        """
+        if self.grasped is not True or measured_grasping is not True:
+            return True
+        self.skipped += 1
+        return False
+
+    def open_gripper(self, gripper, width, force=False) -> bool:
+        """
+        Opens a gripper (frankx Gripper or SimGripper) to width [m], nothing is done when it is already open at that width.
+        force: moves the gripper even when it is already at width
+        returns: True when the gripper was moved
+        """
+        if not force and not self.needs_move(width, self._measure(gripper.width)):
+            return False
+        self.moved(width, gripper.move(width) is not False)
+        return True
+
+    def close_gripper(self, gripper, force=False) -> bool:
+        """
+        Clamps a gripper, nothing is done when it already holds the object it clamped.
+        force: clamps even when the gripper already holds an object
+        returns: True when the gripper was clamped
+        """
+        if not force and not self.needs_clamp(self._measure(gripper.is_grasping)):
+            return False
+        self.clamped(gripper.clamp() is not False)
+        return True
+
+    @staticmethod
+    def _measure(function):
+        """
+        Returns the gripper measurement of function, None when the gripper cannot be read.
+        """
+        try:
+            return function()
+        except Exception:
+            return None
+
+    def moved(self, width, success=True):
+        self.commanded_width = width if success else None
+        self.grasped = False if success else None
+
+    def clamped(self, success=True):
+        self.commanded_width = None
+        self.grasped = True if success else None
+
+    def reset(self):
+        self.commanded_width = None
+        self.grasped = None
+
+    def as_dict(self) -> dict:
+        return {"commanded_width": self.commanded_width, "grasped": self.grasped, "skipped": self.skipped}
@@ -57,7 +57,7 @@ class RobInHoodInspector():
         if not self.sim:
             try:
                 self.robot = FrankxHelpers(self.ip,self.vel)
-                self.state = self.robot.robot.read_once()
+                self.state = self.robot.get_state() #from the state cache, its reader thread owns read_once
                 print(f'Panda robot connected to {self.ip}')
                 return True
             except:
@@ -0,0 +1,183 @@
+import math
+import logging
+from frankx import Affine, Kinematics, NullSpaceHandling
+
+
+def frankx_forward(q) -> list:
+    """
+    Forward kinematics of the Panda with frankx, (q1 .. q7) -> [x, y, z, a, b, c]
+    """
+    return list(Affine(Kinematics.forward(list(q))).vector())
+
+
+def frankx_inverse(pose, seed) -> list:
+    """
+    Inverse kinematics of the Panda with frankx, [x, y, z, a, b, c] -> (q1 .. q7) starting from the seed configuration.
+    The redundant degree of freedom keeps q3 of the seed, so the solution stays in the taught arm configuration.
+    """
+    return list(Kinematics.inverse(Affine(*pose).vector(), list(seed), NullSpaceHandling(2, seed[2])))
+
+
+def rotation_matrix(a, b, c) -> list:
+    """
+    Rotation matrix of the euler angles of a frankx Affine (rotation a about z, then b about y, then c about x).
+    """
+    ca, sa, cb, sb, cc, sc = math.cos(a), math.sin(a), math.cos(b), math.sin(b), math.cos(c), math.sin(c)
+    return [[ca * cb, ca * sb * sc - sa * cc, ca * sb * cc + sa * sc],
+            [sa * cb, sa * sb * sc + ca * cc, sa * sb * cc - ca * sc],
+            [-sb, cb * sc, cb * cc]]
+
+
+def rotation_error(pose, target) -> float:
+    """
+    [rad] angle of the rotation between the orientations of two poses [x, y, z, a, b, c], independent of the
+    euler angle representation (e.g. a = pi and a = -pi are the same orientation).
+    """
+    first, second = rotation_matrix(*pose[3:6]), rotation_matrix(*target[3:6])
+    trace = sum(first[row][column] * second[row][column] for row in range(3) for column in range(3))
+    return math.acos(max(-1.0, min(1.0, (trace - 1.0) / 2.0)))
+
+
+class KinematicsService():
+    """
+    Forward and inverse kinematics of the taught and generated waypoints, with memoised results.
+
+    validate() runs the forward kinematics of every named joint pose of a WaypointStore (joint limits, position of the
+    end effector) and solves the inverse kinematics of every cartesian waypoint (slot poses of the rack and IKA grids,
+    named cartesian poses). A cartesian waypoint is solved from the joint pose whose end effector is the closest to it,
+    a solution is accepted when it is inside the joint limits and its forward kinematics reaches the target position
+    within tolerance and its orientation within angle_tolerance. Results are cached by pose (and seed for the inverse
+    kinematics), so a waypoint is solved once per run. Poses that are not in the store (e.g. the Quantos poses and
+    the guarded descent poses) are solved by solve() on their first move and cached the same way.
+
+    :param joint_limits: (q_min, q_max) lists of the joint limits [rad]
+    :param forward_function: function q -> [x, y, z, a, b, c], frankx by default
+    :param inverse_function: function (pose, seed) -> q, frankx by default
+    :param tolerance: [m] largest distance between the target and the forward kinematics of an IK solution
+    :param angle_tolerance: [rad] largest rotation between the target and the forward kinematics of an IK solution
+    :param precision: decimals of the poses used as cache keys
+    """
+    def __init__(self, joint_limits, forward_function=frankx_forward, inverse_function=frankx_inverse, tolerance=0.001,
+                 angle_tolerance=0.01, precision=6):
+        self.q_min, self.q_max = joint_limits
+        self._forward = forward_function
+        self._inverse = inverse_function
+        self.tolerance = tolerance
+        self.angle_tolerance = angle_tolerance
+        self.precision = precision
+        self._fk_cache = {}
+        self._ik_cache = {}
+        self.seeds = [] # taught joint poses inside the joint limits, set by set_seeds
+        self.solutions = {} # (station, slot, phase) or pose name: joint positions, filled by validate
+        self.fk_evaluations = 0
+        self.ik_solves = 0
+        self._logger = logging.getLogger("Kinematics")
+
+    def _key(self, values, precision=None) -> tuple:
+        return tuple(round(value, self.precision if precision is None else precision) for value in values)
+
+    def forward(self, q) -> list:
+        """
+        Returns the end effector pose [x, y, z, a, b, c] of joint positions q.
+        """
+        key = self._key(q)
+        if key not in self._fk_cache:
+            self._fk_cache[key] = self._forward(q)
+            self.fk_evaluations += 1
+        return self._fk_cache[key]
+
+    def forward_batch(self, qs) -> list:
+        """
+        Returns the end effector poses of a list of joint positions.
+        """
+        return [self.forward(q) for q in qs]
+
+    def in_limits(self, q) -> bool:
+        return all(low <= value <= high for value, low, high in zip(q, self.q_min, self.q_max))
+
+    def inverse(self, pose, seed) -> list:
+        """
+        Returns the joint positions reaching a cartesian pose from the seed configuration, None when there is no valid solution.
+        """
+        key = (self._key(pose), self._key(seed, 3))
+        if key not in self._ik_cache:
+            self.ik_solves += 1
+            try:
+                q = self._inverse(pose, seed)
+            except Exception as e:
+                self._logger.debug(f"IK of {pose} failed: {e!r}")
+                q = None
+            if q is not None and not (self.in_limits(q) and self.reaches(q, pose)):
+                q = None
+            self._ik_cache[key] = q
+        return self._ik_cache[key]
+
+    def reaches(self, q, pose) -> bool:
+        """
+        True when the end effector of joint positions q is at the position and orientation of a cartesian pose.
+        """
+        reached = self.forward(q)
+        return math.dist(reached[:3], pose[:3]) <= self.tolerance and rotation_error(reached, pose) <= self.angle_tolerance
+
+    def nearest_seed(self, pose, seeds) -> list:
+        """
+        Returns the joint positions of seeds whose end effector is the closest to a cartesian pose.
+        """
+        return min(seeds, key=lambda q: math.dist(self.forward(q)[:3], pose[:3]))
+
+    def set_seeds(self, store):
+        """
+        Uses the joint poses of a WaypointStore inside the joint limits as the IK seeds of solve().
+        """
+        self.seeds = [q for q in store.joint_poses.values() if self.in_limits(q)]
+
+    def solve(self, pose) -> list:
+        """
+        Returns the joint positions reaching a cartesian pose from the nearest seed, None when there is no valid
+        solution. The result is memoised, a pose is solved once per run.
+        """
+        if not self.seeds:
+            raise ValueError("No IK seeds, call set_seeds or validate first")
+        return self.inverse(pose, self.nearest_seed(pose, self.seeds))
+
+    def validate(self, store) -> dict:
+        """
+        Checks the waypoints of a WaypointStore and caches the IK solutions of its cartesian waypoints in self.solutions.
+        returns: {"joint_limits": names of the joint poses out of the limits, "unreachable": cartesian waypoints without
+        an IK solution (cached as None), "fk": number of joint poses checked, "ik": number of cartesian waypoints solved}
+        """
+        report = {"joint_limits": [], "unreachable": [], "fk": 0, "ik": 0}
+        names = list(store.joint_poses)
+        self.forward_batch([store.joint_poses[name] for name in names])
+        report["fk"] = len(names)
+        report["joint_limits"] = [name for name in names if not self.in_limits(store.joint_poses[name])]
+        self.set_seeds(store)
+
+        targets = {name: pose for name, pose in store.cartesian_poses.items()}
+        targets.update({key: waypoint.pose for key, waypoint in store.index.items() if waypoint.kind == "x"})
+        for key, pose in targets.items():
+            self.solutions[key] = self.solve(pose)
+            if self.solutions[key] is None:
+                report["unreachable"].append(key)
+            report["ik"] += 1
+
+        if report["joint_limits"]:
+            self._logger.warning(f"Joint poses outside the joint limits: {report['joint_limits']}")
+        if report["unreachable"]:
+            self._logger.warning(f"{len(report['unreachable'])} cartesian waypoints without IK solution, e.g. {report['unreachable'][:5]}")
+        self._logger.info(f"Kinematics validated: {report['fk']} joint poses, {report['ik']} cartesian waypoints, "
+                          f"{len(report['joint_limits']) + len(report['unreachable'])} problems")
+        return report
+
+    def joint_pose(self, station, slot, phase, store=None) -> list:
+        """
+        Returns the cached IK solution of a station waypoint (see WaypointStore.get), solving it when it is not cached.
+        """
+        key = (station, slot, phase)
+        if key not in self.solutions:
+            if store is None:
+                raise KeyError(f"No IK solution cached for {key}")
+            if not self.seeds:
+                self.set_seeds(store)
+            self.solutions[key] = self.solve(store.get(station, slot, phase).pose)
+        return self.solutions[key]
@@ -0,0 +1,81 @@
+import logging
+
+
+class DispenseLineModel():
+    """
+    Contamination model of a dispense line, used to prime a line with the smallest flush that leaves it clean enough.
+
+    The state of a line is the fraction of every solvent in it, e.g. {"Ethanol": 0.99, "Water(DI)": 0.01}, an empty
+    dictionary when it is unknown. A prime empties the line into the waste, runs wash cycles (solvent into the line,
+    line to the waste) and fills the line with the new solvent. Each of these steps leaves a fraction of the previous
+    content in the line (flush_residuals), so a prime with n wash cycles leaves empty * wash ** n * prime of it.
+
+    How much of a residue is acceptable in the next solvent comes from the compatibility matrix: a pair of solvents
+    has a compatibility class, e.g. "compatible" (same solvent, different grade), "miscible" or, for the pairs not
+    listed, "incompatible", and every class has a tolerated residual fraction. The prime of a new solvent uses the
+    fewest wash cycles keeping every residue within its tolerance. A line already holding the solvent with every
+    residue within tolerance is not primed, an unknown line gets the full wash.
+
+    :param compatibility: {(solvent, solvent): compatibility class}, pairs are symmetric
+    :param tolerances: {compatibility class: largest residual fraction of a solvent in the next one}
+    :param flush_residuals: {"empty", "wash", "prime": fraction of the previous content left by the step}
+    :param max_cycles: wash cycles of the full wash, used for unknown lines and when no fewer cycles are enough
+    :param min_fraction: residual fractions below it are dropped from the line state
+    """
+    def __init__(self, compatibility, tolerances, flush_residuals, max_cycles=2, min_fraction=1e-9):
+        self.compatibility = {}
+        for (first, second), level in compatibility.items():
+            self.compatibility[(first, second)] = level
+            self.compatibility.setdefault((second, first), level)
+        self.tolerances = tolerances
+        self.flush_residuals = flush_residuals
+        self.max_cycles = max_cycles
+        self.min_fraction = min_fraction
+        self._logger = logging.getLogger("Dispense_Line")
+
+    def level(self, residue, solvent) -> str:
+        if residue == solvent:
+            return "same"
+        return self.compatibility.get((residue, solvent), "incompatible")
+
+    def tolerance(self, residue, solvent) -> float:
+        return self.tolerances.get(self.level(residue, solvent), self.tolerances["incompatible"])
+
+    def residual(self, cycles) -> float:
+        """
+        Fraction of the previous content of the line left by a prime with cycles wash cycles.
+        """
+        return self.flush_residuals["empty"] * self.flush_residuals["wash"] ** cycles * self.flush_residuals["prime"]
+
+    def clean(self, state, solvent) -> bool:
+        """
+        True when every residue of the line is tolerated in solvent.
+        """
+        return all(fraction <= self.tolerance(residue, solvent) * (1.0 + 1e-9) for residue, fraction in state.items() if residue != solvent)
+
+    def wash_cycles(self, state, solvent):
+        """
+        Returns the fewest wash cycles of a prime leaving the line clean for solvent,
+        None when the line already holds solvent and is clean enough.
+        """
+        if state and state.get(solvent, 0.0) > 0.5 and self.clean(state, solvent):
+            return None
+        if not state:
+            return self.max_cycles
+        for cycles in range(self.max_cycles + 1):
+            if self.clean(self.primed(state, solvent, cycles), solvent):
+                return cycles
+        return self.max_cycles
+
+    def primed(self, state, solvent, cycles) -> dict:
+        """
+        Returns the line state after a prime with solvent and cycles wash cycles.
+        """
+        residual = self.residual(cycles)
+        new_state = {residue: fraction * residual for residue, fraction in state.items()
+                     if residue != solvent and fraction * residual >= self.min_fraction}
+        new_state[solvent] = 1.0 - sum(new_state.values())
+        return new_state
+
+    def describe(self, state) -> str:
+        return ", ".join(f"{solvent} {fraction:.2g}" for solvent, fraction in sorted(state.items(), key=lambda item: -item[1])) or "unknown"
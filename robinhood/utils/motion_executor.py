@@ -0,0 +1,199 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .clock import RealClock
+
+
+class MotionCancelled(Exception):
+    """
+    Raised by a motion that was cancelled while it was running.
+    """
+
+
+class MotionFuture():
+    """
+    Handle of a motion running on the motion thread, see MotionExecutor.submit.
+
+    :param executor: MotionExecutor running the motion
+    :param description: name of the motion used in the logs
+    """
+    def __init__(self, executor, description):
+        self.description = description
+        self.cancel_requested = threading.Event()
+        self.end_time = None
+        self.reported = False # True once the caller got the outcome with result() or exception()
+        self._executor = executor
+        self._future = None
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def running(self) -> bool:
+        return self._future.running()
+
+    def cancelled(self) -> bool:
+        return self.cancel_requested.is_set()
+
+    def result(self, timeout=None):
+        """
+        Blocks until the motion is finished and returns the result of the motion function.
+        Raises the exception of the motion, MotionCancelled or concurrent.futures.CancelledError when it was cancelled.
+        """
+        try:
+            result = self._future.result(timeout)
+        finally:
+            self.reported = self._future.done()
+        self._executor.clock.wait_until(self.end_time)
+        return result
+
+    def exception(self, timeout=None):
+        exception = self._future.exception(timeout)
+        self.reported = True
+        return exception
+
+    def add_done_callback(self, function):
+        """
+        Calls function(motion_future) when the motion is finished, failed or cancelled.
+        """
+        self._future.add_done_callback(lambda _: function(self))
+
+    def cancel(self) -> bool:
+        """
+        Cancels the motion and every motion queued after it. A running motion is stopped.
+        Returns False when the motion was already finished.
+        """
+        return self._executor.cancel(self)
+
+    def __repr__(self):
+        state = "cancelled" if self.cancelled() else "done" if self.done() else "running" if self.running() else "queued"
+        return f"MotionFuture({self.description}, {state})"
+
+
+class MotionExecutor():
+    """
+    Runs robot motions on a single background thread so that the calling thread can command other devices
+    (capper, lightbox, holder, Quantos doors) while the arm is travelling.
+
+    Motions run one after the other in the order they were submitted. A queued motion starts from the pose
+    where the previous one ended, so when a motion fails or is cancelled the motions queued after it are
+    cancelled too. The move functions call check_cancelled() before every move, a motion made of several
+    moves (e.g. a transfer between stations) stops at the next move once it is cancelled.
+
+    :param stop_function: function stopping the running robot motion, called when a running motion is cancelled
+    :param recover_function: function called on the motion thread after a running motion was stopped
+    :param clock: clock of the motions, the simulated time of the motion thread follows the submitting thread
+    :param name: name of the worker thread, the executor also serialises the commands of other devices (e.g. a pump)
+    :param label: what the executor runs, used in the logs (e.g. "pump command")
+    """
+    def __init__(self, stop_function=None, recover_function=None, clock=None, name="robot_motion", label="motion"):
+        self.clock = clock if clock is not None else RealClock()
+        self._stop = stop_function
+        self._recover = recover_function
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._queue = []
+        self._failed = [] # (motion, exception) of the failed motions, see wait
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.label = label
+        self._logger = logging.getLogger("Motion_Executor")
+
+    def submit(self, function, *args, description=None, callback=None, **kwargs) -> MotionFuture:
+        """
+        Queues function(*args, **kwargs) on the motion thread and returns straight away.
+        :param description: name of the motion in the logs, the function name by default
+        :param callback: function called with the MotionFuture when the motion is finished, failed or cancelled
+        """
+        motion = MotionFuture(self, description or getattr(function, "__name__", "motion"))
+        with self._lock:
+            self._queue.append(motion)
+            motion._future = self._pool.submit(self._run, motion, self.clock.now(), function, args, kwargs)
+        motion._future.add_done_callback(lambda _: self._finished(motion))
+        if callback is not None:
+            motion.add_done_callback(callback)
+        return motion
+
+    def _run(self, motion, submit_time, function, args, kwargs):
+        self.clock.set_thread_time(max(self.clock.now(), submit_time))
+        self._local.current = motion
+        try:
+            self.check_cancelled()
+            result = function(*args, **kwargs)
+            self.check_cancelled()
+            return result
+        except MotionCancelled:
+            raise
+        except BaseException as e:
+            if motion.cancel_requested.is_set():
+                raise MotionCancelled(f"{motion.description} cancelled") from e
+            self._logger.error(f"{self.label.capitalize()} {motion.description} failed: {e!r}, cancelling the {self.label}s queued after it")
+            with self._lock:
+                self._failed.append((motion, e))
+            self._cancel_from(motion, include=False)
+            raise
+        finally:
+            self._local.current = None
+            motion.end_time = self.clock.now()
+            if motion.cancel_requested.is_set() and self._recover is not None:
+                self._recover()
+
+    def _finished(self, motion):
+        with self._lock:
+            if motion in self._queue:
+                self._queue.remove(motion)
+
+    def _cancel_from(self, motion, include=True) -> list:
+        with self._lock:
+            if motion not in self._queue:
+                return []
+            index = self._queue.index(motion) + (0 if include else 1)
+            cancelled = self._queue[index:]
+        for later in cancelled:
+            later.cancel_requested.set()
+            later._future.cancel()
+        return cancelled
+
+    def check_cancelled(self):
+        """
+        Raises MotionCancelled when called from a motion that was cancelled, does nothing on other threads.
+        """
+        motion = getattr(self._local, "current", None)
+        if motion is not None and motion.cancel_requested.is_set():
+            raise MotionCancelled(f"{motion.description} cancelled")
+
+    def cancel(self, motion) -> bool:
+        """
+        Cancels a motion and the motions queued after it, a running motion is stopped.
+        """
+        if motion.done():
+            return False
+        self._logger.warning(f"Cancelling {self.label} {motion.description}")
+        self._cancel_from(motion)
+        if motion.running() and self._stop is not None:
+            self._stop()
+        return True
+
+    def pending(self) -> list:
+        """
+        Returns the motions that are running or queued.
+        """
+        with self._lock:
+            return list(self._queue)
+
+    def wait(self) -> list:
+        """
+        Blocks until every submitted motion is finished, failed or cancelled.
+        returns: the exceptions of the motions that failed since the last wait and were not collected with result()
+        or exception(), oldest first (cancelled motions are left out)
+        """
+        for motion in self.pending():
+            try:
+                motion._future.result()
+            except BaseException:
+                continue
+            self.clock.wait_until(motion.end_time)
+        with self._lock:
+            failed, self._failed = self._failed, []
+        return [e for motion, e in failed if not motion.reported]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,43 @@
+class MotionProfiles():
+    """
+    Named dynamic profiles of the robot motions, one per segment class (e.g. transit, approach, grasp, pour).
+
+    A profile gives the velocity, acceleration and jerk of a motion relative to the Panda limits (0.0 to 1.0), so
+    free-space transits between stations can run faster than the last millimetres of an insertion. Motions without
+    a profile use the "default" profile built from the velocity scaling vel of the robot.
+
+    :param vel: relative velocity, acceleration and jerk of the default profile
+    :param profiles: dictionary {name: {"velocity": v, "acceleration": a, "jerk": j}}
+    """
+    KEYS = ("velocity", "acceleration", "jerk")
+
+    def __init__(self, vel, profiles=None):
+        self.profiles = {"default": {key: vel for key in self.KEYS}}
+        self.profiles.update(profiles or {})
+        for name, profile in self.profiles.items():
+            self._check(name, profile)
+
+    def _check(self, name, profile):
+        for key in self.KEYS:
+            if not 0.0 < profile[key] <= 1.0:
+                raise ValueError(f"Motion profile {name}: {key} {profile[key]} must be in (0.0, 1.0]")
+
+    def get(self, profile=None) -> dict:
+        """
+        Returns the dynamics of a profile given by name or as a dictionary, the default profile for None.
+        """
+        if profile is None:
+            return self.profiles["default"]
+        if isinstance(profile, dict):
+            self._check("custom", profile)
+            return profile
+        try:
+            return self.profiles[profile]
+        except KeyError:
+            raise ValueError(f"Unknown motion profile {profile}, use one of {list(self.profiles)}") from None
+
+    def max_rel(self) -> float:
+        """
+        Returns the highest relative dynamics of all profiles.
+        """
+        return max(profile[key] for profile in self.profiles.values() for key in self.KEYS)
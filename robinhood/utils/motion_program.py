@@ -0,0 +1,291 @@
+import math
+import logging
+from .waypoint_store import Waypoint
+
+
+class MotionOp():
+    """
+    A primitive operation of a motion program.
+
+    :param kind: "j" joint move, "x" linear move, "path" blended cartesian path, "guarded" linear move stopped by
+    a contact force, "clamp" closes the gripper, "open" opens the gripper fully, "width" opens the gripper to a width
+    :param target: joint positions ("j"), cartesian pose ("x", "guarded"), list of cartesian poses ("path") or gripper width [m] ("width")
+    :param profile: motion profile of the move (see MOTION_PROFILES), None for the default profile
+    :param blend_radius: [m] blend radius of a path
+    :param force_limit: [N] external force stopping a guarded move
+    :param seat: True when a contact ends a guarded move normally (the object is seated), False when it is a collision
+    """
+    def __init__(self, kind, target=None, profile=None, blend_radius=0.0, force_limit=None, seat=False):
+        self.kind = kind
+        self.target = target
+        self.profile = profile
+        self.blend_radius = blend_radius
+        self.force_limit = force_limit
+        self.seat = seat
+
+    def end_pose(self) -> list:
+        """
+        Returns the pose reached by a move, the last pose of a path.
+        """
+        return self.target[-1] if self.kind == "path" else self.target
+
+    def cartesian_poses(self) -> list:
+        """
+        Returns the cartesian poses the operation moves through, none for joint moves and gripper commands.
+        """
+        if self.kind == "path":
+            return self.target
+        return [self.target] if self.kind in ("x", "guarded") else []
+
+    def __repr__(self):
+        return f"MotionOp({self.kind}, {self.target}, {self.profile})"
+
+
+class MotionProgram():
+    """
+    A robot motion expressed as a list of primitive operations (moves and gripper commands), built from the
+    waypoint store and the route graph and run with RobInHood.run_program. Building methods return the program
+    so that they can be chained.
+
+    :param name: name of the program used in the logs and optimisation reports
+    :param store: WaypointStore of the named poses and paths
+    :param routes: RouteGraph used by route()
+    """
+    def __init__(self, name, store=None, routes=None):
+        self.name = name
+        self.store = store
+        self.routes = routes
+        self.ops = []
+
+    def move_j(self, pose, profile=None):
+        self.ops.append(MotionOp("j", list(pose), profile))
+        return self
+
+    def move_x(self, pose, profile=None):
+        self.ops.append(MotionOp("x", list(pose), profile))
+        return self
+
+    def linear_path(self, poses, blend_radius, profile=None):
+        self.ops.append(MotionOp("path", [list(pose) for pose in poses], profile, blend_radius))
+        return self
+
+    def guarded_descent(self, pose, force_limit, seat_distance, profile="transit", start=None):
+        """
+        Moves down to a cartesian pose with a force guard: with the transit profile (profile) until seat_distance [m]
+        above the pose, then with the grasp profile. A contact during the fast part is a collision, a contact
+        during the slow part means the object is seated and ends the descent there.
+        :param start: pose the descent starts from, the fast part is left out when it is already within seat_distance
+        """
+        above = list(pose)
+        above[2] += seat_distance
+        if start is None or start[2] > above[2]:
+            self.ops.append(MotionOp("guarded", above, profile, force_limit=force_limit))
+        self.ops.append(MotionOp("guarded", list(pose), "grasp", force_limit=force_limit, seat=True))
+        return self
+
+    def clamp(self):
+        self.ops.append(MotionOp("clamp"))
+        return self
+
+    def open(self, width=None):
+        """
+        Opens the gripper fully, or to width [m].
+        """
+        self.ops.append(MotionOp("open") if width is None else MotionOp("width", width))
+        return self
+
+    def waypoint(self, waypoint, profile=None):
+        """
+        Moves to a Waypoint or a named pose of the waypoint store, the profile of the waypoint wins over profile.
+        """
+        if isinstance(waypoint, str):
+            waypoint = self.store.named(waypoint)
+        profile = waypoint.profile or profile
+        return self.move_j(waypoint.pose, profile) if waypoint.kind == "j" else self.move_x(waypoint.pose, profile)
+
+    def path(self, name, profile="transit"):
+        """
+        Moves through the waypoints of a named path of the waypoint store.
+        """
+        for waypoint in self.store.path(name):
+            self.waypoint(waypoint, profile)
+        return self
+
+    def route(self, start, goal, loaded=True, include_start=False, profile="transit"):
+        """
+        Moves along the shortest taught route between two stations or named poses (see RobInHood.move_route).
+        """
+        route = self.routes.route(start, goal, loaded=loaded)
+        if include_start:
+            self.waypoint(self.routes.node(start, "leave"), profile)
+        for edge in route:
+            for waypoint in edge.waypoints():
+                self.waypoint(waypoint, profile if waypoint.kind == "j" else "approach")
+        return self
+
+    @staticmethod
+    def _descents(steps) -> dict:
+        """
+        Returns {first index: last index} of the vertical descents ending at a gripper action: consecutive cartesian
+        waypoints above the same x, y going down, the first waypoint of the descent is not included.
+        """
+        descents = {}
+        for action, step in enumerate(steps):
+            if step not in ("clamp", "release") or action == 0 or not isinstance(steps[action - 1], Waypoint):
+                continue
+            last = first = action - 1
+            while (first > 0 and isinstance(steps[first - 1], Waypoint) and steps[first - 1].kind == "x" == steps[last].kind
+                   and steps[first - 1].pose[:2] == steps[last].pose[:2] and steps[first - 1].pose[2] > steps[first].pose[2]):
+                first -= 1
+            if first < last:
+                descents[first + 1] = last
+        return descents
+
+    def steps(self, steps, release_width, blend_radius=None, guard=None):
+        """
+        Adds the steps of a slot sequence of the waypoint store (see RobInHood.run_waypoint_steps).
+        :param guard: (force_limit, seat_distance) to replace the vertical descents before the gripper actions
+        by a guarded descent (see guarded_descent), None keeps the taught steps
+        """
+        near_gripper = [any(steps[j] in ("clamp", "release") for j in (i - 1, i + 1) if 0 <= j < len(steps)) for i in range(len(steps))]
+        descents = self._descents(steps) if guard is not None else {}
+        segment = []
+        skip_to = -1
+        for i, step in enumerate(steps + [None]):
+            if i <= skip_to:
+                continue
+            if i not in descents and blend_radius is not None and isinstance(step, Waypoint) and step.kind == "x":
+                segment.append(i)
+                continue
+            if len(segment) == 1:
+                self.waypoint(steps[segment[0]], "grasp" if near_gripper[segment[0]] else "approach")
+            elif segment:
+                self.linear_path([steps[j].pose for j in segment], blend_radius,
+                                 "grasp" if any(near_gripper[j] for j in segment) else "approach")
+            segment = []
+            if i in descents:
+                skip_to = descents[i]
+                self.guarded_descent(steps[skip_to].pose, *guard, start=steps[i - 1].pose)
+            elif step == "clamp":
+                self.clamp()
+            elif step == "release":
+                self.open(release_width)
+            elif step is not None:
+                self.waypoint(step, "grasp" if near_gripper[i] else "approach")
+        return self
+
+    def extend(self, program):
+        self.ops.extend(program.ops)
+        return self
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __repr__(self):
+        return f"MotionProgram({self.name}, {len(self.ops)} ops)"
+
+
+class MotionProgramOptimiser():
+    """
+    Removes the operations of a motion program that do not change the motion:
+        - moves to the pose the robot is already at (no-op moves)
+        - intermediate stops of linear moves along a straight line with the same orientation (collinear segments)
+        - gripper commands leaving the gripper as it already is (a clamp after a clamp, an opening to the current width)
+
+    Only what the program itself commands is known, the pose and gripper state before the first operation are unknown.
+    The distances travelled do not change, the estimated time saved is motion_overhead for every removed stop
+    and gripper_time for every removed gripper command.
+
+    :param motion_overhead: [s] fixed duration of a robot motion (stop and settling)
+    :param gripper_time: [s] duration of a gripper command
+    :param tolerance: [m, rad] largest difference between two poses considered equal or on the same line
+    """
+    def __init__(self, motion_overhead=0.5, gripper_time=1.0, tolerance=1e-5):
+        self.motion_overhead = motion_overhead
+        self.gripper_time = gripper_time
+        self.tolerance = tolerance
+        self._logger = logging.getLogger("Motion_Optimiser")
+
+    def _same(self, a, b) -> bool:
+        return len(a) == len(b) and all(abs(p - q) <= self.tolerance for p, q in zip(a, b))
+
+    def _collinear(self, start, middle, end) -> bool:
+        """
+        True when middle lies between start and end on the straight line between them, with the same orientation.
+        """
+        if not (self._same(start[3:], middle[3:]) and self._same(middle[3:], end[3:])):
+            return False
+        segment = [e - s for s, e in zip(start[:3], end[:3])]
+        offset = [m - s for s, m in zip(start[:3], middle[:3])]
+        length = math.hypot(*segment)
+        if length <= self.tolerance:
+            return False
+        projection = sum(s * o for s, o in zip(segment, offset)) / length
+        if not 0.0 <= projection <= length:
+            return False
+        distance = math.sqrt(max(0.0, sum(o * o for o in offset) - projection * projection))
+        return distance <= self.tolerance
+
+    def _drop_no_op_moves(self, ops, report) -> list:
+        kept, pose = [], {"j": None, "x": None}
+        for op in ops:
+            if op.kind in ("j", "x"):
+                if pose[op.kind] is not None and self._same(pose[op.kind], op.target):
+                    report["no_op_moves"] += 1
+                    continue
+                pose = {"j": op.target, "x": None} if op.kind == "j" else {"j": None, "x": op.target}
+            elif op.kind == "path":
+                pose = {"j": None, "x": op.end_pose()}
+            elif op.kind == "guarded":
+                pose = {"j": None, "x": None} # a contact can stop the move anywhere before its target
+            kept.append(op)
+        return kept
+
+    def _merge_collinear(self, ops, report) -> list:
+        kept = []
+        for op in ops:
+            if (op.kind == "x" and len(kept) >= 2 and kept[-1].kind == "x" and kept[-1].profile == op.profile
+                    and kept[-2].kind in ("x", "path")
+                    and self._collinear(kept[-2].end_pose(), kept[-1].target, op.target)):
+                kept.pop()
+                report["collinear_merges"] += 1
+            kept.append(op)
+        return kept
+
+    def _drop_redundant_gripper(self, ops, report) -> list:
+        kept, gripper = [], None
+        for op in ops:
+            if op.kind == "clamp":
+                if gripper == "clamped":
+                    report["gripper_commands"] += 1
+                    continue
+                gripper = "clamped"
+            elif op.kind == "open":
+                if gripper == "open":
+                    report["gripper_commands"] += 1
+                    continue
+                gripper = "open"
+            elif op.kind == "width":
+                if isinstance(gripper, float) and abs(gripper - op.target) <= self.tolerance:
+                    report["gripper_commands"] += 1
+                    continue
+                gripper = float(op.target)
+            kept.append(op)
+        return kept
+
+    def optimise(self, program) -> tuple:
+        """
+        Returns the optimised copy of a program and the optimisation report
+        {"program", "ops", "no_op_moves", "collinear_merges", "gripper_commands", "time_saved"}.
+        """
+        report = {"program": program.name, "ops": len(program.ops), "no_op_moves": 0, "collinear_merges": 0, "gripper_commands": 0}
+        ops = self._drop_no_op_moves(program.ops, report)
+        ops = self._merge_collinear(ops, report)
+        ops = self._drop_redundant_gripper(ops, report)
+        report["time_saved"] = ((report["no_op_moves"] + report["collinear_merges"]) * self.motion_overhead
+                                + report["gripper_commands"] * self.gripper_time)
+        optimised = MotionProgram(program.name, program.store, program.routes)
+        optimised.ops = ops
+        if len(ops) < len(program.ops):
+            self._logger.debug(f"{program.name}: {len(program.ops)} -> {len(ops)} ops, {report['time_saved']:.1f} s saved")
+        return optimised, report
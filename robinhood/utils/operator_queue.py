@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import logging
+import datetime
+import itertools
+import threading
+from .clock import RealClock
+
+
+class OperatorRequest():
+    """
+    An intervention requested from the operator, e.g. capping a vial by hand or replacing a filter cartridge.
+
+    :param request_id: number of the request, used by the operator to answer it
+    :param message: what the operator has to do
+    :param options: accepted answers, the first one is the default of the auto backend
+    :param source: station or sample the request comes from
+    """
+    def __init__(self, request_id, message, options=("y", "n"), source=""):
+        self.request_id = request_id
+        self.message = message
+        self.options = tuple(option.lower() for option in options)
+        self.source = source
+        self.posted = datetime.datetime.now()
+        self.answer = None
+        self.answered = None
+        self._event = threading.Event()
+
+    def set_answer(self, answer) -> bool:
+        answer = str(answer).strip().lower()
+        if answer not in self.options or self._event.is_set():
+            return False
+        self.answer = answer
+        self.answered = datetime.datetime.now()
+        self._event.set()
+        return True
+
+    def is_answered(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Blocks the calling thread until the operator answers. Returns the answer (None on timeout).
+        """
+        self._event.wait(timeout)
+        return self.answer
+
+
+class OperatorQueue():
+    """
+    Queue of operator interventions. A request only blocks the thread that waits for it, so operations
+    of other samples running on the station scheduler carry on while the operator is away.
+
+    Backends:
+        cli - pending requests are printed, the operator answers in the terminal with "<request id> <answer>"
+        (or just "<answer>" when a single request is pending)
+        file - every request is written as request_<id>.json in request_path, the operator answers by writing
+        the answer (e.g. y) in request_<id>.answer
+        auto - requests are answered with their first option after operator_delay seconds on the clock,
+        used by the simulation backend
+
+    :param backend: "cli", "file" or "auto"
+    :param request_path: folder of the request files for the file backend
+    :param poll_interval: seconds between checks for answer files
+    :param clock: clock used by the auto backend
+    :param operator_delay: simulated operator response time for the auto backend
+    """
+    BACKENDS = ("cli", "file", "auto")
+
+    def __init__(self, backend="cli", request_path=None, poll_interval=1.0, clock=None, operator_delay=0.0):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown operator queue backend {backend}, use one of {self.BACKENDS}")
+        if backend == "file" and request_path is None:
+            raise ValueError("The file backend needs a request_path")
+        self.backend = backend
+        self.request_path = request_path
+        self.poll_interval = poll_interval
+        self.clock = clock if clock is not None else RealClock()
+        self.operator_delay = operator_delay
+        self.requests = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._listener = None
+        self._stop = threading.Event()
+        self._logger = logging.getLogger("Operator_Queue")
+        if backend == "file":
+            os.makedirs(request_path, exist_ok=True)
+
+    def _start_listener(self):
+        if self._listener is not None or self.backend == "auto":
+            return
+        target = self._read_terminal if self.backend == "cli" else self._poll_files
+        self._listener = threading.Thread(target=target, name=f"operator_{self.backend}", daemon=True)
+        self._listener.start()
+
+    def pending(self) -> list:
+        """
+        Returns the requests waiting for an answer, oldest first.
+        """
+        with self._lock:
+            return [request for request in self.requests.values() if not request.is_answered()]
+
+    def post(self, message, options=("y", "n"), source="") -> OperatorRequest:
+        """
+        Posts a request without blocking. Use request.wait() or ask() to wait for the answer.
+        """
+        with self._lock:
+            request = OperatorRequest(next(self._ids), message, options, source)
+            self.requests[request.request_id] = request
+        self._logger.warning(f"Operator request {request.request_id} ({source}): {message} {'/'.join(request.options)}")
+        if self.backend == "file":
+            self._write_request(request)
+        elif self.backend == "cli":
+            print(f"[Operator request {request.request_id}] {message} - answer with: {request.request_id} <{'/'.join(request.options)}>", flush=True)
+        self._start_listener()
+        if self.backend == "auto":
+            self.clock.sleep(self.operator_delay)
+            self.answer(request.request_id, request.options[0])
+        return request
+
+    def ask(self, message, options=("y", "n"), source=""):
+        """
+        Posts a request and blocks the calling thread until the operator answers it.
+        returns: the answer, one of options in lower case
+        """
+        request = self.post(message, options, source)
+        answer = request.wait()
+        self._logger.info(f"Operator request {request.request_id} answered: {answer}")
+        return answer
+
+    def answer(self, request_id, answer) -> bool:
+        """
+        Answers a pending request. Returns False when the request is unknown, already answered or
+        the answer is not one of its options.
+        """
+        with self._lock:
+            request = self.requests.get(int(request_id))
+            if request is None or request.is_answered() or str(answer).strip().lower() not in request.options:
+                return False
+            if self.backend == "file": # removed before the waiting thread wakes up
+                for extension in (".json", ".answer"):
+                    path = os.path.join(self.request_path, f"request_{request.request_id}{extension}")
+                    if os.path.exists(path):
+                        os.remove(path)
+            return request.set_answer(answer)
+
+    def close(self):
+        self._stop.set()
+
+    def _read_terminal(self):
+        for line in sys.stdin:
+            if self._stop.is_set():
+                return
+            words = line.split()
+            pending = self.pending()
+            if len(words) == 1 and len(pending) == 1:
+                words = [pending[0].request_id, words[0]]
+            if len(words) != 2 or not str(words[0]).isdigit() or not self.answer(words[0], words[1]):
+                print(f"Pending requests: {[(r.request_id, r.message, r.options) for r in pending]} - answer with: <request id> <answer>", flush=True)
+
+    def _write_request(self, request):
+        path = os.path.join(self.request_path, f"request_{request.request_id}.json")
+        with open(path, "w") as f:
+            json.dump({"id": request.request_id, "message": request.message, "options": request.options,
+                       "source": request.source, "posted": request.posted.isoformat(timespec="seconds")}, f, indent=4)
+
+    def _poll_files(self):
+        while not self._stop.wait(self.poll_interval):
+            for request in self.pending():
+                path = os.path.join(self.request_path, f"request_{request.request_id}.answer")
+                if not os.path.exists(path):
+                    continue
+                with open(path, "r") as f:
+                    answer = f.read()
+                if not self.answer(request.request_id, answer):
+                    self._logger.warning(f"Invalid answer {answer.strip()} to operator request {request.request_id}, expected one of {request.options}")
+                    os.remove(path)
@@ -0,0 +1,190 @@
+import logging
+
+
+class PumpProgram():
+    """
+    A sequence of liquid transfers of one dispense pump (aspirate from a port, dispense to another port), with loops.
+    Ports are workflow ports (see PumpRouter), the pump line converts them to valve positions. Building methods
+    return the program so that they can be chained, e.g. the dispense line wash of pump_prime_dispense_tubing:
+
+        wash = PumpProgram("wash", line).transfer(1000, chemical_port, line.dispense_port).transfer(2000, line.dispense_port, line.waste_port)
+        PumpProgram("prime", line).transfer(2000, line.dispense_port, line.waste_port).repeat(2, wash)
+
+    :param name: name of the program used in the logs
+    :param line: PumpLine of the pump running the program
+    """
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.ops = [] # ("transfer", volume, source port, destination port) or ("loop", count, [ops])
+
+    def transfer(self, volume, source_port, destination_port):
+        self.ops.append(("transfer", float(volume), source_port, destination_port))
+        return self
+
+    def repeat(self, count, program):
+        """
+        Runs the operations of program count times.
+        """
+        if count > 0:
+            self.ops.append(("loop", int(count), list(program.ops)))
+        return self
+
+    def extend(self, program):
+        self.ops.extend(program.ops)
+        return self
+
+    def transfers(self, ops=None) -> list:
+        """
+        Returns the (volume, source port, destination port) transfers of the program with the loops expanded.
+        """
+        transfers = []
+        for op in self.ops if ops is None else ops:
+            if op[0] == "transfer":
+                transfers.append(op[1:])
+            else:
+                transfers.extend(self.transfers(op[2]) * op[1])
+        return transfers
+
+    def volume(self) -> float:
+        return sum(transfer[0] for transfer in self.transfers())
+
+    def __len__(self):
+        return len(self.transfers())
+
+    def __repr__(self):
+        return f"PumpProgram({self.name}, {len(self)} transfers)"
+
+
+class PumpProgramCompiler():
+    """
+    Compiles a PumpProgram into Cavro command strings (XCalibur, C3000), so that a multi-step program is sent in one
+    or a few serial round trips instead of a dispense call and an idle poll per transfer.
+
+    The transfers between two loops are split into syringe strokes by the StrokePlanner. A stroke is
+    I<source> A<steps> I<destination> A<steps> ... A0: valve to the source, aspirate to an absolute plunger position,
+    then for every destination valve to it and dispense down to the plunger position left. The valve command is left
+    out when the valve is already at the port. Program loops become Cavro loops g ... G<count>, and consecutive repeats
+    of the same strokes (e.g. a 6 ml prime with a 1 ml syringe) are compressed into loops too. Every command string
+    ends with R (execute) and is at most max_length characters, a program that does not fit is split between strokes.
+
+    :param planner: StrokePlanner of the pump
+    :param max_length: longest command string accepted by the pump
+    :param compress: False leaves repeated strokes expanded
+    """
+    def __init__(self, planner, max_length=255, compress=True):
+        self.planner = planner
+        self.max_length = max_length
+        self.compress = compress
+        self._logger = logging.getLogger("Pump_Compiler")
+
+    def stroke_text(self, stroke, valve=None) -> str:
+        """
+        Returns the command string of a Stroke, starting with the valve at valve (None when unknown).
+        """
+        text = "" if stroke.source == valve else f"I{stroke.source}"
+        remaining = stroke.volume
+        text += f"A{self.planner.steps(remaining)}"
+        valve = stroke.source
+        for destination, volume in stroke.dispenses:
+            remaining -= volume
+            text += ("" if destination == valve else f"I{destination}") + f"A{max(0, self.planner.steps(remaining))}"
+            valve = destination
+        return text
+
+    def _units(self, line, ops) -> list:
+        """
+        Flattens program operations into units: stroke strings and ("loop", count, [units]).
+        The valve position is unknown at the start of a loop, the first stroke after a loop boundary sets it.
+        """
+        units, transfers = [], []
+
+        def flush():
+            valve = None
+            for stroke in self.planner.plan(transfers):
+                units.append(self.stroke_text(stroke, valve))
+                valve = stroke.dispenses[-1][0]
+            transfers.clear()
+
+        for op in ops:
+            if op[0] == "transfer":
+                transfers.append((op[1], line.valve_position(op[2]), line.valve_position(op[3])))
+            else:
+                flush()
+                units.append(("loop", op[1], self._units(line, op[2])))
+        flush()
+        return self._compress(units) if self.compress else units
+
+    def plan(self, program) -> list:
+        """
+        Returns the strokes of a program with the loops expanded.
+        """
+        line = program.line
+        return self.planner.plan([(volume, line.valve_position(source), line.valve_position(destination))
+                                  for volume, source, destination in program.transfers()])
+
+    @staticmethod
+    def _compress(units) -> list:
+        """
+        Replaces consecutive repeats of a block of strokes by a loop, the block saving the most characters first.
+        """
+        compressed = []
+        i = 0
+        while i < len(units):
+            best = None # (saved characters, block length, repeats)
+            for length in range(1, (len(units) - i) // 2 + 1):
+                block = units[i:i + length]
+                if any(not isinstance(unit, str) for unit in block):
+                    break
+                repeats = 1
+                while units[i + repeats * length:i + (repeats + 1) * length] == block:
+                    repeats += 1
+                saved = (repeats - 1) * sum(len(unit) for unit in block) - 2 - len(str(repeats))
+                if repeats > 1 and saved > 0 and (best is None or saved > best[0]):
+                    best = (saved, length, repeats)
+            if best is None:
+                compressed.append(units[i])
+                i += 1
+            else:
+                _, length, repeats = best
+                compressed.append(("loop", repeats, units[i:i + length]))
+                i += length * repeats
+        return compressed
+
+    def _text(self, unit) -> str:
+        if isinstance(unit, str):
+            return unit
+        _, count, body = unit
+        return "g" + "".join(self._text(inner) for inner in body) + f"G{count}"
+
+    def _expand(self, unit) -> list:
+        if isinstance(unit, str):
+            return [unit]
+        _, count, body = unit
+        return [stroke for inner in body for stroke in self._expand(inner)] * count
+
+    def compile(self, program, speed=None) -> list:
+        """
+        Returns the command strings of a program, each one ends with R.
+        :param speed: predefined speed (S<speed>) set at the start of every command string, None keeps the pump speed
+        """
+        prefix = "" if speed is None else f"S{speed}"
+        limit = self.max_length - len(prefix) - 1
+        units = list(self._units(program.line, program.ops))
+        commands, current = [], ""
+        while units:
+            text = self._text(units[0])
+            if len(text) > limit:
+                if isinstance(units[0], str):
+                    raise ValueError(f"Stroke {text} of {program.name} is longer than the {self.max_length} characters of a pump command")
+                units[:1] = self._expand(units[0]) # a loop longer than a command string is sent unrolled
+                continue
+            if len(current) + len(text) > limit:
+                commands.append(prefix + current + "R")
+                current = ""
+            current += text
+            units.pop(0)
+        if current:
+            commands.append(prefix + current + "R")
+        self._logger.debug(f"{program.name}: {len(program)} transfers compiled to {len(commands)} commands {commands}")
+        return commands
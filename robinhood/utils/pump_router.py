@@ -0,0 +1,106 @@
+import logging
+
+
+class PumpLine():
+    """
+    One dispense pump of PUMP_PORT_ASSIGNMENTS: the workflow ports it owns and its dispense, air and waste ports.
+
+    Workflow ports are numbered across all the pumps (ports of pump 2 start at 13), a pump command takes the valve
+    position of the pump, the workflow port minus port_offset with port_prefix in front of it (e.g. 18 -> "I6").
+    """
+    def __init__(self, key, assignment, dispense_dict):
+        self.key = key
+        self.name = assignment["name"]
+        self.device = assignment["device"]
+        self.ports = list(assignment["ports"])
+        self.port_offset = assignment.get("port_offset", 0)
+        self.port_prefix = assignment.get("port_prefix", "")
+        self.default_speed = assignment["default_speed"]
+        self.dropwise_speed = assignment["dropwise_speed"]
+        self.primed_variable = assignment["primed_variable"]
+        self.line_state_variable = assignment.get("line_state_variable", f"{self.device}_line_state")
+        self.syringe_volume = assignment.get("syringe_volume", 1000)
+        self.full_steps = assignment.get("full_steps", 3000)
+        self.dispense_port = dispense_dict[assignment["dispense"]]
+        self.air_port = dispense_dict[assignment["air"]]
+        self.waste_port = dispense_dict[assignment["waste"]]
+        self.dispense = self.token(self.dispense_port)
+        self.air = self.token(self.air_port)
+        self.waste = self.token(self.waste_port)
+
+    def valve_position(self, port) -> int:
+        return port - self.port_offset
+
+    def token(self, port):
+        """
+        Returns the port argument of the pump commands for a workflow port.
+        """
+        position = self.valve_position(port)
+        return f"{self.port_prefix}{position}" if self.port_prefix else position
+
+    def __repr__(self):
+        return f"PumpLine({self.key}, {self.device}, ports {self.ports[0]}-{self.ports[-1]})"
+
+
+class PumpRoute():
+    """
+    Where a chemical is dispensed from: the pump it is connected to, its workflow port and the port arguments
+    of the pump commands (chemical, dispense, air and waste ports).
+    """
+    def __init__(self, chemical, port, pump):
+        self.chemical = chemical
+        self.port = port
+        self.pump = pump
+        self.source = pump.token(port)
+        self.dispense = pump.dispense
+        self.air = pump.air
+        self.waste = pump.waste
+
+    @property
+    def device(self) -> str:
+        return self.pump.device
+
+    def __repr__(self):
+        return f"PumpRoute({self.chemical}, {self.device}, port {self.port} -> {self.source})"
+
+
+class PumpRouter():
+    """
+    Resolves a chemical to the pump it is connected to and the port arguments of the pump commands.
+    The routes are computed once from PUMP_PORT_ASSIGNMENTS and the dispense dictionary, a new pump or new ports
+    only need a new entry in PUMP_PORT_ASSIGNMENTS and DISPENSE_HARDCODES.
+
+    :param dispense_dict: chemical or hardcoded line name: workflow port (see Workflow_Helper.workflow_setup)
+    :param assignments: PUMP_PORT_ASSIGNMENTS
+    """
+    def __init__(self, dispense_dict, assignments):
+        self._logger = logging.getLogger("Pump_Router")
+        self.pumps = {key: PumpLine(key, assignment, dispense_dict) for key, assignment in assignments.items()}
+        self.devices = {pump.device: pump for pump in self.pumps.values()}
+        owners = {}
+        for pump in self.pumps.values():
+            for port in pump.ports:
+                if port in owners:
+                    raise ValueError(f"Port {port} is assigned to {owners[port].key} and {pump.key}")
+                owners[port] = pump
+        self.routes = {}
+        for chemical, port in dispense_dict.items():
+            if port not in owners:
+                self._logger.warning(f"{chemical} is on port {port}, which is not assigned to any dispense pump")
+                continue
+            self.routes[chemical] = PumpRoute(chemical, port, owners[port])
+
+    def route(self, chemical) -> PumpRoute:
+        try:
+            return self.routes[chemical]
+        except KeyError:
+            raise KeyError(f"{chemical} is not connected to a dispense pump, chemicals available: {list(self.routes)}") from None
+
+    def pump(self, device) -> PumpLine:
+        """
+        Returns the PumpLine of a RobInHood pump attribute, e.g. "pump_2".
+        """
+        return self.devices[device]
+
+    def __repr__(self):
+        return f"PumpRouter({len(self.pumps)} pumps, {len(self.routes)} routes)"
@@ -0,0 +1,104 @@
+import logging
+import threading
+from contextlib import contextmanager
+from .clock import RealClock
+
+
+class RobotStateCache():
+    """
+    Keeps the latest robot state read from the robot so that state queries do not need a synchronous read_once.
+
+    A background thread refreshes the state at a fixed rate while the robot is not moving (libfranka does not allow
+    read_once while a motion is running). The snapshot is a (time, state) tuple replaced as a whole, readers never
+    take a lock. Motions are wrapped in motion(), which pauses the reader and invalidates the snapshot when the
+    motion finishes, so a state from before a motion is never returned as fresh.
+
+    :param read_function: function returning the robot state, e.g. frankx Robot.read_once
+    :param rate: [Hz] refresh rate of the background reader
+    :param clock: clock used for the snapshot times
+    """
+    def __init__(self, read_function, rate=50.0, clock=None):
+        self._read = read_function
+        self.period = 1.0 / rate
+        self.clock = clock if clock is not None else RealClock()
+        self._snapshot = None
+        self._io_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.read_errors = 0
+        self._logger = logging.getLogger("Robot_State_Cache")
+
+    def start(self):
+        """
+        Starts the background reader.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="robot_state_reader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.period):
+            if not self._io_lock.acquire(blocking=False):
+                continue # a motion or a synchronous read is running
+            try:
+                self._snapshot = (self.clock.now(), self._read())
+            except Exception as e:
+                self.read_errors += 1
+                self._logger.debug(f"Robot state read failed: {e!r}")
+            finally:
+                self._io_lock.release()
+
+    def refresh(self):
+        """
+        Reads the robot state synchronously (waits for a running motion to finish) and updates the snapshot.
+        """
+        with self._io_lock:
+            state = self._read()
+            self._snapshot = (self.clock.now(), state)
+        return state
+
+    def snapshot(self):
+        """
+        Returns the latest (time, state) tuple without blocking, None if no state was read since the last motion.
+        """
+        return self._snapshot
+
+    def age(self):
+        """
+        Returns the age in seconds of the latest state, None if there is none.
+        """
+        snapshot = self._snapshot
+        return None if snapshot is None else self.clock.now() - snapshot[0]
+
+    def is_fresh(self, max_age) -> bool:
+        age = self.age()
+        return age is not None and age <= max_age
+
+    def get(self, max_age=0.1):
+        """
+        Returns a robot state not older than max_age seconds, from the snapshot when it is fresh enough and
+        with a synchronous read otherwise. max_age None accepts any cached state.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and (max_age is None or self.clock.now() - snapshot[0] <= max_age):
+            return snapshot[1]
+        return self.refresh()
+
+    @contextmanager
+    def motion(self):
+        """
+        Wraps a robot motion: the background reader is paused during the motion and the snapshot is invalidated after it.
+        """
+        with self._io_lock:
+            try:
+                yield
+            finally:
+                self._snapshot = None
@@ -0,0 +1,180 @@
+import math
+import heapq
+import logging
+from .waypoint_store import Waypoint
+
+
+class RouteEdge():
+    """
+    A taught motion between two named poses of the route graph.
+
+    :param start: name of the pose the motion starts from
+    :param goal: name of the pose the motion ends at
+    :param via: cartesian waypoints run between start and goal
+    :param goal_waypoint: waypoint of the goal pose
+    :param loaded: True when the motion was taught holding a vial
+    :param chain: name of the taught chain the edge comes from
+    :param cost: [s] estimated duration of the motion
+    """
+    def __init__(self, start, goal, via, goal_waypoint, loaded, chain, cost):
+        self.start = start
+        self.goal = goal
+        self.via = via
+        self.goal_waypoint = goal_waypoint
+        self.loaded = loaded
+        self.chain = chain
+        self.cost = cost
+
+    def waypoints(self) -> list:
+        return self.via + [self.goal_waypoint]
+
+    def __repr__(self):
+        return f"RouteEdge({self.start} -> {self.goal}, {self.chain}, {self.cost:.2f} s)"
+
+
+class RouteGraph():
+    """
+    Graph of the named safe poses of the hood, used to plan transfers between stations.
+
+    Edges only come from taught motion chains (the "routes" section of the waypoints file): every pair of consecutive
+    named poses of a chain is an edge, the cartesian poses between them are run as via points. Edges are directed,
+    a joint motion and a linear motion between the same two poses do not sweep the same volume, so a chain is only
+    usable in the direction it was taught. Chains taught with an empty gripper are not used for routes holding a vial.
+
+    The planner returns the route with the shortest estimated duration (Dijkstra), a joint motion costs its largest
+    joint displacement over joint_speed and a linear motion its length over cartesian_speed, plus motion_overhead for
+    the stop at the end of every motion.
+
+    Chains are
+        {"loaded": true, "poses": [pose names or cartesian poses]}
+        {"loaded": true, "from": pose name, "path": path name} for a path of the waypoint store, optionally preceded by a pose
+
+    Stations map to a pose name, or to {"arrive": pose, "leave": pose} when the station sequence (pick, place)
+    leaves the robot somewhere else than where it arrived. "arrive" can be a list of poses when the station is
+    reached at different poses depending on where the robot comes from (e.g. the pump holder), the route ends at
+    the first one reached.
+
+    :param store: WaypointStore holding the poses, paths and routes definition
+    """
+    def __init__(self, store):
+        self.store = store
+        definition = store.routes
+        self.joint_speed = definition.get("joint_speed", 1.0)
+        self.cartesian_speed = definition.get("cartesian_speed", 0.1)
+        self.motion_overhead = definition.get("motion_overhead", 0.5)
+        self.stations = {name: node if isinstance(node, dict) else {"arrive": node, "leave": node}
+                         for name, node in definition.get("stations", {}).items()}
+        self.edges = {}
+        self._logger = logging.getLogger("Route_Graph")
+        for chain, chain_definition in definition.get("chains", {}).items():
+            self._add_chain(chain, chain_definition)
+        for name, station in self.stations.items():
+            for node in self.nodes(name, "arrive") + [station["leave"]]:
+                if node not in self.edges and not any(node in goals for goals in self.edges.values()):
+                    raise ValueError(f"Station {name} pose {node} is not part of any taught chain")
+        self._logger.debug(f"{sum(len(goals) for goals in self.edges.values())} route edges loaded from {len(definition.get('chains', {}))} chains")
+
+    def _chain_poses(self, chain_definition) -> list:
+        if "path" in chain_definition:
+            poses = list(self.store.path_names[chain_definition["path"]])
+            if "from" in chain_definition:
+                poses.insert(0, chain_definition["from"])
+            return poses
+        return chain_definition["poses"]
+
+    def _motion_cost(self, previous, waypoint) -> float:
+        cost = self.motion_overhead
+        if previous.kind == "j" and waypoint.kind == "j":
+            cost += max(abs(a - b) for a, b in zip(previous.pose, waypoint.pose)) / self.joint_speed
+        elif previous.kind == "x" and waypoint.kind == "x":
+            cost += math.dist(previous.pose[:3], waypoint.pose[:3]) / self.cartesian_speed
+        return cost
+
+    def _add_chain(self, chain, chain_definition):
+        poses = self._chain_poses(chain_definition)
+        loaded = chain_definition.get("loaded", False)
+        if not isinstance(poses[0], str) or not isinstance(poses[-1], str):
+            raise ValueError(f"Route chain {chain} must start and end with a named pose")
+        start, start_waypoint, via = poses[0], self.store.named(poses[0]), []
+        previous, cost = start_waypoint, 0.0
+        for pose in poses[1:]:
+            waypoint = self.store.named(pose) if isinstance(pose, str) else Waypoint("x", pose)
+            cost += self._motion_cost(previous, waypoint)
+            previous = waypoint
+            if not isinstance(pose, str):
+                via.append(waypoint)
+                continue
+            edge = RouteEdge(start, pose, via, waypoint, loaded, chain, cost)
+            known = self.edges.setdefault(start, {}).get(pose)
+            if known is None or (edge.loaded, -edge.cost) > (known.loaded, -known.cost):
+                self.edges[start][pose] = edge
+            start, via, cost = pose, [], 0.0
+
+    def nodes(self, station_or_pose, role="arrive") -> list:
+        """
+        Returns the pose names of a station for a role ("arrive" or "leave"), a pose name is returned as a single item list.
+        """
+        if station_or_pose not in self.stations:
+            return [station_or_pose]
+        node = self.stations[station_or_pose][role]
+        return list(node) if isinstance(node, list) else [node]
+
+    def node(self, station_or_pose, role="leave") -> str:
+        """
+        Returns the pose name of a station for a role, the first one when there are several.
+        """
+        return self.nodes(station_or_pose, role)[0]
+
+    def route(self, start, goal, loaded=True) -> list:
+        """
+        Returns the shortest route between two stations or named poses as a list of RouteEdge, empty when start is goal.
+        :param loaded: True when the robot holds a vial, only chains taught holding a vial are used
+        """
+        start, goals = self.node(start, "leave"), set(self.nodes(goal, "arrive"))
+        goal = None
+        costs = {start: 0.0}
+        previous = {}
+        queue = [(0.0, start)]
+        while queue:
+            cost, node = heapq.heappop(queue)
+            if node in goals:
+                goal = node
+                break
+            if cost > costs[node]:
+                continue
+            for edge in self.edges.get(node, {}).values():
+                if loaded and not edge.loaded:
+                    continue
+                new_cost = cost + edge.cost
+                if new_cost < costs.get(edge.goal, math.inf):
+                    costs[edge.goal] = new_cost
+                    previous[edge.goal] = edge
+                    heapq.heappush(queue, (new_cost, edge.goal))
+        if goal is None:
+            raise ValueError(f"No taught route from {start} to {sorted(goals)} ({'holding a vial' if loaded else 'empty gripper'})")
+        route = []
+        while goal != start:
+            route.append(previous[goal])
+            goal = previous[goal].start
+        return route[::-1]
+
+    def duration(self, route) -> float:
+        """
+        Returns the estimated duration of a route in seconds.
+        """
+        return sum(edge.cost for edge in route)
+
+    def unreachable(self, loaded=True) -> list:
+        """
+        Returns the (start, goal) station pairs without a taught route between them.
+        """
+        pairs = []
+        for start in self.stations:
+            for goal in self.stations:
+                if start == goal:
+                    continue
+                try:
+                    self.route(start, goal, loaded)
+                except ValueError:
+                    pairs.append((start, goal))
+        return pairs
@@ -0,0 +1,148 @@
+import logging
+
+from robinhood.config.workflow_config import CHANGEOVER_COSTS
+
+
+class SamplePlanner:
+
+    def __init__(self, pump_router, cost_table: dict = CHANGEOVER_COSTS, max_passes: int = 50) -> None:
+        """
+        Sample order planner - reorders the samples from Workflow_Helper.make_samples_csv to minimise the changeover
+        cost, i.e. the Quantos cartridge swaps and the dispense line primes triggered when consecutive samples need
+        different solids or solvents.
+
+        inputs:
+            pump_router = PumpRouter of the dispense pumps, gives the pump each liquid is dispensed with
+            cost_table = changeover costs in seconds (cartridge_load, cartridge_swap, dispense_prime)
+            max_passes = maximum number of local improvement passes
+        """
+        self._logger = logging.getLogger("Sample_Planner")
+        self.pump_router = pump_router
+        self.pumps = list(pump_router.pumps) # order of the primed solvents in the planner state
+        self.cost_table = cost_table
+        self.max_passes = max_passes
+
+    @staticmethod
+    def _as_list(entry) -> list:
+        if isinstance(entry, list):
+            return [item for item in entry if item != "None"]
+        return [] if entry == "None" else [entry]
+
+    def sample_cost(self, sample: dict, state: tuple) -> tuple:
+        """
+        Cost of processing one sample from a given state.
+
+        inputs: sample entry of the samples dictionary, state = (cartridge solid, (solvent primed on each pump))
+        outputs: (cost in seconds, state after the sample, list of changeovers)
+        """
+        cartridge, primed = state
+        primed = list(primed)
+        cost = 0
+        changeovers = []
+
+        for solid in self._as_list(sample["solid"]):
+            if solid != cartridge:
+                cost += self.cost_table["cartridge_load" if cartridge is None else "cartridge_swap"]
+                changeovers.append(f"cartridge {cartridge} -> {solid}")
+                cartridge = solid
+
+        for liquid in self._as_list(sample["liquid"]):
+            pump = self.pump_router.route(liquid).pump
+            index = self.pumps.index(pump.key)
+            if liquid != primed[index]:
+                cost += self.cost_table["dispense_prime"]
+                changeovers.append(f"{pump.name} {primed[index]} -> {liquid}")
+                primed[index] = liquid
+
+        return cost, (cartridge, tuple(primed)), changeovers
+
+    def order_cost(self, samples_dict: dict, order: list, state: tuple) -> float:
+        """
+        Total changeover cost of running the samples in the given order starting from state.
+        """
+        total = 0
+        for key in order:
+            cost, state, _ = self.sample_cost(samples_dict[key], state)
+            total += cost
+        return total
+
+    def _greedy_order(self, samples_dict: dict, state: tuple) -> list:
+        remaining = list(samples_dict)
+        order = []
+        while remaining:
+            best = min(remaining, key=lambda key: self.sample_cost(samples_dict[key], state)[0])
+            _, state, _ = self.sample_cost(samples_dict[best], state)
+            order.append(best)
+            remaining.remove(best)
+        return order
+
+    def _improve(self, samples_dict: dict, order: list, state: tuple) -> list:
+        """
+        Local search moving single samples and reversing runs of samples while the total cost decreases.
+        """
+        best_cost = self.order_cost(samples_dict, order, state)
+        for _ in range(self.max_passes):
+            improved = False
+            for i in range(len(order)):
+                for j in range(len(order)):
+                    if i == j:
+                        continue
+                    moved = order[:i] + order[i + 1:]
+                    moved.insert(j, order[i])
+                    reversed_run = order[:min(i, j)] + order[min(i, j):max(i, j) + 1][::-1] + order[max(i, j) + 1:]
+                    for candidate in (moved, reversed_run):
+                        cost = self.order_cost(samples_dict, candidate, state)
+                        if cost < best_cost:
+                            order, best_cost, improved = candidate, cost, True
+            if not improved:
+                break
+        return order
+
+    def plan(self, samples_dict: dict, cartridge_solid=None, primed_solvents: dict = None) -> dict:
+        """
+        Optimises the sample order before execution starts.
+
+        inputs:
+            samples_dict = dictionary of samples from Workflow_Helper.make_samples_csv
+            cartridge_solid = solid of the cartridge currently mounted on the quantos (None if empty)
+            primed_solvents = {primed_variable of the pump: solvent currently primed in its dispense line}
+
+        outputs: dictionary with
+            order = sample keys in the optimised order
+            samples = samples dictionary re-indexed in the optimised order
+            original_cost, optimised_cost, time_saved = changeover costs in seconds
+            changeovers = changeovers required before each sample of the optimised plan
+        """
+        primed_solvents = primed_solvents or {}
+        state = (cartridge_solid, tuple(primed_solvents.get(self.pump_router.pumps[key].primed_variable) for key in self.pumps))
+        original_order = list(samples_dict)
+        original_cost = self.order_cost(samples_dict, original_order, state)
+
+        order = self._improve(samples_dict, self._greedy_order(samples_dict, state), state)
+        optimised_cost = self.order_cost(samples_dict, order, state)
+        if optimised_cost >= original_cost:
+            order, optimised_cost = original_order, original_cost
+
+        changeovers = {}
+        for key in order:
+            _, state, changeovers[key] = self.sample_cost(samples_dict[key], state)
+
+        plan = {
+            "order": order,
+            "samples": {index: samples_dict[key] for index, key in enumerate(order)},
+            "original_cost": original_cost,
+            "optimised_cost": optimised_cost,
+            "time_saved": original_cost - optimised_cost,
+            "changeovers": changeovers,
+        }
+        self.log_plan(plan, samples_dict)
+        return plan
+
+    def log_plan(self, plan: dict, samples_dict: dict):
+
+        self._logger.info("Optimised sample order:")
+        for key in plan["order"]:
+            sample = samples_dict[key]
+            self._logger.info(f"Sample {key} (vial {sample['vial']}): {sample['solid']} / {sample['liquid']} - changeovers: {plan['changeovers'][key]}")
+        self._logger.info(f"Changeover time: {plan['original_cost']} s in csv order, {plan['optimised_cost']} s optimised")
+        self._logger.info(f"Estimated time saved: {plan['time_saved']} s")
@@ -0,0 +1,204 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .clock import RealClock
+
+
+class StationOperation():
+    """
+    A single station operation (node) of a workflow dependency graph.
+
+    :param name: unique name of the operation in the graph
+    :param function: callable executed by the scheduler
+    :param args: positional arguments passed to the function
+    :param kwargs: keyword arguments passed to the function
+    :param resources: names of the resources (arm, pump, pump_2, quantos, capper...) held while the operation runs
+    :param depends_on: names of the operations that must finish successfully before this one starts
+    :param estimate: [s] predicted duration, None when unknown
+    """
+    def __init__(self, name, function, args=(), kwargs=None, resources=(), depends_on=(), estimate=None):
+        self.name = name
+        self.function = function
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.resources = tuple(sorted(set(resources)))
+        self.depends_on = tuple(depends_on)
+        self.estimate = estimate
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.start = None
+        self.end = None
+
+    def duration(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+
+class StationScheduler():
+    """
+    Runs a workflow written as a dependency graph of station operations.
+
+    Operations whose dependencies have finished and whose resources are free are started concurrently,
+    e.g. priming pump_2 or stirring on the IKA while the Quantos doses. Each resource is guarded by a
+    lock, so two operations that need the same device (e.g. the arm) never overlap. The locks can be
+    shared with code running outside the scheduler. When several operations are ready, those with the
+    longest estimated duration start first, operations without an estimate keep the order they were added in.
+
+    :param resource_locks: dictionary {resource name: threading.Lock}, missing resources get a new lock
+    :param max_workers: maximum number of operations running at the same time
+    :param clock: RealClock (default) or the VirtualClock of a simulated RobInHood, in which case operations
+    start in simulated time once their dependencies and resources are free
+    """
+    def __init__(self, resource_locks=None, max_workers=4, poll_interval=0.05, clock=None):
+        self.resource_locks = resource_locks if resource_locks is not None else {}
+        self.clock = clock if clock is not None else RealClock()
+        self._resource_free = {}
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.operations = {}
+        self.makespan = None
+        self._logger = logging.getLogger("Station_Scheduler")
+
+    def add_operation(self, name, function, *args, resources=(), depends_on=(), estimate=None, **kwargs) -> str:
+        """
+        Adds an operation to the graph and returns its name so it can be used in depends_on.
+        :param estimate: [s] predicted duration of the operation, e.g. RobInHood.predict_pump_operation
+        """
+        if name in self.operations:
+            raise ValueError(f"Operation {name} already in the schedule")
+        for resource in resources:
+            self.resource_locks.setdefault(resource, threading.Lock())
+        self.operations[name] = StationOperation(name, function, args, kwargs, resources, depends_on, estimate)
+        return name
+
+    def validate(self):
+        """
+        Checks that every dependency exists and that the graph has no cycles.
+        """
+        for operation in self.operations.values():
+            for dependency in operation.depends_on:
+                if dependency not in self.operations:
+                    raise ValueError(f"Operation {operation.name} depends on unknown operation {dependency}")
+        visited, in_path = set(), set()
+
+        def visit(name):
+            if name in in_path:
+                raise ValueError(f"Cycle in the workflow graph at operation {name}")
+            if name in visited:
+                return
+            in_path.add(name)
+            for dependency in self.operations[name].depends_on:
+                visit(dependency)
+            in_path.remove(name)
+            visited.add(name)
+
+        for name in self.operations:
+            visit(name)
+
+    def _try_acquire(self, resources) -> bool:
+        acquired = []
+        for resource in resources:
+            if not self.resource_locks[resource].acquire(blocking=False):
+                for held in acquired:
+                    self.resource_locks[held].release()
+                return False
+            acquired.append(resource)
+        return True
+
+    def _release(self, resources):
+        for resource in resources:
+            self.resource_locks[resource].release()
+
+    def _ready_time(self, operation, start):
+        times = [start] + [self.operations[d].end for d in operation.depends_on]
+        times += [self._resource_free.get(resource, start) for resource in operation.resources]
+        return max(times)
+
+    def _execute(self, operation, ready_time):
+        self.clock.set_thread_time(ready_time)
+        operation.start = self.clock.now()
+        try:
+            return operation.function(*operation.args, **operation.kwargs)
+        finally:
+            operation.end = self.clock.now()
+
+    def run(self) -> dict:
+        """
+        Executes the graph. Operations depending on a failed operation are skipped, independent
+        branches carry on. SystemExit raised by an operation is re-raised once the running ones finish.
+
+        returns: dictionary {operation name: status} where status is "done", "failed" or "skipped"
+        """
+        self.validate()
+        pending = sorted(self.operations, key=lambda name: -(self.operations[name].estimate or 0.0))
+        running = {}
+        terminate = None
+        start = self.clock.now()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="station") as pool:
+            while pending or running:
+                for name in list(pending):
+                    operation = self.operations[name]
+                    dependencies = [self.operations[d].status for d in operation.depends_on]
+                    if terminate is not None or any(status in ("failed", "skipped") for status in dependencies):
+                        operation.status = "skipped"
+                        pending.remove(name)
+                        self._logger.warning(f"Skipping {name}")
+                        continue
+                    if len(running) >= self.max_workers or not all(status == "done" for status in dependencies):
+                        continue
+                    if self._try_acquire(operation.resources):
+                        self._logger.info(f"Starting {name} on {list(operation.resources)}")
+                        operation.status = "running"
+                        running[pool.submit(self._execute, operation, self._ready_time(operation, start))] = operation
+                        pending.remove(name)
+
+                if not running:
+                    if pending:
+                        time.sleep(self.poll_interval) # resources held outside the scheduler
+                    continue
+
+                finished, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    operation = running.pop(future)
+                    for resource in operation.resources:
+                        self._resource_free[resource] = operation.end
+                    self._release(operation.resources)
+                    try:
+                        operation.result = future.result()
+                        operation.status = "done"
+                        self._logger.info(f"Finished {operation.name} in {operation.duration():.1f} s")
+                    except BaseException as e:
+                        operation.status = "failed"
+                        operation.error = e
+                        self._logger.error(f"Operation {operation.name} failed: {e!r}")
+                        if isinstance(e, SystemExit):
+                            terminate = e
+
+        self.clock.synchronise()
+        self.makespan = self.clock.now() - start
+        self._logger.info(f"Schedule finished in {self.makespan:.1f} s")
+        if terminate is not None:
+            raise terminate
+        return {name: operation.status for name, operation in self.operations.items()}
+
+    def report(self) -> dict:
+        """
+        Returns per-operation status, start and end times (relative to the first start) and duration.
+        """
+        starts = [op.start for op in self.operations.values() if op.start is not None]
+        origin = min(starts) if starts else 0.0
+        return {
+            name: {
+                "status": op.status,
+                "resources": list(op.resources),
+                "start": None if op.start is None else op.start - origin,
+                "end": None if op.end is None else op.end - origin,
+                "duration": op.duration(),
+                "estimate": op.estimate,
+            }
+            for name, op in self.operations.items()
+        }
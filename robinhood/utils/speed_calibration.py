@@ -0,0 +1,100 @@
+import os
+import csv
+import logging
+import datetime
+
+
+class SpeedCalibration():
+    """
+    Table of the fastest accurate predefined dispense speed of every solvent on every pump, stored in a csv file
+    next to dispense.csv (columns solvent, pump, speed, dropwise_speed, density, error, calibrated).
+
+    The speeds of the pumps in PUMP_PORT_ASSIGNMENTS were measured with water, solvents with a lower viscosity can be
+    dispensed faster without losing accuracy. A row is filled in by RobInHood.calibrate_dispense_speed, solvents
+    without a row keep the default speeds of their pump.
+
+    :param file_path: csv file of the table, created on the first save when it does not exist
+    """
+    COLUMNS = ["solvent", "pump", "speed", "dropwise_speed", "density", "error", "calibrated"]
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.rows = {} # (solvent, pump key): row dictionary
+        self._logger = logging.getLogger("Speed_Calibration")
+        self.load()
+
+    @staticmethod
+    def _number(value, kind=float):
+        return None if value in (None, "", "None") else kind(float(value))
+
+    def load(self):
+        self.rows = {}
+        if not os.path.exists(self.file_path):
+            self._logger.debug(f"No dispense speed calibration in {self.file_path}, the default pump speeds are used")
+            return
+        with open(self.file_path, newline="") as f:
+            for row in csv.DictReader(f):
+                self.rows[(row["solvent"], row["pump"])] = {
+                    "solvent": row["solvent"],
+                    "pump": row["pump"],
+                    "speed": self._number(row.get("speed"), int),
+                    "dropwise_speed": self._number(row.get("dropwise_speed"), int),
+                    "density": self._number(row.get("density")),
+                    "error": self._number(row.get("error")),
+                    "calibrated": row.get("calibrated", ""),
+                }
+        self._logger.info(f"Loaded {len(self.rows)} dispense speed calibrations from {self.file_path}")
+
+    def save(self):
+        with open(self.file_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.COLUMNS)
+            writer.writeheader()
+            for row in self.rows.values():
+                writer.writerow({column: "" if row.get(column) is None else row[column] for column in self.COLUMNS})
+
+    def speed(self, solvent, pump, default) -> int:
+        """
+        Returns the calibrated dispense speed of a solvent on a pump (PUMP_PORT_ASSIGNMENTS key), default when not calibrated.
+        """
+        row = self.rows.get((solvent, pump))
+        return default if row is None or row["speed"] is None else row["speed"]
+
+    def dropwise_speed(self, solvent, pump, default) -> int:
+        row = self.rows.get((solvent, pump))
+        return default if row is None or row["dropwise_speed"] is None else row["dropwise_speed"]
+
+    def density(self, solvent, default=None) -> float:
+        """
+        Returns the density [g/mL] of a solvent recorded by a calibration on any pump, default when there is none.
+        """
+        for (name, _), row in self.rows.items():
+            if name == solvent and row["density"] is not None:
+                return row["density"]
+        return default
+
+    def set(self, solvent, pump, speed, density=None, error=None, dropwise_speed=None):
+        """
+        Records the calibrated speed of a solvent on a pump and saves the table.
+        """
+        row = self.rows.get((solvent, pump), {})
+        self.rows[(solvent, pump)] = {
+            "solvent": solvent,
+            "pump": pump,
+            "speed": speed,
+            "dropwise_speed": dropwise_speed if dropwise_speed is not None else row.get("dropwise_speed"),
+            "density": density if density is not None else row.get("density"),
+            "error": error,
+            "calibrated": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        self.save()
+        self._logger.info(f"{solvent} on {pump}: dispense speed {speed}, relative error {error}")
+
+    @staticmethod
+    def relative_error(mass, volume, density) -> float:
+        """
+        Relative error of a dispensed volume [uL] measured as a mass [g] of a solvent of density [g/mL].
+        """
+        return (mass / density * 1000.0 - volume) / volume
+
+    def __len__(self):
+        return len(self.rows)
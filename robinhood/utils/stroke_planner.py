@@ -0,0 +1,142 @@
+import math
+import logging
+from ..config.configuration import CAVRO_SPEED_TABLE
+
+
+class Stroke():
+    """
+    One syringe stroke: aspirate from source, then dispense to one or several destinations.
+
+    :param source: valve position of the aspiration
+    :param dispenses: list of (valve position, volume [uL]) emptied one after the other
+    """
+    def __init__(self, source, dispenses):
+        self.source = source
+        self.dispenses = dispenses
+
+    @property
+    def volume(self) -> float:
+        return sum(volume for _, volume in self.dispenses)
+
+    def ports(self) -> list:
+        """
+        Returns the valve positions of the stroke in order.
+        """
+        return [self.source] + [destination for destination, _ in self.dispenses]
+
+    def __repr__(self):
+        return f"Stroke({self.source} -> {self.dispenses})"
+
+
+def cavro_plunger_time(steps, speed, full_steps=3000, speed_table=CAVRO_SPEED_TABLE) -> float:
+    """
+    [s] time of a plunger move of steps with a Cavro predefined speed code (XCalibur, C3000), the speed table gives
+    the half steps per second of every speed code for a 3000 steps syringe.
+    """
+    return abs(steps) * 3000 / full_steps * 2 / speed_table[speed]
+
+
+class StrokePlanner():
+    """
+    Splits the liquid transfers of a pump into syringe strokes and predicts how long they take.
+
+    Adjacent transfers from the same source port are combined: the syringe aspirates once for several destinations.
+    A group of transfers of total volume V takes ceil(V / syringe volume) strokes, all full but the last one. The
+    valve only switches when the next port is not the one it is at.
+
+    The predicted time is the valve switches, the plunger moves (aspirate and dispense of every stroke at the pump
+    speed) and the serial round trip of every command.
+
+    :param syringe_volume: [uL] syringe volume of the pump
+    :param full_steps: plunger steps of a full stroke
+    :param valve_time: [s] duration of a valve switch
+    :param command_time: [s] serial round trip of a pump command and its idle poll
+    :param plunger_time: function (steps, speed) -> seconds, the Cavro speed table by default
+    """
+    def __init__(self, syringe_volume, full_steps=3000, valve_time=0.5, command_time=0.3, plunger_time=None):
+        self.syringe_volume = syringe_volume
+        self.full_steps = full_steps
+        self.valve_time = valve_time
+        self.command_time = command_time
+        self.plunger_time = plunger_time or (lambda steps, speed: cavro_plunger_time(steps, speed, full_steps))
+        self._logger = logging.getLogger("Stroke_Planner")
+
+    def steps(self, volume) -> int:
+        return int(round(volume / self.syringe_volume * self.full_steps))
+
+    @staticmethod
+    def _groups(transfers) -> list:
+        """
+        Groups adjacent transfers by source: [(source, [(destination, volume), ...]), ...], adjacent transfers to
+        the same destination are added up.
+        """
+        groups = []
+        for volume, source, destination in transfers:
+            if volume <= 0:
+                continue
+            if not groups or groups[-1][0] != source:
+                groups.append((source, []))
+            dispenses = groups[-1][1]
+            if dispenses and dispenses[-1][0] == destination:
+                dispenses[-1] = (destination, dispenses[-1][1] + volume)
+            else:
+                dispenses.append((destination, volume))
+        return groups
+
+    def plan(self, transfers) -> list:
+        """
+        Returns the strokes of a list of (volume, source, destination) transfers, ports are valve positions.
+        """
+        strokes = []
+        for source, dispenses in self._groups(transfers):
+            remaining = [list(dispense) for dispense in dispenses]
+            count = math.ceil(sum(volume for _, volume in dispenses) / self.syringe_volume - 1e-9)
+            for _ in range(count):
+                capacity, stroke = self.syringe_volume, []
+                while remaining and capacity > 1e-9:
+                    volume = min(remaining[0][1], capacity)
+                    stroke.append((remaining[0][0], volume))
+                    capacity -= volume
+                    remaining[0][1] -= volume
+                    if remaining[0][1] <= 1e-9:
+                        remaining.pop(0)
+                strokes.append(Stroke(source, stroke))
+        return strokes
+
+    def valve_switches(self, strokes, valve=None) -> int:
+        """
+        Number of valve switches of the strokes, starting with the valve at valve (None when unknown).
+        """
+        switches = 0
+        for stroke in strokes:
+            for port in stroke.ports():
+                if port != valve:
+                    switches += 1
+                    valve = port
+        return switches
+
+    def predict(self, strokes, speed, commands=1, valve=None) -> float:
+        """
+        [s] predicted time of strokes run at a predefined speed and sent in commands serial commands.
+        """
+        steps = sum(2 * self.steps(stroke.volume) for stroke in strokes)
+        return (self.valve_switches(strokes, valve) * self.valve_time + self.plunger_time(steps, speed)
+                + commands * self.command_time)
+
+    def report(self, name, transfers, speed, commands=None) -> dict:
+        """
+        Returns the plan of a list of (volume, source, destination) transfers:
+        {"operation", "transfers", "strokes", "valve_switches", "volume", "commands", "time"}
+        :param commands: serial commands sent, one per transfer (dispense calls) when None
+        """
+        strokes = self.plan(transfers)
+        commands = len(transfers) if commands is None else commands
+        return {
+            "operation": name,
+            "transfers": len(transfers),
+            "strokes": len(strokes),
+            "valve_switches": self.valve_switches(strokes),
+            "volume": sum(stroke.volume for stroke in strokes),
+            "commands": commands,
+            "time": self.predict(strokes, speed, commands),
+        }
@@ -0,0 +1,120 @@
+import logging
+import threading
+import numpy as np
+from .clock import RealClock
+
+
+class TelemetryRecorder():
+    """
+    Samples the robot state on a background thread into a preallocated ring buffer memory-mapped on disk
+    (numpy memmap), for post-hoc analysis of motion durations and contact events.
+
+    Every row is one sample: time, joint positions q, joint velocities dq, joint torques tau_J, end effector position
+    (x, y, z from O_T_EE) and the estimated external wrench O_F_ext_hat_K. The buffer is allocated once, a sample is
+    written in place and overwrites the oldest one when the buffer is full, so recording does not grow the memory.
+    Sample times come from the clock of the tracer, a time window around a traced operation can be exported with
+    export_span.
+
+    :param read_function: function returning the robot state, None when no state is available (the sample is skipped)
+    :param file_path: file of the memory-mapped buffer, None keeps the buffer in memory
+    :param rate: [Hz] sampling rate
+    :param capacity: number of samples kept
+    :param clock: clock of the sample times
+    """
+    COLUMNS = (["time"] + [f"q{i}" for i in range(1, 8)] + [f"dq{i}" for i in range(1, 8)] + [f"tau{i}" for i in range(1, 8)]
+               + ["x", "y", "z"] + ["fx", "fy", "fz", "mx", "my", "mz"])
+
+    def __init__(self, read_function, file_path=None, rate=100.0, capacity=60000, clock=None):
+        self._read = read_function
+        self.file_path = file_path
+        self.period = 1.0 / rate
+        self.capacity = capacity
+        self.clock = clock if clock is not None else RealClock()
+        shape = (capacity, len(self.COLUMNS))
+        if file_path is None:
+            self.buffer = np.zeros(shape)
+        else:
+            self.buffer = np.memmap(file_path, dtype=np.float64, mode="w+", shape=shape)
+        self.count = 0 # samples written since the start, the next sample goes to row count % capacity
+        self.read_errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._logger = logging.getLogger("Telemetry")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry_recorder", daemon=True)
+        self._thread.start()
+        self._logger.info(f"Recording robot telemetry at {1.0 / self.period:.0f} Hz, {self.capacity} samples kept")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if isinstance(self.buffer, np.memmap):
+            self.buffer.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.period):
+            try:
+                state = self._read()
+            except Exception as e:
+                self.read_errors += 1
+                self._logger.debug(f"Telemetry read failed: {e!r}")
+                continue
+            if state is not None:
+                self.record(self.clock.now(), state)
+
+    def record(self, time, state):
+        """
+        Writes a sample of a robot state (frankx RobotState or an object with the same attributes) in place.
+        """
+        with self._lock:
+            row = self.buffer[self.count % self.capacity]
+            row[0] = time
+            row[1:8] = state.q
+            row[8:15] = state.dq
+            row[15:22] = state.tau_J
+            row[22:25] = state.O_T_EE[12:15]
+            row[25:31] = getattr(state, "O_F_ext_hat_K", (0.0,) * 6)
+            self.count += 1
+
+    def samples(self) -> np.ndarray:
+        """
+        Returns a copy of the samples kept in the buffer, oldest first.
+        """
+        with self._lock:
+            if self.count <= self.capacity:
+                return np.array(self.buffer[:self.count])
+            start = self.count % self.capacity
+            return np.concatenate((self.buffer[start:], self.buffer[:start]))
+
+    def window(self, start, end) -> np.ndarray:
+        """
+        Returns the samples with start <= time <= end, oldest first.
+        """
+        samples = self.samples()
+        return samples[(samples[:, 0] >= start) & (samples[:, 0] <= end)]
+
+    def export_window(self, start, end, file_path) -> int:
+        """
+        Writes the samples between start and end to a csv file with a header row, returns the number of samples.
+        """
+        samples = self.window(start, end)
+        np.savetxt(file_path, samples, delimiter=",", header=",".join(self.COLUMNS), comments="")
+        self._logger.info(f"{len(samples)} telemetry samples saved to {file_path}")
+        return len(samples)
+
+    def export_span(self, span, file_path, margin=1.0) -> int:
+        """
+        Writes the samples recorded during a traced operation (a tracing Span), plus margin seconds
+        before and after it, to a csv file.
+        """
+        end = span.end if span.end is not None else self.clock.now()
+        if self.count > self.capacity and self.buffer[self.count % self.capacity][0] > span.start - margin:
+            self._logger.warning(f"The telemetry buffer does not reach back to the start of {span.name}")
+        return self.export_window(span.start - margin, end + margin, file_path)
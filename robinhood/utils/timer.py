@@ -2,15 +2,18 @@ import time
 import threading
 from datetime import datetime
 import logging
+from .clock import RealClock
 
 class Timer():
     """
     This class can be used to generate long time pauses.
 
     :param display_timer: is an integer controls how long it takes to display updates, given in seconds, of the elapsed time
+    :param clock: VirtualClock when running in simulation mode, the pause then advances the simulated time instead
     """
-    def __init__(self,display_updates_timer=1):
+    def __init__(self,display_updates_timer=1,clock=None):
         self.seconds=0
+        self.clock=clock
         self.display_updates_timer=display_updates_timer
         self.display_time=False
         self.time_display_thread=threading.Thread(target=self.display_current_time)
@@ -61,6 +64,10 @@ class Timer():
         """
         Starts a thread that allows displaying the elapsed time while producing a delay.
         """
+        if self.clock is not None and not isinstance(self.clock, RealClock):
+            self.clock.sleep(self.seconds+1)
+            self._logger.info(f'[INFO] Waiting finished....')
+            return
         self.display_time=True
         try:
             self.time_display_thread.start()
@@ -0,0 +1,240 @@
+import json
+import logging
+import functools
+import threading
+from .clock import RealClock
+
+
+class Span():
+    """
+    A single traced call.
+
+    :param name: traced method, e.g. RobInHood.vial_rack_to_pump or Tecan.dispense
+    :param device: device the call ran on (RiH, robot, pump, pump_2, quantos...)
+    :param args: arguments of the call, stored as short strings
+    :param parent: span the call was made from on the same thread (None for top level calls)
+    """
+    def __init__(self, name, device, args, start, thread, parent=None):
+        self.name = name
+        self.device = device
+        self.args = args
+        self.start = start
+        self.end = None
+        self.thread = thread
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.error = None
+
+    def duration(self):
+        if self.end is None:
+            return None
+        return self.end - self.start
+
+
+class Tracer():
+    """
+    Records nested spans of the RobInHood operations and of the device calls they make.
+
+    Objects are instrumented by replacing their methods with wrappers on the instance, so the classes
+    and the other objects are left untouched. Every thread keeps its own span stack, spans of
+    operations running on the station scheduler nest correctly. Times come from the RobInHood clock,
+    so a simulated campaign is traced in simulated time.
+
+    e.g. tracer = rih.enable_tracing()
+         ... run the workflow ...
+         tracer.export_chrome_trace("trace.json") # open in chrome://tracing or ui.perfetto.dev
+         tracer.log_summary()
+
+    :param clock: RealClock (default) or VirtualClock
+    :param max_arg_length: arguments longer than this are truncated in the trace
+    """
+    def __init__(self, clock=None, max_arg_length=80):
+        self.clock = clock if clock is not None else RealClock()
+        self.max_arg_length = max_arg_length
+        self.spans = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = {}
+        self._instrumented = []
+        self._logger = logging.getLogger("Tracer")
+
+    def _format_arg(self, value):
+        text = repr(value)
+        if len(text) > self.max_arg_length:
+            text = text[:self.max_arg_length - 3] + "..."
+        return text
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def start_span(self, name, device="", args=None) -> Span:
+        stack = self._stack()
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+        args = {key: self._format_arg(value) for key, value in (args or {}).items()}
+        span = Span(name, device, args, self.clock.now(), thread.ident, stack[-1] if stack else None)
+        stack.append(span)
+        return span
+
+    def end_span(self, span, error=None):
+        span.end = self.clock.now()
+        if error is not None:
+            span.error = repr(error)
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        with self._lock:
+            self.spans.append(span)
+
+    def span(self, name, device="", **args):
+        """
+        Context manager tracing a block of code that is not a method call.
+        e.g. with tracer.span("sample 3", device="workflow", vial=3): ...
+        """
+        return _SpanContext(self, name, device, args)
+
+    def wrap(self, function, name, device=""):
+        """
+        Returns a wrapper of function that records a span for every call.
+        """
+        @functools.wraps(function)
+        def traced(*args, **kwargs):
+            call_args = {f"arg{i}": value for i, value in enumerate(args)}
+            call_args.update(kwargs)
+            span = self.start_span(name, device, call_args)
+            try:
+                result = function(*args, **kwargs)
+            except BaseException as e:
+                self.end_span(span, error=e)
+                raise
+            self.end_span(span)
+            return result
+        traced._traced_function = function
+        return traced
+
+    def instrument(self, obj, device, methods=None, exclude=(), prefix=None):
+        """
+        Traces the methods of an object (RobInHood, FrankxHelpers, pylabware device...).
+
+        :param obj: object to instrument, None is ignored (e.g. a device that did not connect)
+        :param device: device name recorded on the spans
+        :param methods: names of the methods to trace, every public method of the class when None
+        :param exclude: method names not traced
+        :param prefix: span name prefix, the class name when None
+        """
+        if obj is None:
+            return
+        if methods is None:
+            methods = [name for name in dir(type(obj)) if not name.startswith("_") and callable(getattr(type(obj), name, None))]
+        prefix = prefix or type(obj).__name__
+        for name in methods:
+            if name in exclude:
+                continue
+            function = getattr(obj, name, None)
+            if not callable(function) or hasattr(function, "_traced_function"):
+                continue
+            setattr(obj, name, self.wrap(function, f"{prefix}.{name}", device))
+            self._instrumented.append((obj, name))
+
+    def remove_instrumentation(self):
+        """
+        Restores the original methods of every instrumented object.
+        """
+        for obj, name in self._instrumented:
+            try:
+                delattr(obj, name)
+            except AttributeError:
+                pass
+        self._instrumented = []
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+    def chrome_trace(self) -> dict:
+        """
+        Returns the finished spans in the Chrome trace event format, also read by Perfetto.
+        Each thread is a track, nested calls are shown under the call they were made from.
+        """
+        with self._lock:
+            spans = list(self.spans)
+            threads = dict(self._threads)
+        origin = min((span.start for span in spans), default=0.0)
+        tids = {ident: index for index, ident in enumerate(threads)}
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tids[ident], "args": {"name": name}}
+            for ident, name in threads.items()
+        ]
+        for span in sorted(spans, key=lambda span: (span.start, span.depth)):
+            args = dict(span.args)
+            if span.error is not None:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": span.device,
+                "ph": "X",
+                "ts": (span.start - origin) * 1e6,
+                "dur": span.duration() * 1e6,
+                "pid": 1,
+                "tid": tids[span.thread],
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_path):
+        """
+        Writes the trace as a json file that can be opened in chrome://tracing or ui.perfetto.dev.
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+        self._logger.info(f"Trace with {len(self.spans)} spans saved to {file_path}")
+
+    def summary(self) -> dict:
+        """
+        returns: flat latency summary {span name: {"device", "count", "errors", "total", "mean", "min", "max"}}
+        sorted by total time, durations in seconds
+        """
+        with self._lock:
+            spans = list(self.spans)
+        summary = {}
+        for span in spans:
+            entry = summary.setdefault(span.name, {"device": span.device, "count": 0, "errors": 0, "total": 0.0,
+                                                   "min": float("inf"), "max": 0.0})
+            duration = span.duration()
+            entry["count"] += 1
+            entry["errors"] += span.error is not None
+            entry["total"] += duration
+            entry["min"] = min(entry["min"], duration)
+            entry["max"] = max(entry["max"], duration)
+        for entry in summary.values():
+            entry["mean"] = entry["total"] / entry["count"]
+        return dict(sorted(summary.items(), key=lambda item: item[1]["total"], reverse=True))
+
+    def log_summary(self, top=None):
+        """
+        Logs the per-method latency summary, slowest methods (by total time) first.
+        """
+        for name, entry in list(self.summary().items())[:top]:
+            self._logger.info(f"{name}: {entry['count']} calls, total {entry['total']:.1f} s, mean {entry['mean']:.2f} s, "
+                              f"min {entry['min']:.2f} s, max {entry['max']:.2f} s, {entry['errors']} errors")
+
+
+class _SpanContext():
+
+    def __init__(self, tracer, name, device, args):
+        self.tracer = tracer
+        self.name = name
+        self.device = device
+        self.args = args
+        self.span = None
+
+    def __enter__(self):
+        self.span = self.tracer.start_span(self.name, self.device, self.args)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.end_span(self.span, error=exc_value)
+        return False
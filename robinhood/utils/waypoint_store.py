@@ -0,0 +1,151 @@
+import json
+import logging
+
+
+class Waypoint():
+    """
+    A taught robot pose.
+
+    :param kind: "j" for joint positions (move_robot_j), "x" for a cartesian pose [x, y, z, a, b, c] (linear_motion)
+    :param pose: list of joint positions or cartesian coordinates
+    :param profile: motion profile used to move to the waypoint (see MOTION_PROFILES), None to use the one of the segment
+    """
+    def __init__(self, kind, pose, profile=None):
+        self.kind = kind
+        self.pose = list(pose)
+        self.profile = profile
+
+    def __eq__(self, other):
+        return isinstance(other, Waypoint) and self.kind == other.kind and self.pose == other.pose
+
+    def __repr__(self):
+        return f"Waypoint({self.kind}, {self.pose})"
+
+
+class WaypointStore():
+    """
+    Motion waypoint database loaded from a json file (see robinhood/config/waypoints.json).
+
+    The file holds
+        joint_poses = named joint positions
+        cartesian_poses = named cartesian poses [x, y, z, a, b, c]
+        pose_profiles = motion profile of the moves to a named pose next to a station (e.g. "approach"), moves to
+        the other named poses use the profile of the segment they belong to
+        paths = named sequences of joint poses (transits between stations)
+        routes = route graph between stations built from taught motion chains (see RouteGraph)
+        stations = slot stations (rack, IKA...) described by a grid, phase templates and per-slot overrides
+
+    Slot poses are generated from the grid definition: slot n of a grid with c columns is in row (n - first_slot) // c
+    and column (n - first_slot) % c, each grid parameter (y, z...) is origin + row/column pitch. Per-slot overrides replace
+    generated parameters with taught values, an operation key ("pick", "place") overrides them for that operation only.
+    Every phase template gives the pose of a phase (entry, grasp, lift...) from the slot parameters.
+
+    All waypoints are resolved when the file is loaded and kept in a dictionary indexed by (station, slot, phase),
+    station waypoints that do not depend on the slot have slot None.
+
+    :param file_path: path of the waypoints json file
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._logger = logging.getLogger("Waypoint_Store")
+        with open(file_path, "r") as f:
+            data = json.load(f)
+        self.joint_poses = data["joint_poses"]
+        self.cartesian_poses = data.get("cartesian_poses", {})
+        self.pose_profiles = data.get("pose_profiles", {})
+        self.path_names = data["paths"]
+        self.paths = {name: [self.named(pose) for pose in poses] for name, poses in data["paths"].items()}
+        self.routes = data.get("routes", {})
+        self.stations = data["stations"]
+        self.index = {}
+        self.sequences = {}
+        for station, definition in self.stations.items():
+            self._build_station(station, definition)
+        self._logger.debug(f"{len(self.index)} waypoints loaded from {file_path}")
+
+    def named(self, name) -> Waypoint:
+        """
+        Returns the waypoint of a named joint or cartesian pose.
+        """
+        if name in self.joint_poses:
+            return Waypoint("j", self.joint_poses[name], self.pose_profiles.get(name))
+        if name in self.cartesian_poses:
+            return Waypoint("x", self.cartesian_poses[name], self.pose_profiles.get(name))
+        raise KeyError(f"No pose named {name}")
+
+    def _resolve(self, value, orientation):
+        if isinstance(value, str):
+            return self.named(value)
+        return Waypoint("x", list(value) + list(orientation)[len(value) - 3:])
+
+    @staticmethod
+    def _grid_parameters(grid, slot):
+        position = slot - grid.get("first_slot", 1)
+        row, column = divmod(position, grid["columns"])
+        parameters = {}
+        for name, origin in grid["origin"].items():
+            value = origin + row * grid.get("row_pitch", {}).get(name, 0.0) + column * grid.get("column_pitch", {}).get(name, 0.0)
+            value += grid.get("column_offset", {}).get(name, [0.0] * grid["columns"])[column]
+            parameters[name] = value
+        for name, values in grid.get("per_row", {}).items():
+            parameters[name] = values[row]
+        return parameters
+
+    def _build_station(self, station, definition):
+        grid = definition["grid"]
+        orientation = definition["orientation"]
+        for phase, pose in definition.get("waypoints", {}).items():
+            self.index[(station, None, phase)] = self._resolve(pose, orientation)
+
+        for slot in range(grid.get("first_slot", 1), grid.get("first_slot", 1) + grid["slots"]):
+            overrides = definition.get("overrides", {}).get(str(slot), {})
+            parameters = self._grid_parameters(grid, slot)
+            parameters.update({name: value for name, value in overrides.items() if not isinstance(value, dict)})
+
+            for phase, template in definition["phases"].items():
+                values = dict(parameters)
+                values.update(overrides.get(template.get("operation"), {}))
+                coordinates = [values[template[axis]] if isinstance(template[axis], str) else template[axis] for axis in ("x", "y", "z")]
+                coordinates[2] += template.get("dz", 0.0)
+                self.index[(station, slot, phase)] = Waypoint("x", [round(value, 6) for value in coordinates] + list(orientation))
+
+            for phase, pose in overrides.get("phases", {}).items():
+                self.index[(station, slot, phase)] = self._resolve(pose, orientation)
+            for operation, sequence in definition["sequences"].items():
+                self.sequences[(station, slot, operation)] = overrides.get("sequences", {}).get(operation, sequence)
+
+    def slots(self, station) -> list:
+        """
+        Returns the slot numbers of a station.
+        """
+        grid = self.stations[station]["grid"]
+        return list(range(grid.get("first_slot", 1), grid.get("first_slot", 1) + grid["slots"]))
+
+    def get(self, station, slot, phase) -> Waypoint:
+        """
+        Returns the waypoint of a phase (e.g. "pick_grasp") of a station slot, slot None for station waypoints.
+        """
+        try:
+            return self.index[(station, slot, phase)]
+        except KeyError:
+            raise KeyError(f"No waypoint for {station} slot {slot} phase {phase}") from None
+
+    def path(self, name) -> list:
+        """
+        Returns the joint waypoints of a named transit path.
+        """
+        return self.paths[name]
+
+    def sequence(self, station, slot, operation) -> list:
+        """
+        Returns the steps of an operation (e.g. "pick", "place") on a station slot. Steps are waypoints,
+        or the gripper actions "clamp" and "release".
+        """
+        try:
+            steps = self.sequences[(station, slot, operation)]
+        except KeyError:
+            raise KeyError(f"No {operation} sequence for {station} slot {slot}") from None
+        return [step if step in ("clamp", "release") else self.get(station, slot, step) for step in steps]
+
+    def release_width(self, station) -> float:
+        return self.stations[station].get("release_width", 0.03)
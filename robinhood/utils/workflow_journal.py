@@ -0,0 +1,156 @@
+import os
+import json
+import logging
+import datetime
+import threading
+
+
+class WorkflowJournal():
+    """
+    Append-only journal of a campaign. Every completed step of every sample is written as one json line
+    together with the physical state it leaves behind (vial locations, doors, holder position, primed lines,
+    mounted cartridge), so a campaign interrupted by exit() or a crash can be resumed without repeating
+    finished work.
+
+    Lines are flushed and synced to disk as they are written, a truncated last line (power cut) is ignored
+    when the journal is read back.
+
+    :param file_path: path of the .jsonl journal file
+    :param resume: when True the steps already in the file are considered done, when False a new campaign
+    is started in the same file and earlier records are ignored
+    """
+    def __init__(self, file_path, resume=True):
+        self.file_path = file_path
+        self.completed = {}
+        self.interrupted = []
+        self.state = {"vials": {}}
+        self._started = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("Workflow_Journal")
+
+        if resume:
+            self._replay()
+        self._terminate_last_line()
+        self._append({"type": "campaign_start", "resume": resume})
+
+    @staticmethod
+    def _key(sample_id, step):
+        return f"{sample_id}/{step}"
+
+    @staticmethod
+    def _json_safe(value):
+        try:
+            json.dumps(value)
+            return value
+        except (TypeError, ValueError):
+            return repr(value)
+
+    def _apply_state(self, changes):
+        for key, value in (changes or {}).items():
+            if key == "vials":
+                self.state["vials"].update(value)
+            else:
+                self.state[key] = value
+
+    def _replay(self):
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, "r") as f:
+            lines = f.readlines()
+        for number, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                self._logger.warning(f"Ignoring unreadable line {number + 1} of {self.file_path}")
+                continue
+            if record["type"] == "campaign_start" and not record["resume"]:
+                self.completed, self._started, self.state = {}, {}, {"vials": {}}
+            elif record["type"] == "step_started":
+                self._started[self._key(record["sample"], record["step"])] = record
+            elif record["type"] == "step_done":
+                key = self._key(record["sample"], record["step"])
+                self._started.pop(key, None)
+                self.completed[key] = record
+                self._apply_state(record.get("state"))
+            elif record["type"] == "step_failed":
+                self._started.pop(self._key(record["sample"], record["step"]), None)
+                self._apply_state(record.get("state"))
+            elif record["type"] == "state":
+                self._apply_state(record["state"])
+        self.interrupted = list(self._started.values())
+        self._started = {}
+
+    def _terminate_last_line(self):
+        """
+        Ends a truncated last line, otherwise the next record would be appended to it and lost on replay.
+        """
+        if not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0:
+            return
+        with open(self.file_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _append(self, record):
+        record = {"time": datetime.datetime.now().isoformat(timespec="seconds"), **record}
+        with self._lock, open(self.file_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_done(self, sample_id, step) -> bool:
+        """
+        Returns True when the step of the sample was completed in this campaign.
+        """
+        return self._key(sample_id, step) in self.completed
+
+    def result(self, sample_id, step):
+        """
+        Returns the result recorded for a completed step (e.g. the mass returned by quantos_dosing).
+        """
+        return self.completed[self._key(sample_id, step)].get("result")
+
+    def completed_steps(self, sample_id) -> list:
+        """
+        Returns the completed steps of a sample in the order they were run.
+        """
+        return [record["step"] for record in self.completed.values() if record["sample"] == str(sample_id)]
+
+    def step_started(self, sample_id, step, method):
+        self._append({"type": "step_started", "sample": str(sample_id), "step": step, "method": method})
+
+    def step_done(self, sample_id, step, method, result=None, state=None):
+        """
+        Records a completed step and the physical state it leaves behind.
+        """
+        record = {"type": "step_done", "sample": str(sample_id), "step": step, "method": method,
+                  "result": self._json_safe(result), "state": state or {}}
+        self._append(record)
+        self.completed[self._key(sample_id, step)] = record
+        self._apply_state(state)
+
+    def step_failed(self, sample_id, step, method, error, state=None):
+        self._append({"type": "step_failed", "sample": str(sample_id), "step": step, "method": method,
+                      "error": repr(error), "state": state or {}})
+        self._apply_state(state)
+
+    def update_state(self, **changes):
+        """
+        Records a change of the physical state made outside a journaled step,
+        e.g. journal.update_state(vials={"3": "rack"}) after an operator intervention.
+        """
+        self._append({"type": "state", "state": changes})
+        self._apply_state(changes)
+
+    def log_resume_summary(self):
+        """
+        Logs the completed work and the last known physical state when resuming a campaign.
+        """
+        samples = sorted({record["sample"] for record in self.completed.values()})
+        self._logger.info(f"Resuming from {self.file_path}: {len(self.completed)} steps of {len(samples)} samples already done")
+        for sample in samples:
+            self._logger.info(f"Sample {sample}: {self.completed_steps(sample)}")
+        for record in self.interrupted:
+            self._logger.warning(f"Step {record['step']} of sample {record['sample']} ({record['method']}) was interrupted, "
+                                 f"check the hood before resuming, it will be run again")
+        self._logger.info(f"Last known state: {self.state}")
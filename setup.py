@@ -9,4 +9,5 @@ setup(
     packages=find_packages(),
     install_requires=[],
     include_package_data=True,
+    package_data={"robinhood.config": ["*.json"]},
 )
@@ -0,0 +1,69 @@
+import time
+import pytest
+
+from robinhood.drivers.arduino_station import ArduinoStation
+
+
+class FakeSerial():
+    """
+    Serial port replaying firmware replies, readline returns b"" (read timeout) when there are none left.
+    """
+    def __init__(self, replies=()):
+        self.replies = list(replies)
+        self.written = []
+        self.resets = 0
+
+    def reset_input_buffer(self):
+        self.resets += 1
+
+    def write(self, data):
+        self.written.append(data)
+
+    def readline(self):
+        return self.replies.pop(0) if self.replies else b""
+
+
+def test_done_ends_the_wait_before_the_fallback_delay():
+    serial = FakeSerial([b"ACK c\r\n", b"DONE c\r\n"])
+    station = ArduinoStation(serial, ack_protocol=True, ack_timeout=1.0)
+    start = time.monotonic()
+    station.send_command(b"c", fallback_delay=5)
+    assert time.monotonic() - start < 1.0
+    assert serial.written == [b"c"] and serial.resets == 1
+    assert station._pending_command is None
+
+
+def test_replies_to_other_commands_are_ignored():
+    serial = FakeSerial([b"DONE o", b"ACK c", b"", b"DONE c"])
+    station = ArduinoStation(serial, ack_protocol=True, ack_timeout=1.0)
+    start = time.monotonic()
+    station.send_command(b"c", fallback_delay=5)
+    assert time.monotonic() - start < 1.0
+
+
+def test_old_firmware_falls_back_to_the_fixed_delay():
+    station = ArduinoStation(FakeSerial(), ack_protocol=True, ack_timeout=0.05)
+    start = time.monotonic()
+    station.send_command(b"c", fallback_delay=0.2)
+    assert 0.2 <= time.monotonic() - start < 1.0
+
+
+def test_missing_done_after_an_ack_times_out():
+    station = ArduinoStation(FakeSerial([b"ACK c"]), ack_protocol=True, ack_timeout=0.05, done_timeout=0.1)
+    with pytest.raises(TimeoutError):
+        station.send_command(b"c", fallback_delay=5)
+
+
+def test_commands_can_run_while_the_caller_continues():
+    serial = FakeSerial()
+    station = ArduinoStation(serial, ack_protocol=False)
+    station.send_command(b"h", fallback_delay=0.1, wait=False)
+    assert station._pending_command == b"h" and serial.resets == 0
+    start = time.monotonic()
+    station.wait_for_completion()
+    assert time.monotonic() - start >= 0.1
+    station.wait_for_completion() # nothing pending
+
+
+def test_station_logger_is_named_after_the_station():
+    assert ArduinoStation(FakeSerial(), name="Capper")._logger.name == "Capper"
@@ -0,0 +1,61 @@
+import threading
+import pytest
+
+from robinhood.utils.clock import VirtualClock
+
+
+def test_sleep_advances_the_thread_time_instantly():
+    clock = VirtualClock()
+    clock.sleep(10)
+    clock.sleep(-1)
+    assert clock.now() == 10 and clock.horizon == 10
+
+
+def test_busy_station_delays_the_next_operation():
+    clock = VirtualClock()
+    clock.busy("arm", 5, "move")
+    clock.set_thread_time(2)
+    clock.busy("arm", 3, "move")
+    assert clock.now() == 8
+    assert clock.intervals["arm"] == [(0, 5, "move"), (5, 8, "move")]
+
+
+def test_reserve_does_not_block_the_calling_thread():
+    clock = VirtualClock()
+    end = clock.reserve("capper", 60, "right")
+    clock.busy("arm", 10)
+    assert end == 60 and clock.now() == 10
+    clock.wait_until(end)
+    assert clock.now() == 60
+
+
+def test_threads_overlap_in_simulated_time():
+    clock = VirtualClock()
+
+    def worker(station):
+        clock.set_thread_time(0)
+        clock.busy(station, 30)
+
+    threads = [threading.Thread(target=worker, args=(station,)) for station in ("pump", "quantos")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert clock.now() == 0
+    clock.synchronise()
+    assert clock.now() == 30
+
+
+def test_report_gives_utilisation_and_idle_gaps():
+    clock = VirtualClock()
+    clock.busy("arm", 10)
+    clock.set_thread_time(20)
+    clock.busy("arm", 10)
+    clock.busy("pump", 0.5)
+    report = clock.report()
+    assert report["makespan"] == 30.5
+    arm = report["stations"]["arm"]
+    assert arm["busy"] == 20
+    assert arm["utilisation"] == pytest.approx(20 / 30.5)
+    assert arm["idle_gaps"] == [(10, 20)] # the 0.5 s tail is below min_gap
+    assert report["stations"]["pump"]["idle_gaps"] == [(0.0, 30)]
@@ -0,0 +1,45 @@
+import threading
+import time
+
+from robinhood.utils.device_bringup import DeviceBringup
+
+
+def test_devices_are_brought_up_concurrently():
+    barrier = threading.Barrier(3, timeout=2.0)
+
+    def device():
+        barrier.wait() # only passes when the three devices connect at the same time
+        return True
+
+    bringup = DeviceBringup(max_workers=3)
+    for name in ("pump", "quantos", "ika"):
+        bringup.add_device(name, device)
+    report = bringup.run()
+    assert all(entry["connected"] for entry in report.values())
+    assert bringup.total_latency < 2.0
+
+
+def test_failures_are_reported_with_their_error():
+    def broken():
+        raise IOError("port busy")
+
+    bringup = DeviceBringup()
+    bringup.add_device("robot", broken, critical=True)
+    bringup.add_device("camera", lambda: False)
+    bringup.add_device("capper", lambda: True, critical=True)
+    report = bringup.run()
+    assert "port busy" in report["robot"]["error"]
+    assert report["camera"] == {"connected": False, "latency": report["camera"]["latency"], "critical": False, "error": None}
+    assert bringup.connected("capper")
+    assert not bringup.connected("unknown")
+    assert bringup.failed_critical_devices() == ["robot"]
+    bringup.log_report()
+
+
+def test_total_latency_is_bounded_by_the_slowest_device():
+    bringup = DeviceBringup()
+    for seconds in (0.05, 0.1, 0.15):
+        bringup.add_device(f"device_{seconds}", lambda seconds=seconds: time.sleep(seconds) or True)
+    bringup.run()
+    assert bringup.total_latency < 0.3
+    assert max(entry["latency"] for entry in bringup.report.values()) >= 0.15
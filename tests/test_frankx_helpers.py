@@ -0,0 +1,91 @@
+import pytest
+
+from robinhood.utils import frankx_helpers
+from robinhood.utils.frankx_helpers import FrankxHelpers
+
+
+class FakeRobot():
+    """
+    Robot whose moves hit an obstacle when contact is True: every stop reaction of the MotionData fires.
+    """
+    def __init__(self, host, contact=False):
+        self.contact = contact
+        self.moves = []
+
+    def recover_from_errors(self):
+        return True
+
+    def set_dynamic_rel(self, dynamic_rel):
+        self.dynamic_rel = dynamic_rel
+
+    def current_pose(self):
+        return None
+
+    def read_once(self):
+        return None
+
+    def stop(self):
+        return
+
+    def move(self, motion, data):
+        self.moves.append(motion)
+        if self.contact:
+            reactions = data.reactions # copies held by the MotionData
+            for reaction in reactions:
+                reaction.has_fired = True
+            data.reactions = reactions
+        return True
+
+
+class FakeGripper():
+    def __init__(self, host):
+        pass
+
+
+@pytest.fixture
+def helpers(monkeypatch):
+    monkeypatch.setattr(frankx_helpers, "Robot", FakeRobot)
+    monkeypatch.setattr(frankx_helpers, "Gripper", FakeGripper)
+    helpers = FrankxHelpers("fake")
+    yield helpers
+    helpers.state_cache.stop()
+    helpers.motions.shutdown()
+
+
+def test_guarded_move_reports_contact(helpers):
+    helpers.robot.contact = True
+    assert helpers.guarded_move_x([0.4, 0.0, 0.2, 0.0, 0.0, 0.0], 10.0, profile="grasp") is True
+    assert len(helpers.robot.moves) == 1
+
+
+def test_guarded_move_without_contact(helpers):
+    assert helpers.guarded_move_x([0.4, 0.0, 0.2, 0.0, 0.0, 0.0], 10.0, profile="grasp") is False
+
+
+def test_add_constraints_returns_the_motion_data(helpers):
+    data = helpers.motion_data("grasp")
+    assert helpers.add_constraints(data, force_limit=10.0, time_limit=2.0) is data
+    assert len(data.reactions) == 2
+    assert not helpers.reaction_fired(data)
+
+
+class FakeWaypoint():
+    def __init__(self, affine):
+        self.affine = affine
+        self.blend_max_distance = 0.0
+
+
+class FakeWaypointMotion():
+    def __init__(self, waypoints):
+        self.waypoints = waypoints
+
+
+def test_path_is_one_motion_blended_except_the_last_pose(helpers, monkeypatch):
+    monkeypatch.setattr(frankx_helpers, "Waypoint", FakeWaypoint)
+    monkeypatch.setattr(frankx_helpers, "WaypointMotion", FakeWaypointMotion)
+    poses = [[0.4, 0.0, 0.3, 0.0, 0.0, 0.0], [0.4, 0.1, 0.3, 0.0, 0.0, 0.0], [0.4, 0.2, 0.2, 0.0, 0.0, 0.0]]
+    helpers.move_robot_path(poses, blend_radius=0.02)
+    helpers.move_robot_path(poses)
+    blended, exact = helpers.robot.moves
+    assert [waypoint.blend_max_distance for waypoint in blended.waypoints] == [0.02, 0.02, 0.0]
+    assert [waypoint.blend_max_distance for waypoint in exact.waypoints] == [0.0, 0.0, 0.0]
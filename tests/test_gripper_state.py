@@ -0,0 +1,92 @@
+from robinhood.drivers.sim_devices import SimFrankxHelpers
+from robinhood.utils.clock import VirtualClock
+from robinhood.utils.gripper_state import GripperState
+
+
+class FakeGripper():
+    def __init__(self, readable=True):
+        self.readable = readable
+        self._width = 0.08
+        self.commands = []
+
+    def move(self, width):
+        self.commands.append(("move", width))
+        self._width = width
+        return True
+
+    def clamp(self):
+        self.commands.append(("clamp",))
+        self._width = 0.02
+        return True
+
+    def width(self):
+        if not self.readable:
+            raise RuntimeError("gripper not readable")
+        return self._width
+
+    def is_grasping(self):
+        if not self.readable:
+            raise RuntimeError("gripper not readable")
+        return self._width == 0.02
+
+
+def test_repeated_openings_are_skipped():
+    state, gripper = GripperState(0.001), FakeGripper()
+    assert state.open_gripper(gripper, 0.04)
+    assert not state.open_gripper(gripper, 0.0405)
+    assert state.open_gripper(gripper, 0.03)
+    assert gripper.commands == [("move", 0.04), ("move", 0.03)]
+    assert state.skipped == 1
+
+
+def test_opening_runs_when_the_measured_width_disagrees():
+    state, gripper = GripperState(0.001), FakeGripper()
+    state.open_gripper(gripper, 0.04)
+    gripper._width = 0.06 # moved by hand
+    assert state.open_gripper(gripper, 0.04)
+
+
+def test_clamp_is_skipped_while_the_object_is_held():
+    state, gripper = GripperState(0.001), FakeGripper()
+    assert state.close_gripper(gripper)
+    assert not state.close_gripper(gripper)
+    gripper._width = 0.0 # object dropped
+    assert state.close_gripper(gripper)
+    assert state.close_gripper(gripper, force=True)
+
+
+def test_unreadable_gripper_always_runs_the_command():
+    state, gripper = GripperState(0.001), FakeGripper(readable=False)
+    assert state.open_gripper(gripper, 0.04)
+    assert state.open_gripper(gripper, 0.04)
+    assert state.close_gripper(gripper)
+    assert state.close_gripper(gripper)
+    assert len(gripper.commands) == 4 and state.skipped == 0
+
+
+def test_unknown_measurement_is_not_skipped():
+    state = GripperState(0.001)
+    state.moved(0.04)
+    assert state.needs_move(0.04, measured_width=None)
+    assert not state.needs_move(0.04, measured_width=0.04)
+    state.clamped()
+    assert state.needs_clamp(measured_grasping=None)
+    assert not state.needs_clamp(measured_grasping=True)
+
+
+def test_failed_command_makes_the_next_one_run():
+    state, gripper = GripperState(0.001), FakeGripper()
+    gripper.move = lambda width: False
+    state.open_gripper(gripper, 0.04)
+    assert state.commanded_width is None
+    assert state.open_gripper(gripper, 0.04)
+
+
+def test_simulated_robot_uses_the_gripper_state():
+    clock = VirtualClock()
+    robot = SimFrankxHelpers(clock)
+    robot.open_gripper_set_width(0.04)
+    robot.open_gripper_set_width(0.04)
+    robot.close_gripper()
+    robot.close_gripper()
+    assert robot.gripper_state.skipped == 2
@@ -0,0 +1,89 @@
+import math
+import pytest
+
+from robinhood.utils.kinematics import KinematicsService, rotation_error
+from robinhood.utils.waypoint_store import Waypoint
+
+LIMITS = ([-3.0] * 7, [3.0] * 7)
+
+
+def forward(q):
+    """
+    Toy arm whose end effector pose is its first six joints.
+    """
+    return list(q[:6])
+
+
+def inverse(pose, seed):
+    return list(pose) + [seed[6]]
+
+
+class FakeStore():
+    def __init__(self, joint_poses, cartesian_poses=None, index=None):
+        self.joint_poses = joint_poses
+        self.cartesian_poses = cartesian_poses or {}
+        self.index = index or {}
+
+    def get(self, station, slot, phase):
+        return self.index[(station, slot, phase)]
+
+
+def service(inverse_function=inverse):
+    return KinematicsService(LIMITS, forward, inverse_function, tolerance=0.001, angle_tolerance=0.01)
+
+
+def test_inverse_is_memoised_by_pose_and_seed():
+    kinematics = service()
+    seed = [0.0] * 7
+    pose = [0.4, 0.1, 0.3, 0.0, 0.0, 0.0]
+    assert kinematics.inverse(pose, seed) == pose + [0.0]
+    assert kinematics.inverse(list(pose), list(seed)) == pose + [0.0]
+    assert kinematics.ik_solves == 1
+
+
+def test_solution_out_of_the_joint_limits_is_rejected():
+    kinematics = service()
+    assert kinematics.inverse([0.4, 0.1, 0.3, 0.0, 0.0, 0.0], [0.0] * 6 + [5.0]) is None
+
+
+def test_solution_with_the_wrong_orientation_is_rejected():
+    # right position, wrist turned by 0.5 rad
+    kinematics = service(lambda pose, seed: list(pose[:3]) + [pose[3] + 0.5, pose[4], pose[5], 0.0])
+    assert kinematics.inverse([0.4, 0.1, 0.3, 0.0, 0.0, 0.0], [0.0] * 7) is None
+
+
+def test_rotation_error_ignores_the_euler_representation():
+    assert rotation_error([0, 0, 0, math.pi, 0, 0], [0, 0, 0, -math.pi, 0, 0]) == pytest.approx(0.0, abs=1e-7)
+    assert rotation_error([0, 0, 0, 0, 0, 0], [0, 0, 0, 0.3, 0, 0]) == pytest.approx(0.3)
+    assert rotation_error([0, 0, 0, 0, 0, 0.2], [0, 0, 0, 0, 0, -0.2]) == pytest.approx(0.4)
+
+
+def test_validate_reports_and_caches_the_waypoints():
+    store = FakeStore(
+        {"home": [0.0] * 7, "bent": [0.0, 0.0, 0.0, 5.0, 0.0, 0.0, 0.0]},
+        {"holder": [0.2, 0.2, 0.2, 0.0, 0.0, 0.0], "far": [9.0, 0.0, 0.0, 0.0, 0.0, 0.0]},
+        {("rack", 1, "grasp"): Waypoint("x", [0.1, 0.0, 0.1, 0.0, 0.0, 0.0]), ("rack", None, "side"): Waypoint("j", [0.0] * 7)},
+    )
+    kinematics = service()
+    report = kinematics.validate(store)
+    assert report["joint_limits"] == ["bent"]
+    assert report["unreachable"] == ["far"]
+    assert report["ik"] == 3
+    solves = kinematics.ik_solves
+    assert kinematics.joint_pose("rack", 1, "grasp") == [0.1, 0.0, 0.1, 0.0, 0.0, 0.0, 0.0]
+    assert kinematics.solve([0.2, 0.2, 0.2, 0.0, 0.0, 0.0]) is not None
+    assert kinematics.ik_solves == solves
+
+
+def test_solve_caches_poses_that_are_not_in_the_store():
+    kinematics = service()
+    kinematics.set_seeds(FakeStore({"home": [0.0] * 7}))
+    pose = [0.3, -0.2, 0.25, 0.0, 0.0, 0.0]
+    assert kinematics.solve(pose) is not None
+    assert kinematics.solve(pose) is not None
+    assert kinematics.ik_solves == 1
+
+
+def test_solve_needs_seeds():
+    with pytest.raises(ValueError):
+        service().solve([0.3, -0.2, 0.25, 0.0, 0.0, 0.0])
@@ -0,0 +1,41 @@
+import pytest
+
+from robinhood.config.workflow_config import COMPATIBILITY_TOLERANCES, LINE_FLUSH_RESIDUALS, SOLVENT_COMPATIBILITY
+from robinhood.utils.line_state import DispenseLineModel
+
+
+@pytest.fixture
+def model():
+    return DispenseLineModel(SOLVENT_COMPATIBILITY, COMPATIBILITY_TOLERANCES, LINE_FLUSH_RESIDUALS, max_cycles=2)
+
+
+def test_compatibility_is_symmetric_and_defaults_to_incompatible(model):
+    assert model.level("Ethanol", "Water(DI)") == model.level("Water(DI)", "Ethanol") == "miscible"
+    assert model.level("Ethanol", "Ethanol") == "same"
+    assert model.level("Acetone", "Ethanol") == "incompatible"
+    assert model.residual(1) == pytest.approx(1e-3)
+
+
+def test_fewest_wash_cycles_within_the_tolerance(model):
+    assert model.wash_cycles({"Ethanol": 1.0}, "EtOH") == 0
+    assert model.wash_cycles({"Water(DI)": 1.0}, "Ethanol") == 1
+    assert model.wash_cycles({"Water(DI)": 1.0}, "Acetone") == 2
+    assert model.wash_cycles({}, "Ethanol") == 2
+
+
+def test_clean_line_holding_the_solvent_is_not_primed(model):
+    assert model.wash_cycles({"Ethanol": 0.9999, "Water(DI)": 1e-4}, "Ethanol") is None
+    assert model.wash_cycles({"Ethanol": 0.99, "Acetone": 0.01}, "Ethanol") == 0
+
+
+def test_primed_state_keeps_the_residues(model):
+    state = model.primed({"Water(DI)": 0.9, "Acetone": 0.1}, "Ethanol", 1)
+    assert state["Water(DI)"] == pytest.approx(9e-4) and state["Acetone"] == pytest.approx(1e-4)
+    assert sum(state.values()) == pytest.approx(1.0)
+    assert model.primed({"Ethanol": 1.0, "Water(DI)": 1e-8}, "Ethanol", 0) == {"Ethanol": 1.0} # below min_fraction
+    assert model.describe({}) == "unknown"
+
+
+def test_full_wash_when_no_prime_is_clean_enough():
+    model = DispenseLineModel({}, COMPATIBILITY_TOLERANCES, LINE_FLUSH_RESIDUALS, max_cycles=1)
+    assert model.wash_cycles({"Water(DI)": 1.0}, "Acetone") == 1
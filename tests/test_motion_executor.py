@@ -0,0 +1,92 @@
+import threading
+import pytest
+from concurrent.futures import CancelledError
+
+from robinhood.utils.clock import VirtualClock
+from robinhood.utils.motion_executor import MotionCancelled, MotionExecutor
+
+
+@pytest.fixture
+def executor():
+    stopped = threading.Event()
+    executor = MotionExecutor(stop_function=stopped.set)
+    executor.stopped = stopped
+    yield executor
+    executor.shutdown()
+
+
+def test_motions_run_in_order_with_callbacks(executor):
+    order, done = [], []
+    first = executor.submit(order.append, 1)
+    second = executor.submit(order.append, 2, description="second", callback=done.append)
+    assert second.result(5) is None
+    assert order == [1, 2] and done == [second]
+    assert first.done() and executor.pending() == []
+    assert "second" in repr(second)
+
+
+def test_a_failed_motion_cancels_the_motions_queued_after_it(executor):
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise RuntimeError("reflex")
+
+    failed = executor.submit(fail)
+    later = executor.submit(lambda: "moved")
+    release.set()
+    with pytest.raises(RuntimeError):
+        failed.result(5)
+    with pytest.raises((MotionCancelled, CancelledError)):
+        later.result(5)
+    assert later.cancelled()
+
+
+def test_cancel_stops_a_running_motion_at_its_next_move(executor):
+    started, moves = threading.Event(), []
+
+    def transfer():
+        started.set()
+        executor.stopped.wait(5)
+        executor.check_cancelled()
+        moves.append("place")
+
+    motion = executor.submit(transfer)
+    started.wait(5)
+    assert motion.cancel()
+    with pytest.raises(MotionCancelled):
+        motion.result(5)
+    assert executor.stopped.is_set() and moves == []
+    assert not motion.cancel()
+
+
+def test_check_cancelled_does_nothing_outside_a_motion(executor):
+    executor.check_cancelled()
+
+
+def test_simulated_motion_time_follows_the_caller():
+    clock = VirtualClock()
+    executor = MotionExecutor(clock=clock)
+    clock.set_thread_time(10)
+    motion = executor.submit(clock.busy, "arm", 5)
+    clock.busy("capper", 2)
+    assert clock.now() == 12
+    motion.result(5)
+    assert clock.now() == 15 and clock.intervals["arm"] == [(10, 15, "")]
+    executor.shutdown()
+
+
+def test_wait_returns_the_failures_and_logs_them_with_the_label(caplog):
+    executor = MotionExecutor(name="pump_commands", label="pump command")
+
+    def fail():
+        raise RuntimeError("valve error")
+
+    executor.submit(fail, description="prime").exception(5) # finished before wait, collected here
+    executor.submit(fail, description="prime")
+    executor.submit(lambda: None)
+    failures = executor.wait()
+    assert [repr(failure) for failure in failures] == ["RuntimeError('valve error')"]
+    assert executor.wait() == []
+    executor.shutdown()
+    assert "Pump command prime failed" in caplog.text and "pump commands queued after it" in caplog.text
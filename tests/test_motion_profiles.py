@@ -0,0 +1,28 @@
+import pytest
+
+from robinhood.config.configuration import MOTION_PROFILES
+from robinhood.utils.motion_profiles import MotionProfiles
+
+
+def test_default_profile_comes_from_the_velocity_scaling():
+    profiles = MotionProfiles(0.1, MOTION_PROFILES)
+    assert profiles.get() == {"velocity": 0.1, "acceleration": 0.1, "jerk": 0.1}
+    assert profiles.get("transit") is MOTION_PROFILES["transit"]
+    assert profiles.max_rel() == 0.2
+
+
+def test_custom_profiles_are_checked():
+    profiles = MotionProfiles(0.1)
+    custom = {"velocity": 0.3, "acceleration": 0.2, "jerk": 0.1}
+    assert profiles.get(custom) is custom
+    with pytest.raises(ValueError):
+        profiles.get({"velocity": 1.5, "acceleration": 0.2, "jerk": 0.1})
+    with pytest.raises(ValueError):
+        profiles.get("sprint")
+
+
+def test_out_of_range_configuration_is_refused():
+    with pytest.raises(ValueError):
+        MotionProfiles(0.1, {"transit": {"velocity": 0.0, "acceleration": 0.1, "jerk": 0.1}})
+    with pytest.raises(ValueError):
+        MotionProfiles(1.2)
@@ -0,0 +1,75 @@
+import pytest
+
+from robinhood.utils.motion_program import MotionOp, MotionProgram, MotionProgramOptimiser
+from robinhood.utils.waypoint_store import Waypoint
+
+ORIENTATION = [3.14, 0.0, 0.0]
+
+
+def x(px, py, pz):
+    return Waypoint("x", [px, py, pz] + ORIENTATION)
+
+
+def kinds(program) -> list:
+    return [op.kind for op in program.ops]
+
+
+def test_cartesian_poses_of_the_operations():
+    path = MotionOp("path", [[0.1] * 6, [0.2] * 6])
+    assert path.end_pose() == [0.2] * 6 and path.cartesian_poses() == path.target
+    assert MotionOp("guarded", [0.1] * 6).cartesian_poses() == [[0.1] * 6]
+    assert MotionOp("j", [0.0] * 7).cartesian_poses() == []
+    assert MotionOp("width", 0.03).cartesian_poses() == []
+
+
+def test_steps_keep_the_taught_moves_by_default():
+    steps = [Waypoint("j", [0.0] * 7), x(0.5, 0.0, 0.3), x(0.5, 0.0, 0.2), "clamp", x(0.5, 0.0, 0.3), "release"]
+    program = MotionProgram("pick").steps(steps, release_width=0.03)
+    assert kinds(program) == ["j", "x", "x", "clamp", "x", "width"]
+    assert [op.profile for op in program.ops if op.kind == "x"] == ["approach", "grasp", "grasp"]
+    assert program.ops[-1].target == 0.03
+
+
+def test_steps_blend_the_cartesian_segments_between_gripper_actions():
+    steps = [x(0.5, 0.1, 0.3), x(0.5, 0.0, 0.3), x(0.5, 0.0, 0.2), "clamp", x(0.5, 0.0, 0.3)]
+    program = MotionProgram("pick").steps(steps, release_width=0.03, blend_radius=0.01)
+    assert kinds(program) == ["path", "clamp", "x"]
+    assert program.ops[0].blend_radius == 0.01 and program.ops[0].profile == "grasp"
+
+
+def test_steps_replace_the_descent_before_the_gripper_by_a_guarded_descent():
+    steps = [x(0.5, 0.0, 0.4), x(0.5, 0.0, 0.3), x(0.5, 0.0, 0.2), "clamp"]
+    program = MotionProgram("pick").steps(steps, release_width=0.03, guard=(10.0, 0.02))
+    assert kinds(program) == ["x", "guarded", "guarded", "clamp"]
+    fast, slow = program.ops[1:3]
+    assert fast.target[2] == pytest.approx(0.22) and fast.profile == "transit" and not fast.seat
+    assert slow.target[2] == 0.2 and slow.profile == "grasp" and slow.seat and slow.force_limit == 10.0
+
+
+def test_guarded_descent_starting_close_to_the_pose_is_only_the_slow_part():
+    program = MotionProgram("place").guarded_descent([0.5, 0.0, 0.2] + ORIENTATION, 10.0, 0.02, start=[0.5, 0.0, 0.21] + ORIENTATION)
+    assert kinds(program) == ["guarded"] and program.ops[0].seat
+
+
+def test_optimiser_drops_no_op_moves_and_repeated_gripper_commands():
+    program = (MotionProgram("transfer").move_j([0.0] * 7).move_j([0.0] * 7).clamp().clamp()
+               .open(0.03).open(0.03).open().open())
+    optimised, report = MotionProgramOptimiser(motion_overhead=0.5, gripper_time=1.0).optimise(program)
+    assert kinds(optimised) == ["j", "clamp", "width", "open"]
+    assert report["no_op_moves"] == 1 and report["gripper_commands"] == 3
+    assert report["time_saved"] == 3.5 and report["ops"] == 8
+
+
+def test_optimiser_merges_collinear_linear_moves():
+    program = (MotionProgram("descent").move_x(x(0.5, 0.0, 0.4).pose).move_x(x(0.5, 0.0, 0.3).pose)
+               .move_x(x(0.5, 0.0, 0.2).pose).move_x(x(0.5, 0.1, 0.2).pose))
+    optimised, report = MotionProgramOptimiser().optimise(program)
+    assert [op.target[:3] for op in optimised.ops] == [[0.5, 0.0, 0.4], [0.5, 0.0, 0.2], [0.5, 0.1, 0.2]]
+    assert report["collinear_merges"] == 1
+
+
+def test_optimiser_keeps_moves_after_a_guarded_move():
+    pose = x(0.5, 0.0, 0.2).pose
+    program = MotionProgram("seat").move_x(pose).guarded_descent(pose, 10.0, 0.0, start=pose).move_x(pose)
+    optimised, report = MotionProgramOptimiser().optimise(program)
+    assert kinds(optimised) == ["x", "guarded", "x"] and report["time_saved"] == 0
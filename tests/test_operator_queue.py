@@ -0,0 +1,55 @@
+import os
+import threading
+import pytest
+
+from robinhood.utils.clock import VirtualClock
+from robinhood.utils.operator_queue import OperatorQueue, OperatorRequest
+
+
+def test_request_accepts_one_valid_answer():
+    request = OperatorRequest(1, "Cap vial 3", options=("Y", "N"))
+    assert not request.set_answer("maybe")
+    assert request.set_answer(" y ")
+    assert not request.set_answer("n")
+    assert request.wait(0) == "y"
+
+
+def test_unknown_backend_and_missing_path_are_refused():
+    with pytest.raises(ValueError):
+        OperatorQueue("email")
+    with pytest.raises(ValueError):
+        OperatorQueue("file")
+
+
+def test_auto_backend_answers_after_the_operator_delay():
+    clock = VirtualClock()
+    queue = OperatorQueue("auto", clock=clock, operator_delay=300)
+    assert queue.ask("Replace the filter", options=("done", "skip")) == "done"
+    assert clock.now() == 300 and queue.pending() == []
+
+
+def test_a_pending_request_only_blocks_its_own_thread(tmp_path):
+    queue = OperatorQueue("file", request_path=str(tmp_path), poll_interval=0.01)
+    first = queue.post("Cap vial 1", source="capper")
+    second = queue.post("Cap vial 2", source="capper")
+    assert os.path.exists(tmp_path / "request_1.json")
+    assert queue.pending() == [first, second]
+
+    answers = []
+    waiter = threading.Thread(target=lambda: answers.append(second.wait(5)))
+    waiter.start()
+    assert queue.answer(2, "n")
+    waiter.join()
+    assert answers == ["n"] and queue.pending() == [first]
+    assert not os.path.exists(tmp_path / "request_2.json")
+    assert not queue.answer(2, "y") and not queue.answer(9, "y")
+    queue.close()
+
+
+def test_file_backend_reads_answer_files(tmp_path):
+    queue = OperatorQueue("file", request_path=str(tmp_path), poll_interval=0.01)
+    request = queue.post("Cap vial 1")
+    (tmp_path / "request_1.answer").write_text("y\n")
+    assert request.wait(5) == "y"
+    queue.close()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,71 @@
+import threading
+import pytest
+
+from robinhood.config.workflow_config import DISPENSE_HARDCODES, PUMP_PORT_ASSIGNMENTS
+from robinhood.drivers.rob_in_hood import RobInHood
+from robinhood.utils.motion_executor import MotionExecutor
+from robinhood.utils.pump_router import PumpRouter
+
+
+@pytest.fixture
+def rih():
+    """
+    RobInHood with only the pump command threads, start_pump and wait_for_pumps need nothing else.
+    """
+    rih = RobInHood.__new__(RobInHood)
+    rih.pump_router = PumpRouter({**DISPENSE_HARDCODES, "Water": 3, "Acetone": 14}, PUMP_PORT_ASSIGNMENTS)
+    rih.pump_commands = {device: MotionExecutor(name=f"{device}_commands", label="pump command") for device in rih.pump_router.devices}
+    yield rih
+    for commands in rih.pump_commands.values():
+        commands.shutdown()
+
+
+def pump_thread(chemical):
+    return threading.current_thread().name
+
+
+def test_command_runs_on_the_pump_of_its_chemical(rih):
+    assert rih.start_pump(pump_thread, "Acetone").result(5).startswith("pump_2_commands")
+    assert rih.start_pump(pump_thread, "Water").result(5).startswith("pump_commands")
+
+
+def test_commands_on_the_same_pump_run_in_order(rih):
+    order = []
+    release = threading.Event()
+
+    def dispense(volume, chemical):
+        if volume == 1:
+            release.wait(5)
+        order.append(volume)
+
+    futures = [rih.start_pump(dispense, "Water", volume) for volume in (1, 2, 3)]
+    release.set()
+    futures[-1].result(5)
+    assert order == [1, 2, 3]
+
+
+def test_both_pumps_work_at_the_same_time(rih):
+    both_running = threading.Barrier(2, timeout=5)
+
+    def prime(chemical):
+        both_running.wait() # raises BrokenBarrierError unless the other pump is running too
+        return chemical
+
+    futures = [rih.start_pump(prime, "Water"), rih.start_pump(prime, "Acetone")]
+    assert [future.result(5) for future in futures] == ["Water", "Acetone"]
+
+
+def test_pump_errors_are_raised(rih):
+    def fail(chemical):
+        raise RuntimeError(f"{chemical} line blocked")
+
+    failed = rih.start_pump(fail, "Acetone")
+    with pytest.raises(RuntimeError):
+        failed.result(5)
+    rih.wait_for_pumps() # already raised by result()
+
+    assert rih.start_pump(fail, "Water").exception(5) is not None
+    rih.start_pump(fail, "Water")
+    with pytest.raises(RuntimeError, match="Water line blocked"):
+        rih.wait_for_pumps()
+    rih.wait_for_pumps()
@@ -0,0 +1,99 @@
+import logging
+import types
+import pytest
+
+from robinhood.config.workflow_config import PUMP_PORT_ASSIGNMENTS
+from robinhood.drivers.rob_in_hood import RobInHood
+from robinhood.utils.pump_program import PumpProgram, PumpProgramCompiler
+from robinhood.utils.pump_router import PumpLine
+from robinhood.utils.stroke_planner import StrokePlanner
+
+DISPENSE = {"Dispense": 1, "Air": 2, "Water(DI)": 3, "Waste": 6, "Dispense_2": 13, "Air_2": 15, "Waste_2": 18}
+
+
+@pytest.fixture
+def line():
+    return PumpLine("Dispense_1", PUMP_PORT_ASSIGNMENTS["Dispense_1"], DISPENSE)
+
+
+@pytest.fixture
+def compiler():
+    return PumpProgramCompiler(StrokePlanner(1000, 3000))
+
+
+def test_loops_are_expanded_in_the_transfers(line):
+    wash = PumpProgram("wash", line).transfer(1000, 3, 1).transfer(2000, 1, 6)
+    program = PumpProgram("prime", line).transfer(2000, 1, 6).repeat(2, wash).repeat(0, wash)
+    assert program.transfers() == [(2000.0, 1, 6)] + [(1000.0, 3, 1), (2000.0, 1, 6)] * 2
+    assert program.volume() == 8000.0
+    assert len(program) == 5
+
+
+def test_repeated_full_strokes_become_a_cavro_loop(line, compiler):
+    program = PumpProgram("prime_reagent", line).transfer(6000, 3, 6)
+    assert compiler.compile(program) == ["gI3A3000I6A0G6R"]
+    assert compiler.compile(program, speed=9) == ["S9gI3A3000I6A0G6R"]
+
+
+def test_dispense_line_prime(line, compiler):
+    wash = PumpProgram("wash", line).transfer(1000, 3, 1).transfer(2000, 1, 6)
+    program = PumpProgram("prime_dispense", line).transfer(2000, 1, 6).repeat(2, wash).transfer(1000, 3, 1)
+    assert compiler.compile(program) == ["gI1A3000I6A0G2gI3A3000I1A0A3000I6A0I1A3000I6A0G2I3A3000I1A0R"]
+
+
+def test_valve_command_is_left_out_when_the_valve_is_at_the_port(compiler):
+    first, second = compiler.planner.plan([(500, 3, 1), (500, 1, 6)])
+    assert compiler.stroke_text(second, valve=1) == "A1500I6A0"
+    assert compiler.stroke_text(second) == "I1A1500I6A0"
+
+
+def test_long_programs_are_split_between_strokes(line):
+    compiler = PumpProgramCompiler(StrokePlanner(1000, 3000), max_length=24, compress=False)
+    program = PumpProgram("transfers", line).transfer(3000, 3, 6)
+    commands = compiler.compile(program, speed=11)
+    assert commands == ["S11I3A3000I6A0R", "S11I3A3000I6A0R", "S11I3A3000I6A0R"]
+    assert all(len(command) <= 24 for command in commands)
+
+
+def test_stroke_longer_than_a_command_raises(line):
+    compiler = PumpProgramCompiler(StrokePlanner(1000, 3000), max_length=8)
+    with pytest.raises(ValueError):
+        compiler.compile(PumpProgram("too_long", line).transfer(1000, 3, 6))
+
+
+class FakeConnection():
+    def __init__(self):
+        self.sent = []
+
+    def transmit(self, message):
+        self.sent.append(message)
+
+    def receive(self):
+        return types.SimpleNamespace(body="`")
+
+
+class FakeSerialPump():
+    """
+    pylabware pump without send_command_string, busy for two idle polls after a command.
+    """
+    device_name = "Tecan"
+    command_prefix = "/1"
+    command_terminator = "\r\n"
+
+    def __init__(self):
+        self.connection = FakeConnection()
+        self.polls = 0
+
+    def is_idle(self):
+        self.polls += 1
+        return self.polls > 2
+
+
+def test_command_strings_are_sent_on_the_pylabware_connection():
+    pump = FakeSerialPump()
+    sleeps = []
+    rih = types.SimpleNamespace(clock=types.SimpleNamespace(sleep=sleeps.append), _logger=logging.getLogger("test"))
+    assert RobInHood.takes_command_strings(pump)
+    RobInHood.send_pump_command_string(rih, pump, "S11gI3A3000I6A0G6R")
+    assert pump.connection.sent == ["/1S11gI3A3000I6A0G6R\r\n"]
+    assert len(sleeps) == 2
@@ -0,0 +1,34 @@
+import pytest
+
+from robinhood.config.workflow_config import DISPENSE_HARDCODES, PUMP_PORT_ASSIGNMENTS
+from robinhood.utils.pump_router import PumpRouter
+
+
+@pytest.fixture
+def router():
+    return PumpRouter({**DISPENSE_HARDCODES, "Water": 3, "Acetone": 14, "Stray": 40}, PUMP_PORT_ASSIGNMENTS)
+
+
+def test_chemicals_resolve_to_their_pump_and_port_arguments(router):
+    water = router.route("Water")
+    assert water.device == "pump" and water.source == 3
+    assert (water.dispense, water.air, water.waste) == (1, 2, 6)
+
+    acetone = router.route("Acetone")
+    assert acetone.device == "pump_2" and acetone.source == "I2"
+    assert (acetone.dispense, acetone.air, acetone.waste) == ("I1", "I3", "I6")
+    assert acetone.pump is router.pump("pump_2")
+    assert acetone.pump.primed_variable == "pump_2_primed_solvent"
+
+
+def test_unassigned_ports_have_no_route(router):
+    assert "Stray" not in router.routes
+    with pytest.raises(KeyError):
+        router.route("Stray")
+
+
+def test_a_port_assigned_to_two_pumps_is_refused():
+    assignments = {key: dict(assignment) for key, assignment in PUMP_PORT_ASSIGNMENTS.items()}
+    assignments["Dispense_2"]["ports"] = [12] + assignments["Dispense_2"]["ports"]
+    with pytest.raises(ValueError):
+        PumpRouter(DISPENSE_HARDCODES, assignments)
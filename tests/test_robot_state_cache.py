@@ -0,0 +1,81 @@
+import time
+
+from robinhood.utils.robot_state_cache import RobotStateCache
+
+
+class FakeClock():
+    def __init__(self):
+        self.time = 0.0
+
+    def now(self):
+        return self.time
+
+
+class CountingReader():
+    def __init__(self):
+        self.reads = 0
+
+    def __call__(self):
+        self.reads += 1
+        return {"read": self.reads}
+
+
+def test_fresh_snapshot_is_served_without_a_read():
+    clock, read = FakeClock(), CountingReader()
+    cache = RobotStateCache(read, clock=clock)
+    assert cache.get(0.1) == {"read": 1}
+    clock.time = 0.05
+    assert cache.get(0.1) == {"read": 1}
+    assert cache.is_fresh(0.1)
+    clock.time = 0.2
+    assert cache.get(0.1) == {"read": 2}
+    assert read.reads == 2
+
+
+def test_motion_invalidates_the_snapshot():
+    clock, read = FakeClock(), CountingReader()
+    cache = RobotStateCache(read, clock=clock)
+    cache.refresh()
+    with cache.motion():
+        pass
+    assert cache.snapshot() is None
+    assert cache.age() is None
+    assert cache.get(None) == {"read": 2}
+
+
+def test_background_reader_pauses_during_motions():
+    read = CountingReader()
+    cache = RobotStateCache(read, rate=200.0)
+    cache.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while cache.snapshot() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.snapshot() is not None
+        with cache.motion():
+            reads = read.reads
+            time.sleep(0.05)
+            assert read.reads == reads
+    finally:
+        cache.stop()
+
+
+def test_read_errors_are_counted_and_do_not_stop_the_reader():
+    calls = []
+
+    def unreliable():
+        calls.append(None)
+        if len(calls) % 2:
+            raise IOError("no state")
+        return "state"
+
+    cache = RobotStateCache(unreliable, rate=200.0)
+    cache.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while cache.snapshot() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        cache.stop()
+    assert cache.read_errors >= 1
+    assert cache.snapshot()[1] == "state"
@@ -0,0 +1,63 @@
+import json
+import pytest
+
+from robinhood.config.configuration import WAYPOINTS_PATH
+from robinhood.utils.route_graph import RouteGraph
+from robinhood.utils.waypoint_store import WaypointStore
+
+
+def make_store(tmp_path, routes):
+    data = {
+        "joint_poses": {"home": [0, 0, 0, 0, 0, 0, 0], "a": [1, 0, 0, 0, 0, 0, 0], "b": [1, 2, 0, 0, 0, 0, 0],
+                        "c": [0, 0.5, 0, 0, 0, 0, 0]},
+        "cartesian_poses": {"x1": [0.5, 0.0, 0.3, 3.14, 0, 0], "x2": [0.5, 0.2, 0.3, 3.14, 0, 0]},
+        "paths": {"home_to_b": ["home", "a", "b"]},
+        "stations": {},
+        "routes": {"joint_speed": 1.0, "cartesian_speed": 0.1, "motion_overhead": 0.5, **routes},
+    }
+    path = tmp_path / "waypoints.json"
+    path.write_text(json.dumps(data))
+    return WaypointStore(str(path))
+
+
+def test_chains_give_directed_edges_with_via_points(tmp_path):
+    store = make_store(tmp_path, {"chains": {
+        "path": {"loaded": True, "path": "home_to_b"},
+        "linear": {"loaded": True, "poses": ["x1", [0.5, 0.1, 0.3, 3.14, 0, 0], "x2"]},
+    }})
+    graph = RouteGraph(store)
+    assert set(graph.edges) == {"home", "a", "x1"}
+    assert graph.edges["home"]["a"].cost == pytest.approx(1.5)
+    edge = graph.edges["x1"]["x2"]
+    assert [waypoint.pose for waypoint in edge.waypoints()] == [[0.5, 0.1, 0.3, 3.14, 0, 0], store.named("x2").pose]
+    assert edge.cost == pytest.approx(2 * (0.5 + 1.0))
+    with pytest.raises(ValueError):
+        graph.route("b", "home")
+
+
+def test_route_is_the_shortest_and_respects_the_gripper_load(tmp_path):
+    store = make_store(tmp_path, {"chains": {
+        "long": {"loaded": True, "poses": ["home", "a", "b"]},
+        "short": {"loaded": False, "poses": ["home", "c", "b"]},
+    }, "stations": {"start": "home", "goal": {"arrive": ["c", "b"], "leave": "b"}}})
+    graph = RouteGraph(store)
+    assert [edge.goal for edge in graph.route("home", "b", loaded=True)] == ["a", "b"]
+    assert [edge.goal for edge in graph.route("home", "b", loaded=False)] == ["c", "b"]
+    assert [edge.goal for edge in graph.route("start", "goal", loaded=False)] == ["c"]
+    assert graph.route("home", "home") == []
+    assert graph.duration(graph.route("home", "b")) == pytest.approx(1.5 + 2.5)
+    assert graph.unreachable(loaded=True) == [("goal", "start")]
+
+
+def test_invalid_definitions_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        RouteGraph(make_store(tmp_path, {"chains": {"open": {"poses": ["home", [0.5, 0, 0.3, 3.14, 0, 0]]}}}))
+    with pytest.raises(ValueError):
+        RouteGraph(make_store(tmp_path, {"chains": {"ok": {"poses": ["home", "a"]}}, "stations": {"far": "b"}}))
+
+
+def test_taught_routes_connect_the_stations():
+    graph = RouteGraph(WaypointStore(WAYPOINTS_PATH))
+    route = graph.route("rack", "pump")
+    assert route[0].start == graph.node("rack", "leave") and route[-1].goal in graph.nodes("pump", "arrive")
+    assert all(edge.loaded for edge in route)
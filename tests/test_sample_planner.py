@@ -0,0 +1,57 @@
+import pytest
+
+from robinhood.config.workflow_config import CHANGEOVER_COSTS, DISPENSE_HARDCODES, PUMP_PORT_ASSIGNMENTS
+from robinhood.utils.pump_router import PumpRouter
+from robinhood.utils.sample_planner import SamplePlanner
+
+
+@pytest.fixture
+def planner():
+    dispense_dict = {**DISPENSE_HARDCODES, "Water": 3, "Ethanol": 4, "Acetone": 14}
+    return SamplePlanner(PumpRouter(dispense_dict, PUMP_PORT_ASSIGNMENTS))
+
+
+def sample(vial, solid, liquid):
+    return {"vial": vial, "solid": solid, "liquid": liquid}
+
+
+def test_sample_cost_counts_cartridge_and_prime_changeovers(planner):
+    cost, state, changeovers = planner.sample_cost(sample(0, "NaCl", ["Water", "Acetone"]), (None, (None, None)))
+    assert cost == CHANGEOVER_COSTS["cartridge_load"] + 2 * CHANGEOVER_COSTS["dispense_prime"]
+    assert state == ("NaCl", ("Water", "Acetone"))
+    assert len(changeovers) == 3
+
+    cost, _, changeovers = planner.sample_cost(sample(1, "NaCl", "Water"), state)
+    assert cost == 0 and changeovers == []
+    cost, _, _ = planner.sample_cost(sample(2, "KCl", "None"), state)
+    assert cost == CHANGEOVER_COSTS["cartridge_swap"]
+
+
+def test_plan_groups_samples_sharing_solid_and_solvent(planner):
+    samples = {
+        0: sample(0, "NaCl", "Water"),
+        1: sample(1, "KCl", "Ethanol"),
+        2: sample(2, "NaCl", "Water"),
+        3: sample(3, "KCl", "Ethanol"),
+    }
+    plan = planner.plan(samples)
+    assert plan["optimised_cost"] < plan["original_cost"]
+    assert plan["time_saved"] == plan["original_cost"] - plan["optimised_cost"]
+    assert sorted(plan["order"]) == [0, 1, 2, 3]
+    assert list(plan["samples"]) == [0, 1, 2, 3]
+    assert [plan["samples"][index] for index in range(4)] == [samples[key] for key in plan["order"]]
+    solids = [samples[key]["solid"] for key in plan["order"]]
+    assert solids in (["NaCl", "NaCl", "KCl", "KCl"], ["KCl", "KCl", "NaCl", "NaCl"])
+
+
+def test_plan_starts_from_the_mounted_cartridge_and_primed_lines(planner):
+    samples = {0: sample(0, "KCl", "Ethanol"), 1: sample(1, "NaCl", "Water")}
+    plan = planner.plan(samples, cartridge_solid="NaCl", primed_solvents={"pump_1_primed_solvent": "Water"})
+    assert plan["order"] == [1, 0]
+    assert plan["changeovers"][1] == []
+
+
+def test_plan_keeps_the_csv_order_when_it_is_already_optimal(planner):
+    samples = {0: sample(0, "NaCl", "Water"), 1: sample(1, "NaCl", "Water")}
+    plan = planner.plan(samples)
+    assert plan["order"] == [0, 1] and plan["time_saved"] == 0
@@ -0,0 +1,87 @@
+import pytest
+
+from robinhood.config.workflow_config import METHOD_RESOURCES, STATION_RESOURCES
+from robinhood.utils.clock import VirtualClock
+from robinhood.utils.scheduler import StationScheduler
+
+
+def simulated(clock, seconds, result=None):
+    def operation():
+        clock.sleep(seconds)
+        return result
+    return operation
+
+
+def failing():
+    raise RuntimeError("station error")
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+def test_operations_sharing_a_resource_do_not_overlap(clock):
+    schedule = StationScheduler(clock=clock)
+    schedule.add_operation("first", simulated(clock, 10), resources=["arm"])
+    schedule.add_operation("second", simulated(clock, 5), resources=["arm", "quantos"])
+    assert schedule.run() == {"first": "done", "second": "done"}
+    report = schedule.report()
+    intervals = sorted((report[name]["start"], report[name]["end"]) for name in report)
+    assert intervals[0][1] <= intervals[1][0]
+    assert schedule.makespan == pytest.approx(15)
+
+
+def test_independent_resources_run_concurrently(clock):
+    schedule = StationScheduler(clock=clock)
+    schedule.add_operation("dose", simulated(clock, 10), resources=["quantos"])
+    schedule.add_operation("prime", simulated(clock, 8), resources=["pump_2"])
+    schedule.run()
+    assert schedule.makespan == pytest.approx(10)
+
+
+def test_dependencies_wait_and_failures_skip_their_dependants(clock):
+    schedule = StationScheduler(clock=clock)
+    schedule.add_operation("move", simulated(clock, 4, "moved"), resources=["arm"])
+    schedule.add_operation("dose", simulated(clock, 6), resources=["quantos"], depends_on=["move"])
+    schedule.add_operation("cap", failing, resources=["capper"])
+    schedule.add_operation("store", simulated(clock, 1), resources=["arm"], depends_on=["cap"])
+    assert schedule.run() == {"move": "done", "dose": "done", "cap": "failed", "store": "skipped"}
+    report = schedule.report()
+    assert report["dose"]["start"] == pytest.approx(report["move"]["end"])
+    assert schedule.operations["move"].result == "moved"
+    assert isinstance(schedule.operations["cap"].error, RuntimeError)
+
+
+def test_longest_estimate_starts_first(clock):
+    schedule = StationScheduler(clock=clock)
+    schedule.add_operation("short", simulated(clock, 1), resources=["arm"], estimate=1)
+    schedule.add_operation("long", simulated(clock, 9), resources=["arm"], estimate=9)
+    schedule.run()
+    assert schedule.report()["long"]["start"] == pytest.approx(0.0)
+
+
+def test_invalid_graphs_are_rejected(clock):
+    schedule = StationScheduler(clock=clock)
+    schedule.add_operation("a", simulated(clock, 1), depends_on=["b"])
+    schedule.add_operation("b", simulated(clock, 1), depends_on=["a"])
+    with pytest.raises(ValueError):
+        schedule.validate()
+    with pytest.raises(ValueError):
+        schedule.add_operation("a", simulated(clock, 1))
+    unknown = StationScheduler(clock=clock)
+    unknown.add_operation("a", simulated(clock, 1), depends_on=["missing"])
+    with pytest.raises(ValueError):
+        unknown.validate()
+
+
+def test_vial_transfers_hold_their_stations():
+    stations = {"ika": "ika", "pump": "holder", "quantos": "holder", "capper": "capper", "lightbox": "lightbox"}
+    for method, resources in METHOD_RESOURCES.items():
+        assert set(resources) <= set(STATION_RESOURCES), method
+        if not method.startswith("vial_") or method == "vial_decap":
+            continue
+        assert "arm" in resources, method
+        for station in method[len("vial_"):].split("_to_"):
+            if station in stations:
+                assert stations[station] in resources, method
@@ -0,0 +1,50 @@
+import pytest
+
+from robinhood.config.configuration import SIM_DURATIONS
+from robinhood.drivers.sim_devices import SimCapper, SimDevice, SimPump, SimQuantos
+from robinhood.utils.clock import VirtualClock
+
+
+def test_unmodelled_commands_take_the_default_duration():
+    clock = VirtualClock()
+    device = SimDevice(clock, "ika", "IKA")
+    assert device.start_stirring()["success"]
+    assert clock.now() == SIM_DURATIONS["command"]
+    assert clock.intervals["ika"][0][2] == "start_stirring"
+    with pytest.raises(AttributeError):
+        device._private
+
+
+def test_pump_dispense_time_scales_with_volume_and_speed():
+    clock = VirtualClock()
+    pump = SimPump(clock, "pump", syringe_volume=1000.0, default_speed=11)
+    pump.dispense(500)
+    single = SIM_DURATIONS["pump_command"] + 2 * SIM_DURATIONS["pump_valve"] + 0.5 * SIM_DURATIONS["pump_stroke"]
+    assert clock.now() == pytest.approx(single)
+
+    pump.set_predefined_speed(22)
+    start = clock.now()
+    pump.dispense(2000)
+    assert clock.now() - start == pytest.approx(SIM_DURATIONS["pump_command"] + 4 * SIM_DURATIONS["pump_valve"]
+                                                + 4 * SIM_DURATIONS["pump_stroke"])
+
+
+def test_arduino_commands_run_in_the_background():
+    clock = VirtualClock()
+    capper = SimCapper(clock)
+    opened = clock.now()
+    capper.right()
+    assert clock.now() == opened
+    capper.wait_for_completion()
+    assert clock.now() == opened + SIM_DURATIONS["capper_spin"]
+
+
+def test_quantos_doses_the_target_mass():
+    clock = VirtualClock()
+    quantos = SimQuantos(clock)
+    quantos.open_front_door()
+    assert quantos.get_front_door_position()["outcomes"] == ["Open position"]
+    quantos.tare()
+    quantos.set_target_mass(25)
+    quantos.start_dosing()
+    assert quantos.get_stable_weight()["outcomes"][1] == pytest.approx(0.025)
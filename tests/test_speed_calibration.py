@@ -0,0 +1,31 @@
+import pytest
+
+from robinhood.utils.speed_calibration import SpeedCalibration
+
+
+def test_missing_table_keeps_the_default_speeds(tmp_path):
+    calibration = SpeedCalibration(str(tmp_path / "speeds.csv"))
+    assert len(calibration) == 0
+    assert calibration.speed("Ethanol", "Dispense_1", 11) == 11
+    assert calibration.dropwise_speed("Ethanol", "Dispense_1", 14) == 14
+    assert calibration.density("Ethanol", 0.789) == 0.789
+
+
+def test_calibrations_are_saved_and_reloaded(tmp_path):
+    path = str(tmp_path / "speeds.csv")
+    calibration = SpeedCalibration(path)
+    calibration.set("Ethanol", "Dispense_1", 8, density=0.789, error=0.004, dropwise_speed=12)
+    calibration.set("Ethanol", "Dispense_1", 7, error=0.006)
+
+    reloaded = SpeedCalibration(path)
+    assert len(reloaded) == 1
+    assert reloaded.speed("Ethanol", "Dispense_1", 11) == 7
+    assert reloaded.dropwise_speed("Ethanol", "Dispense_1", 14) == 12
+    assert reloaded.density("Ethanol") == 0.789
+    assert reloaded.rows[("Ethanol", "Dispense_1")]["error"] == 0.006
+    assert reloaded.speed("Ethanol", "Dispense_2", 20) == 20
+
+
+def test_relative_error_of_a_gravimetric_dispense():
+    assert SpeedCalibration.relative_error(0.997, 1000, 0.997) == pytest.approx(0.0)
+    assert SpeedCalibration.relative_error(0.789 * 0.98, 1000, 0.789) == pytest.approx(-0.02)
@@ -0,0 +1,38 @@
+import pytest
+
+from robinhood.config.configuration import CAVRO_SPEED_TABLE
+from robinhood.utils.stroke_planner import StrokePlanner, cavro_plunger_time
+
+
+def test_plunger_time_follows_the_speed_table():
+    assert cavro_plunger_time(3000, 11) == pytest.approx(6000 / CAVRO_SPEED_TABLE[11])
+    assert cavro_plunger_time(-1500, 11, full_steps=1500) == cavro_plunger_time(3000, 11)
+
+
+def test_adjacent_transfers_from_one_source_share_strokes():
+    planner = StrokePlanner(syringe_volume=1000)
+    strokes = planner.plan([(600, 3, 1), (300, 3, 1), (500, 3, 6), (0, 4, 1), (200, 4, 1)])
+    assert [(stroke.source, stroke.dispenses) for stroke in strokes] == [
+        (3, [(1, 900), (6, 100)]),
+        (3, [(6, 400)]),
+        (4, [(1, 200)]),
+    ]
+    assert planner.valve_switches(strokes) == 7
+    assert planner.valve_switches(strokes, valve=3) == 6
+
+
+def test_large_volumes_take_full_strokes():
+    planner = StrokePlanner(syringe_volume=1000)
+    strokes = planner.plan([(2500, 3, 1)])
+    assert [stroke.volume for stroke in strokes] == [1000, 1000, 500]
+    assert len(planner.plan([(3000, 3, 1)])) == 3
+
+
+def test_predicted_time_adds_valves_plunger_and_commands():
+    planner = StrokePlanner(syringe_volume=1000, full_steps=3000, valve_time=0.5, command_time=0.3,
+                            plunger_time=lambda steps, speed: steps / 1000)
+    strokes = planner.plan([(500, 3, 1)])
+    assert planner.predict(strokes, 11, commands=2) == pytest.approx(2 * 0.5 + 3.0 + 2 * 0.3)
+    report = planner.report("prime", [(500, 3, 1), (500, 3, 1)], 11)
+    assert report["strokes"] == 1 and report["commands"] == 2 and report["volume"] == 1000
+    assert report["time"] == pytest.approx(2 * 0.5 + 6.0 + 2 * 0.3)
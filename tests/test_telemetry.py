@@ -0,0 +1,54 @@
+import time
+import numpy as np
+
+from robinhood.utils.telemetry import TelemetryRecorder
+from robinhood.utils.tracing import Span
+
+
+class FakeState():
+    def __init__(self, value):
+        self.q = [value] * 7
+        self.dq = [0.0] * 7
+        self.tau_J = [0.0] * 7
+        self.O_T_EE = [0.0] * 12 + [0.4, 0.0, value, 1.0]
+
+
+def test_ring_buffer_keeps_the_latest_samples_oldest_first():
+    recorder = TelemetryRecorder(lambda: None, capacity=3)
+    for t in range(5):
+        recorder.record(float(t), FakeState(t))
+    samples = recorder.samples()
+    assert list(samples[:, 0]) == [2.0, 3.0, 4.0]
+    assert list(samples[:, recorder.COLUMNS.index("z")]) == [2.0, 3.0, 4.0]
+    assert not samples[:, recorder.COLUMNS.index("fx")].any()
+
+
+def test_window_and_span_export(tmp_path):
+    recorder = TelemetryRecorder(lambda: None, file_path=str(tmp_path / "buffer.dat"), capacity=10)
+    for t in range(6):
+        recorder.record(float(t), FakeState(t))
+    assert list(recorder.window(1.5, 3.0)[:, 0]) == [2.0, 3.0]
+    span = Span("RobInHood.vial_rack_to_pump", "RiH", {}, start=2.0, thread=0)
+    span.end = 3.0
+    assert recorder.export_span(span, tmp_path / "span.csv", margin=1.0) == 4
+    exported = np.loadtxt(tmp_path / "span.csv", delimiter=",", skiprows=1)
+    assert list(exported[:, 0]) == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_recorder_thread_skips_missing_states_and_read_errors():
+    calls = []
+
+    def read():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("libfranka busy")
+        return None if len(calls) == 2 else FakeState(0.1)
+
+    recorder = TelemetryRecorder(read, rate=500.0, capacity=100)
+    recorder.start()
+    deadline = time.monotonic() + 5
+    while recorder.count < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    recorder.stop()
+    assert recorder.read_errors == 1 and recorder.count >= 2
+    assert len(calls) == recorder.count + 2
@@ -0,0 +1,94 @@
+import json
+import pytest
+
+from robinhood.utils.clock import VirtualClock
+from robinhood.utils.tracing import Tracer
+
+
+class Pump():
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def dispense(self, volume):
+        self.clock.sleep(volume / 100)
+        return volume
+
+    def fail(self):
+        raise RuntimeError("valve error")
+
+
+class Station():
+
+    def __init__(self, pump):
+        self.pump = pump
+
+    def prime(self, volume=500):
+        return self.pump.dispense(volume)
+
+
+@pytest.fixture
+def traced():
+    clock = VirtualClock()
+    tracer = Tracer(clock, max_arg_length=10)
+    pump = Pump(clock)
+    station = Station(pump)
+    tracer.instrument(station, "RiH")
+    tracer.instrument(pump, "pump")
+    return tracer, station, pump
+
+
+def test_nested_calls_record_parent_spans(traced):
+    tracer, station, _ = traced
+    assert station.prime(volume=300) == 300
+    inner, outer = tracer.spans
+    assert outer.name == "Station.prime" and outer.depth == 0
+    assert inner.name == "Pump.dispense" and inner.parent is outer and inner.depth == 1
+    assert inner.duration() == 3 and outer.duration() == 3
+    assert outer.args == {"volume": "300"}
+
+
+def test_errors_are_recorded_and_raised(traced):
+    tracer, _, pump = traced
+    with pytest.raises(RuntimeError):
+        pump.fail()
+    assert tracer.spans[0].error == "RuntimeError('valve error')"
+    assert tracer.summary()["Pump.fail"]["errors"] == 1
+
+
+def test_long_arguments_are_truncated(traced):
+    tracer, _, pump = traced
+    with tracer.span("block", device="workflow", label="x" * 50):
+        pump.dispense(100)
+    assert tracer.spans[1].args["label"] == "'xxxxxx..."
+    assert tracer.spans[0].parent is tracer.spans[1]
+
+
+def test_instrument_twice_and_remove(traced):
+    tracer, station, pump = traced
+    tracer.instrument(pump, "pump")
+    station.prime()
+    assert len(tracer.spans) == 2
+    tracer.remove_instrumentation()
+    tracer.clear()
+    station.prime()
+    assert tracer.spans == []
+    assert not hasattr(pump.dispense, "_traced_function")
+
+
+def test_summary_and_chrome_trace(traced, tmp_path):
+    tracer, station, pump = traced
+    station.prime(200)
+    pump.dispense(400)
+    summary = tracer.summary()
+    assert list(summary) == ["Pump.dispense", "Station.prime"]
+    assert summary["Pump.dispense"]["count"] == 2
+    assert summary["Pump.dispense"]["mean"] == 3 and summary["Pump.dispense"]["max"] == 4
+
+    path = tmp_path / "trace.json"
+    tracer.export_chrome_trace(path)
+    events = json.loads(path.read_text())["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [event["name"] for event in spans] == ["Station.prime", "Pump.dispense", "Pump.dispense"]
+    assert spans[0]["ts"] == 0 and spans[2]["dur"] == 4e6
+    assert events[0]["ph"] == "M"
@@ -0,0 +1,107 @@
+import json
+import os
+import pytest
+
+from robinhood.config.configuration import WAYPOINTS_PATH
+from robinhood.utils.waypoint_store import Waypoint, WaypointStore
+
+# Robot calls of vial_rack_to_pump, vial_pump_to_rack, vial_capper_to_ika and vial_ika_to_pump for every slot, recorded
+# from the hard-coded "if vial_number == N" methods the waypoint store replaced. Key "<method>/<slot>".
+LEGACY_CALLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "legacy_vial_transfer_calls.json")
+
+
+@pytest.fixture(scope="module")
+def store():
+    return WaypointStore(WAYPOINTS_PATH)
+
+
+def replay(store, method, slot) -> list:
+    """
+    Robot calls of a vial transfer rebuilt from waypoint store lookups, in the order the transfer methods issue them.
+    """
+    def calls(steps, station=None):
+        out = []
+        for step in steps:
+            if step == "clamp":
+                out.append(["clamp"])
+            elif step == "release":
+                out.append(["open_gripper_set_width", store.release_width(station)])
+            else:
+                out.append(["move_robot_j" if step.kind == "j" else "move_robot_x", step.pose])
+        return out
+
+    path = lambda name: calls(store.path(name))
+    if method == "vial_rack_to_pump":
+        return path("home_to_rack") + calls(store.sequence("rack", slot, "pick"), "rack") + path("rack_to_pump") + [["open_gripper"]]
+    if method == "vial_pump_to_rack":
+        return path("pump_grasp") + [["clamp"]] + path("pump_to_rack") + calls(store.sequence("rack", slot, "place"), "rack") + path("rack_to_home")
+    if method == "vial_capper_to_ika":
+        return (path("capper_grasp") + [["clamp"]] + path("capper_to_ika") + calls([store.get("ika", None, "entry")])
+                + calls(store.sequence("ika", slot, "place"), "ika") + path("ika_to_side"))
+    if method == "vial_ika_to_pump":
+        return [["open_gripper_set_width", 0.03]] + path("side_to_ika") + calls(store.sequence("ika", slot, "pick"), "ika") + path("ika_to_pump") + [["open_gripper"]]
+    raise ValueError(method)
+
+
+def test_store_reproduces_the_hard_coded_poses(store):
+    with open(LEGACY_CALLS) as f:
+        legacy = json.load(f)
+    assert len(legacy) == 2 * len(store.slots("rack")) + 2 * len(store.slots("ika"))
+    for key, calls in legacy.items():
+        method, slot = key.split("/")
+        assert replay(store, method, int(slot)) == calls, key
+
+
+def test_slots_that_do_not_exist_are_rejected(store):
+    for station, slot in (("rack", 0), ("rack", 17), ("ika", 0), ("ika", 11)):
+        with pytest.raises(KeyError):
+            store.sequence(station, slot, "pick")
+
+
+@pytest.fixture
+def grid_store(tmp_path):
+    data = {
+        "joint_poses": {"home": [0.0] * 7},
+        "cartesian_poses": {"above": [0.1, 0.2, 0.3, 3.14, 0.0, 0.0]},
+        "pose_profiles": {"above": "approach"},
+        "paths": {"to_tray": ["home", "above"]},
+        "stations": {"tray": {
+            "grid": {"first_slot": 1, "slots": 4, "columns": 2, "origin": {"x": 0.5, "y": 0.0, "z": 0.1},
+                     "column_pitch": {"y": 0.05}, "row_pitch": {"x": 0.04}, "per_row": {"z_lift": [0.2, 0.25]}},
+            "orientation": [3.14, 0.0, 0.0],
+            "release_width": 0.025,
+            "waypoints": {"entry": "above"},
+            "phases": {"grasp": {"x": "x", "y": "y", "z": "z"},
+                       "lift": {"x": "x", "y": "y", "z": "z_lift"},
+                       "drop": {"x": "x", "y": "y", "z": "z", "dz": 0.01, "operation": "place"}},
+            "sequences": {"pick": ["grasp", "clamp", "lift"], "place": ["lift", "drop", "release", "lift"]},
+            "overrides": {"4": {"z": 0.12, "place": {"y": 0.06}, "sequences": {"pick": ["grasp", "clamp"]}}},
+        }},
+    }
+    path = tmp_path / "waypoints.json"
+    path.write_text(json.dumps(data))
+    return WaypointStore(str(path))
+
+
+def test_slot_poses_are_generated_from_the_grid(grid_store):
+    assert grid_store.slots("tray") == [1, 2, 3, 4]
+    assert grid_store.get("tray", 2, "grasp") == Waypoint("x", [0.5, 0.05, 0.1, 3.14, 0.0, 0.0])
+    assert grid_store.get("tray", 3, "lift").pose == [0.54, 0.0, 0.25, 3.14, 0.0, 0.0]
+    assert grid_store.get("tray", 1, "drop").pose[2] == pytest.approx(0.11)
+
+
+def test_overrides_replace_grid_values(grid_store):
+    assert grid_store.get("tray", 4, "grasp").pose == [0.54, 0.05, 0.12, 3.14, 0.0, 0.0]
+    assert grid_store.get("tray", 4, "drop").pose == [0.54, 0.06, 0.13, 3.14, 0.0, 0.0] # place only override
+    assert grid_store.sequence("tray", 4, "pick") == [grid_store.get("tray", 4, "grasp"), "clamp"]
+    assert len(grid_store.sequence("tray", 3, "pick")) == 3
+
+
+def test_named_poses_paths_and_station_waypoints(grid_store):
+    assert grid_store.named("home").kind == "j"
+    assert grid_store.named("above").profile == "approach"
+    assert [waypoint.kind for waypoint in grid_store.path("to_tray")] == ["j", "x"]
+    assert grid_store.get("tray", None, "entry") == grid_store.named("above")
+    assert grid_store.release_width("tray") == 0.025
+    with pytest.raises(KeyError):
+        grid_store.named("missing")
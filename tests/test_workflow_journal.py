@@ -0,0 +1,56 @@
+import json
+
+from robinhood.utils.workflow_journal import WorkflowJournal
+
+
+def test_resume_skips_completed_steps_and_restores_the_state(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = WorkflowJournal(path)
+    journal.step_started(0, "dosing", "quantos_dosing")
+    journal.step_done(0, "dosing", "quantos_dosing", result=25.1, state={"vials": {"0": "quantos"}, "cartridge": "NaCl"})
+    journal.step_started(0, "to_pump", "vial_quantos_to_pump")
+
+    resumed = WorkflowJournal(path)
+    assert resumed.is_done(0, "dosing") and not resumed.is_done(0, "to_pump")
+    assert resumed.result(0, "dosing") == 25.1
+    assert resumed.completed_steps(0) == ["dosing"]
+    assert resumed.state == {"vials": {"0": "quantos"}, "cartridge": "NaCl"}
+    assert [record["step"] for record in resumed.interrupted] == ["to_pump"]
+
+
+def test_failed_steps_and_operator_changes_update_the_state(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = WorkflowJournal(path)
+    journal.step_failed(1, "capping", "vial_capper", RuntimeError("no cap"), state={"vials": {"1": "capper"}})
+    journal.update_state(vials={"1": "rack"}, holder="holding")
+    assert journal.state == {"vials": {"1": "rack"}, "holder": "holding"}
+
+    resumed = WorkflowJournal(path)
+    assert not resumed.is_done(1, "capping") and resumed.interrupted == []
+    assert resumed.state == {"vials": {"1": "rack"}, "holder": "holding"}
+
+
+def test_new_campaign_ignores_earlier_records(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    WorkflowJournal(path).step_done(0, "dosing", "quantos_dosing", state={"cartridge": "NaCl"})
+    WorkflowJournal(path, resume=False)
+    resumed = WorkflowJournal(path)
+    assert resumed.completed == {} and resumed.state == {"vials": {}}
+
+
+def test_truncated_line_and_unserialisable_results(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = WorkflowJournal(path)
+    journal.step_done(2, "picture", "take_picture", result=object())
+    assert journal.result(2, "picture").startswith("<object object")
+    with open(path, "a") as f:
+        f.write('{"type": "step_done", "sample"')
+
+    resumed = WorkflowJournal(path)
+    assert resumed.is_done(2, "picture")
+    assert json.loads(path.read_text().splitlines()[-1])["type"] == "campaign_start"
+
+    with open(path, "a") as f:
+        f.write('{"type": "step_done", "sample"')
+    WorkflowJournal(path, resume=False)
+    assert WorkflowJournal(path).completed == {}